@@ -1,12 +1,19 @@
 from django.contrib import admin
-from .models import SVO2Upload, ExtractionJob, FileProgress, ExtractionResult, ExtractedFile
+from .models import SVO2Upload, UploadSession, ExtractionJob, FileProgress, ExtractionResult, ExtractedFile
 
 @admin.register(SVO2Upload)
 class SVO2UploadAdmin(admin.ModelAdmin):
-    list_display = ['filename', 'file_size', 'uploaded_at']
-    list_filter = ['uploaded_at']
+    list_display = ['filename', 'file_size', 'total_frames', 'camera_model', 'camera_serial', 'uploaded_at']
+    list_filter = ['uploaded_at', 'camera_model']
+    search_fields = ['filename', 'camera_serial']
+    readonly_fields = ['uploaded_at', 'metadata_indexed_at']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'deduplicated', 'offset', 'file_size', 'created_at', 'updated_at']
+    list_filter = ['status', 'deduplicated', 'created_at']
     search_fields = ['filename']
-    readonly_fields = ['uploaded_at']
+    readonly_fields = ['id', 'created_at', 'updated_at']
 
 @admin.register(ExtractionJob)
 class ExtractionJobAdmin(admin.ModelAdmin):
@@ -18,7 +25,7 @@ class ExtractionJobAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Status', {
-            'fields': ('status', 'progress', 'error_message')
+            'fields': ('status', 'progress', 'error_message', 'heartbeat_at', 'resume_count')
         }),
         ('Extraction Options', {
             'fields': (
@@ -37,6 +44,31 @@ class ExtractionJobAdmin(admin.ModelAdmin):
                 'frame_start',
                 'frame_end',
                 'frame_step',
+                'point_cloud_format',
+                'depth_storage',
+                'depth_encoding',
+                'image_output',
+            )
+        }),
+        ('Image Codecs', {
+            'fields': (
+                'rgb_codec',
+                'depth_image_codec',
+                'confidence_codec',
+                'normals_codec',
+            )
+        }),
+        ('IMU Options', {
+            'fields': (
+                'imu_rate',
+                'imu_format',
+            )
+        }),
+        ('Pipeline Options', {
+            'fields': (
+                'writer_threads',
+                'queue_depth',
+                'num_shards',
             )
         }),
         ('Output', {
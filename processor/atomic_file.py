@@ -0,0 +1,22 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def replace_file(path):
+    """Binary file that replaces path once written
+
+    Written under a temporary name and renamed, so path is never truncated
+    in place: other hardlinks to the old file (extraction cache entries,
+    other jobs' outputs) keep their bytes, and a crash never leaves a torn
+    file at path.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+
+# Hidden, next to the manifest it describes
+CHECKPOINT_FILENAME = '.checkpoint.json'
+
+
+def read_checkpoint(path):
+    """The checkpoint saved at path, or None if there is none (or it is unreadable)"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(path, checkpoint):
+    """Atomically replace the checkpoint at path
+
+    Written to a temporary file, synced and renamed, so a crash leaves
+    either the old checkpoint or the new one, never a torn file.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def remove_checkpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class WrittenFrames:
+    """Tracks which output frames are fully written, from any writer thread
+
+    Frames finish out of order; `next_index` is the first frame not yet
+    written, i.e. every frame before it is on disk.
+    """
+
+    def __init__(self, next_index=0):
+        self.next_index = next_index
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def mark(self, frame_index):
+        with self.lock:
+            self.pending.add(frame_index)
+            while self.next_index in self.pending:
+                self.pending.remove(self.next_index)
+                self.next_index += 1
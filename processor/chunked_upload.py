@@ -0,0 +1,114 @@
+import fcntl
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from django.core.files.storage import default_storage
+
+# Bytes read from the request per write, so memory per upload stays bounded
+UPLOAD_READ_BYTES = 1024 * 1024
+
+# Hash state of uploads in progress in this process: session id -> (offset, sha256)
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadBusy(Exception):
+    """Another request is writing to the same upload"""
+
+
+@contextmanager
+def locked_upload(temp_path):
+    """Exclusive access to an upload's temporary file, across processes"""
+    with open(temp_path, 'r+b') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy()
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def upload_hasher(session_id, temp_file, offset):
+    """SHA-256 of the first offset bytes of an upload
+
+    Continued from this process's state when it is at the same offset,
+    otherwise (another process took the previous chunk, or a restart)
+    recomputed from the temporary file.
+    """
+    with _hashers_lock:
+        state = _hashers.pop(session_id, None)
+    if state is not None and state[0] == offset:
+        return state[1]
+
+    hasher = hashlib.sha256()
+    temp_file.seek(0)
+    remaining = offset
+    while remaining > 0:
+        data = temp_file.read(min(UPLOAD_READ_BYTES, remaining))
+        if not data:
+            break
+        hasher.update(data)
+        remaining -= len(data)
+    return hasher
+
+
+def keep_hasher(session_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[session_id] = (offset, hasher)
+
+
+def forget_hasher(session_id):
+    with _hashers_lock:
+        _hashers.pop(session_id, None)
+
+
+def write_chunk(temp_file, offset, stream, max_bytes, hasher):
+    """Copy up to max_bytes from stream into temp_file at offset; returns bytes written
+
+    Bytes past offset from an earlier, unacknowledged attempt are dropped
+    first. If the stream breaks, what was received so far is kept: the
+    caller records the returned count (use written_before_error on the
+    raised exception) as the new offset. Everything is synced to disk
+    before returning.
+    """
+    temp_file.seek(offset)
+    temp_file.truncate()
+    written = 0
+    try:
+        while written < max_bytes:
+            data = stream.read(min(UPLOAD_READ_BYTES, max_bytes - written))
+            if not data:
+                break
+            temp_file.write(data)
+            hasher.update(data)
+            written += len(data)
+    except Exception as e:
+        e.written_before_error = written
+        raise
+    finally:
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    return written
+
+
+def publish_upload(temp_path, filename, upload_to='svo2_files/'):
+    """Move a finished upload into media storage; returns its storage name
+
+    Hardlinked under a free name (never replacing another upload), then
+    the temporary name is removed, so the file appears complete or not at all.
+    """
+    name = default_storage.get_valid_name(os.path.basename(filename))
+    while True:
+        storage_name = default_storage.get_available_name(os.path.join(upload_to, name))
+        path = default_storage.path(storage_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(temp_path, path)
+            break
+        except FileExistsError:
+            continue
+    os.remove(temp_path)
+    return storage_name
@@ -0,0 +1,134 @@
+import io
+import time
+import cv2
+import numpy as np
+from .atomic_file import replace_file
+
+try:
+    import lz4.frame
+except ImportError:  # Optional: only the npy_lz4 encoding needs it
+    lz4 = None
+
+# Encoding key -> file extension (appended to frame_XXXXXX)
+DEPTH_ENCODING_EXTENSIONS = {
+    'float32_npy': 'npy',
+    'float16_npy': 'npy',
+    'uint16_png': 'depth.png',
+    'npz_zlib': 'npz',
+    'npy_lz4': 'npy.lz4',
+}
+
+# Encodings that can also be written into the single-file depth store
+MEMMAP_DEPTH_DTYPES = {
+    'float32_npy': np.float32,
+    'float16_npy': np.float16,
+}
+
+# Stored in place of NaN/inf by the integer and compressed encodings
+INVALID_DEPTH_SENTINEL = 0
+
+# uint16 PNG stores millimetres, so the range tops out at 65.535 m
+PNG_MAX_MILLIMETERS = np.iinfo(np.uint16).max
+
+
+def _sanitize(depth):
+    """Float32 copy of depth with NaN/inf replaced by the sentinel"""
+    depth = np.array(depth, dtype=np.float32)
+    depth[~np.isfinite(depth)] = INVALID_DEPTH_SENTINEL
+    return depth
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def encode_depth(depth, encoding):
+    """Encode a float32 depth map (meters) into the bytes of the target file"""
+    if encoding == 'float32_npy':
+        return _npy_bytes(np.asarray(depth, dtype=np.float32))
+
+    if encoding == 'float16_npy':
+        # float16 keeps NaN/inf natively; ~1.5 cm resolution at 20 m
+        return _npy_bytes(np.asarray(depth).astype(np.float16))
+
+    if encoding == 'uint16_png':
+        millimeters = np.rint(_sanitize(depth) * 1000.0)
+        np.clip(millimeters, 0, PNG_MAX_MILLIMETERS, out=millimeters)
+        ok, buffer = cv2.imencode('.png', millimeters.astype(np.uint16), [cv2.IMWRITE_PNG_COMPRESSION, 3])
+        if not ok:
+            raise Exception("Failed to encode depth as PNG")
+        return buffer.tobytes()
+
+    if encoding == 'npz_zlib':
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, depth=_sanitize(depth))
+        return buffer.getvalue()
+
+    if encoding == 'npy_lz4':
+        if lz4 is None:
+            raise Exception("The npy_lz4 depth encoding requires the 'lz4' package")
+        return lz4.frame.compress(_npy_bytes(_sanitize(depth)))
+
+    raise ValueError(f"Unknown depth encoding: {encoding}")
+
+
+def write_depth(depth, path_stem, encoding):
+    """Encode and write one depth map next to path_stem
+
+    Returns (file_path, encoded_bytes, encode_seconds).
+    """
+    start = time.perf_counter()
+    data = encode_depth(depth, encoding)
+    encode_seconds = time.perf_counter() - start
+
+    file_path = f'{path_stem}.{DEPTH_ENCODING_EXTENSIONS[encoding]}'
+    with replace_file(file_path) as f:
+        f.write(data)
+    return file_path, len(data), encode_seconds
+
+
+def depth_encoding_for_path(path):
+    """Guess the encoding of a depth file from its name"""
+    if path.endswith('.depth.png'):
+        return 'uint16_png'
+    if path.endswith('.npz'):
+        return 'npz_zlib'
+    if path.endswith('.npy.lz4'):
+        return 'npy_lz4'
+    if path.endswith('.npy'):
+        return 'float32_npy'  # float16 files are told apart by their dtype
+    return None
+
+
+def _restore_invalid(depth):
+    depth[depth == INVALID_DEPTH_SENTINEL] = np.nan
+    return depth
+
+
+def load_depth(path):
+    """Load any encoded depth file back to a float32 map in meters
+
+    Invalid pixels come back as NaN for the sentinel-based encodings.
+    """
+    encoding = depth_encoding_for_path(path)
+
+    if encoding == 'uint16_png':
+        millimeters = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if millimeters is None:
+            raise Exception(f"Failed to read depth PNG: {path}")
+        return _restore_invalid(millimeters.astype(np.float32) / 1000.0)
+
+    if encoding == 'npz_zlib':
+        with np.load(path) as data:
+            return _restore_invalid(data['depth'].astype(np.float32))
+
+    if encoding == 'npy_lz4':
+        if lz4 is None:
+            raise Exception("Reading .npy.lz4 depth requires the 'lz4' package")
+        with open(path, 'rb') as f:
+            raw = lz4.frame.decompress(f.read())
+        return _restore_invalid(np.load(io.BytesIO(raw)).astype(np.float32))
+
+    return np.load(path).astype(np.float32)
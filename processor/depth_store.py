@@ -0,0 +1,78 @@
+import os
+import numpy as np
+
+STORE_FILENAME = 'depth_frames.npy'
+INDEX_FILENAME = 'depth_index.npy'
+
+# One row per output frame; svo_frame is -1 until the frame has been written
+INDEX_DTYPE = np.dtype([
+    ('svo_frame', '<i8'),
+    ('timestamp_ns', '<i8'),
+])
+
+
+class DepthStore:
+    """Preallocated (frames, height, width) depth array on disk plus a frame index
+
+    Both files are plain .npy so they can be opened with
+    `np.load(path, mmap_mode='r')` and any frame read without touching the
+    rest. Writers for different frames (threads or shard processes) can fill
+    their slots concurrently.
+    """
+
+    def __init__(self, folder, frame_count, height, width, dtype=np.float32):
+        self.store_path = os.path.join(folder, STORE_FILENAME)
+        self.index_path = os.path.join(folder, INDEX_FILENAME)
+        dtype = np.dtype(dtype)
+
+        # Reuse an existing store (shards, resumed jobs) when it fits
+        if self._existing_fits(frame_count, height, width, dtype):
+            self.frames = np.load(self.store_path, mmap_mode='r+')
+            self.index = np.load(self.index_path, mmap_mode='r+')
+        else:
+            self.frames = np.lib.format.open_memmap(
+                self.store_path, mode='w+', dtype=dtype, shape=(frame_count, height, width)
+            )
+            self.index = np.lib.format.open_memmap(
+                self.index_path, mode='w+', dtype=INDEX_DTYPE, shape=(frame_count,)
+            )
+            self.index['svo_frame'] = -1
+
+    def _existing_fits(self, frame_count, height, width, dtype):
+        if not (os.path.exists(self.store_path) and os.path.exists(self.index_path)):
+            return False
+        frames = np.load(self.store_path, mmap_mode='r')
+        index = np.load(self.index_path, mmap_mode='r')
+        return (
+            frames.dtype == dtype
+            and frames.shape[1:] == (height, width)
+            and frames.shape[0] >= frame_count
+            and index.shape[0] == frames.shape[0]
+        )
+
+    def write(self, frame_index, depth, svo_frame, timestamp_ns=0):
+        """Store one frame in its slot and mark it in the index"""
+        self.frames[frame_index] = depth
+        self.index[frame_index] = (svo_frame, timestamp_ns)
+
+    def flush(self):
+        self.frames.flush()
+        self.index.flush()
+
+    def close(self):
+        self.flush()
+        # Drop the mappings so the files can be moved or deleted
+        del self.frames
+        del self.index
+
+
+def load_depth_frame(store_path, frame_index):
+    """Read a single frame from a depth store without loading the others"""
+    frames = np.load(store_path, mmap_mode='r')
+    return np.array(frames[frame_index])
+
+
+def load_depth_index(store_path):
+    """Load the frame index that sits next to a depth store"""
+    index_path = os.path.join(os.path.dirname(store_path), INDEX_FILENAME)
+    return np.load(index_path)
@@ -0,0 +1,126 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from .image_codecs import IMAGE_CODEC_PROFILES, IMAGE_CODEC_OPTIONS, DEFAULT_IMAGE_CODECS
+from .depth_codecs import DEPTH_ENCODING_EXTENSIONS
+from .point_cloud_writer import POINT_CLOUD_EXTENSIONS
+
+# Categories computed by the depth engine, so their bytes depend on depth_mode
+DEPTH_CATEGORIES = ('depth', 'point_cloud', 'confidence', 'normals')
+
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Seconds between checks while an identical extraction holds the lock
+COALESCE_POLL_SECONDS = 5
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_product(category, file_type, options):
+    """(cache key, file extension) of one per-frame output
+
+    The key names the product plus every option that changes its bytes.
+    """
+    if file_type == 'image':
+        profile = options.get(IMAGE_CODEC_OPTIONS[category], DEFAULT_IMAGE_CODECS[IMAGE_CODEC_OPTIONS[category]])
+        parts, extension = [category, profile], IMAGE_CODEC_PROFILES[profile][0]
+    elif file_type == 'depth':
+        encoding = options.get('depth_encoding', 'float32_npy')
+        parts, extension = ['depth_raw', encoding], DEPTH_ENCODING_EXTENSIONS[encoding]
+    else:
+        pc_format = options.get('point_cloud_format', 'ply_binary')
+        parts, extension = ['point_cloud', pc_format], POINT_CLOUD_EXTENSIONS[pc_format]
+
+    if category in DEPTH_CATEGORIES:
+        parts.append(options.get('depth_mode', 'ULTRA'))
+    return '-'.join(parts), extension
+
+
+def link_file(source, destination):
+    """Hardlink source at destination (replacing it), copying across filesystems"""
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ExtractionCache:
+    """Per-frame outputs of one SVO file, shared by every job that extracts it
+
+    Entries live under <root>/<hash[:2]>/<hash>/<product key>/svo_<frame>.<ext>,
+    keyed by SVO frame so jobs with different frame ranges or steps share
+    them. Entries are immutable once published and jobs get hardlinks, so
+    deleting a job or the whole cache never affects the other.
+    """
+
+    def __init__(self, root, content_hash):
+        self.dir = os.path.join(root, content_hash[:2], content_hash)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def entry_path(self, product_key, svo_frame, extension):
+        return os.path.join(self.dir, product_key, f'svo_{svo_frame:06d}.{extension}')
+
+    def fetch(self, product_key, svo_frame, extension, destination):
+        """Link a cached output to destination; returns False on a miss"""
+        entry = self.entry_path(product_key, svo_frame, extension)
+        hit = os.path.exists(entry)
+        if hit:
+            link_file(entry, destination)
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def store(self, product_key, svo_frame, extension, source):
+        """Publish a freshly written output (safe to call from writer threads)"""
+        entry = self.entry_path(product_key, svo_frame, extension)
+        if os.path.exists(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # Linked under a private name, then renamed, so readers never see a partial copy
+        tmp_path = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        link_file(source, tmp_path)
+        os.replace(tmp_path, entry)
+
+    @contextmanager
+    def coalesce(self, product_keys, frame_range, on_wait=None):
+        """Hold the lock of one (products, frame range) extraction of this file
+
+        An identical job started meanwhile blocks here until the first one
+        finishes, then finds every output in the cache. on_wait is called
+        every COALESCE_POLL_SECONDS while waiting (e.g. to heartbeat).
+        """
+        signature = json.dumps([sorted(product_keys), list(frame_range)])
+        name = hashlib.sha1(signature.encode()).hexdigest()[:16]
+        os.makedirs(self.dir, exist_ok=True)
+        with open(os.path.join(self.dir, f'.lock-{name}'), 'w') as lock_file:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if on_wait:
+                        on_wait()
+                    time.sleep(COALESCE_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,5 +1,6 @@
 from django import forms
 from .models import ExtractionJob
+from .depth_codecs import MEMMAP_DEPTH_DTYPES
 
 class ExtractionOptionsForm(forms.ModelForm):
     class Meta:
@@ -16,6 +17,19 @@ class ExtractionOptionsForm(forms.ModelForm):
             'frame_start',
             'frame_end',
             'frame_step',
+            'point_cloud_format',
+            'depth_storage',
+            'depth_encoding',
+            'image_output',
+            'rgb_codec',
+            'depth_image_codec',
+            'confidence_codec',
+            'normals_codec',
+            'imu_rate',
+            'imu_format',
+            'writer_threads',
+            'queue_depth',
+            'num_shards',
         ]
         widgets = {
             'extract_rgb_left': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -29,6 +43,19 @@ class ExtractionOptionsForm(forms.ModelForm):
             'frame_start': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
             'frame_end': forms.NumberInput(attrs={'class': 'form-control', 'min': '0'}),
             'frame_step': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'value': '1'}),
+            'point_cloud_format': forms.Select(attrs={'class': 'form-select'}),
+            'depth_storage': forms.Select(attrs={'class': 'form-select'}),
+            'depth_encoding': forms.Select(attrs={'class': 'form-select'}),
+            'image_output': forms.Select(attrs={'class': 'form-select'}),
+            'rgb_codec': forms.Select(attrs={'class': 'form-select'}),
+            'depth_image_codec': forms.Select(attrs={'class': 'form-select'}),
+            'confidence_codec': forms.Select(attrs={'class': 'form-select'}),
+            'normals_codec': forms.Select(attrs={'class': 'form-select'}),
+            'imu_rate': forms.Select(attrs={'class': 'form-select'}),
+            'imu_format': forms.Select(attrs={'class': 'form-select'}),
+            'writer_threads': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'max': '64'}),
+            'queue_depth': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'max': '256'}),
+            'num_shards': forms.NumberInput(attrs={'class': 'form-control', 'min': '1', 'max': '64'}),
         }
         labels = {
             'extract_rgb_left': 'RGB Left Camera',
@@ -42,4 +69,35 @@ class ExtractionOptionsForm(forms.ModelForm):
             'frame_start': 'Start Frame',
             'frame_end': 'End Frame',
             'frame_step': 'Frame Step',
-        }
\ No newline at end of file
+            'point_cloud_format': 'Point Cloud Format',
+            'depth_storage': 'Depth Storage',
+            'depth_encoding': 'Depth Encoding',
+            'image_output': 'Image Output',
+            'rgb_codec': 'RGB Codec',
+            'depth_image_codec': 'Depth Visualization Codec',
+            'confidence_codec': 'Confidence Codec',
+            'normals_codec': 'Normals Codec',
+            'imu_rate': 'IMU Rate',
+            'imu_format': 'IMU Format',
+            'writer_threads': 'Writer Threads',
+            'queue_depth': 'Queue Depth',
+            'num_shards': 'Worker Processes',
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        # The single-file store holds plain arrays, so only the .npy encodings fit
+        if (cleaned_data.get('depth_storage') == 'memmap'
+                and cleaned_data.get('depth_encoding') not in MEMMAP_DEPTH_DTYPES):
+            raise forms.ValidationError(
+                'Single-file depth storage only supports the Float32 and Float16 .npy encodings'
+            )
+        
+        # A video is appended frame by frame, which shards can't share
+        if cleaned_data.get('image_output', 'frames') != 'frames' and (cleaned_data.get('num_shards') or 1) > 1:
+            raise forms.ValidationError(
+                'Video image output needs a single worker process per file'
+            )
+        
+        return cleaned_data
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FramePipeline:
+    """Thread pool for frame encoding and disk writes with a bounded backlog
+
+    The grab loop is the producer: `submit` blocks once `queue_depth` frames
+    are waiting or being written, so memory held by copied frame buffers
+    stays capped while the SDK keeps grabbing. Work submitted with a `lane`
+    runs on that lane's single thread, in submission order (e.g. frames
+    appended to one video file).
+    """
+
+    def __init__(self, num_workers=4, queue_depth=8):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, num_workers),
+            thread_name_prefix='frame-writer'
+        )
+        self.slots = threading.BoundedSemaphore(max(1, queue_depth))
+        self.lanes = {}
+        self.error = None
+        self.error_lock = threading.Lock()
+
+    def submit(self, fn, *args, lane=None):
+        """Queue fn(*args) on the pool (or an ordered lane), waiting for a free slot first"""
+        self.raise_if_failed()
+        self.slots.acquire()
+        try:
+            self._executor_for(lane).submit(self._run, fn, args)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def _executor_for(self, lane):
+        if lane is None:
+            return self.executor
+        if lane not in self.lanes:
+            self.lanes[lane] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'frame-lane-{lane}')
+        return self.lanes[lane]
+
+    def _run(self, fn, args):
+        try:
+            fn(*args)
+        except BaseException as e:
+            with self.error_lock:
+                if self.error is None:
+                    self.error = e
+        finally:
+            self.slots.release()
+
+    def raise_if_failed(self):
+        """Re-raise the first error hit by a worker, if any"""
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """Wait for all queued writes to finish"""
+        self.executor.shutdown(wait=True)
+        for lane_executor in self.lanes.values():
+            lane_executor.shutdown(wait=True)
+        self.raise_if_failed()
@@ -0,0 +1,59 @@
+import time
+import cv2
+from .atomic_file import replace_file
+
+# Profile key -> (file extension, cv2.imencode params)
+IMAGE_CODEC_PROFILES = {
+    'jpeg_95': ('jpg', [cv2.IMWRITE_JPEG_QUALITY, 95]),
+    'jpeg_85': ('jpg', [cv2.IMWRITE_JPEG_QUALITY, 85]),
+    'jpeg_75': ('jpg', [cv2.IMWRITE_JPEG_QUALITY, 75]),
+    'webp_90': ('webp', [cv2.IMWRITE_WEBP_QUALITY, 90]),
+    'webp_75': ('webp', [cv2.IMWRITE_WEBP_QUALITY, 75]),
+    'webp_lossless': ('webp', [cv2.IMWRITE_WEBP_QUALITY, 101]),  # quality > 100 selects lossless
+    'png_fast': ('png', [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+    'png_small': ('png', [cv2.IMWRITE_PNG_COMPRESSION, 9]),
+}
+
+LOSSLESS_PROFILES = ('webp_lossless', 'png_fast', 'png_small')
+
+# Job option holding the profile for each image category
+IMAGE_CODEC_OPTIONS = {
+    'rgb_left': 'rgb_codec',
+    'rgb_right': 'rgb_codec',
+    'depth': 'depth_image_codec',
+    'confidence': 'confidence_codec',
+    'normals': 'normals_codec',
+}
+
+# Visual outputs keep cv2.imwrite's old JPEG quality; analysed maps default to lossless
+DEFAULT_IMAGE_CODECS = {
+    'rgb_codec': 'jpeg_95',
+    'depth_image_codec': 'jpeg_95',
+    'confidence_codec': 'png_fast',
+    'normals_codec': 'png_fast',
+}
+
+
+def encode_image(image, profile):
+    """Encode an image with a codec profile; returns the encoded uint8 buffer"""
+    extension, params = IMAGE_CODEC_PROFILES[profile]
+    ok, buffer = cv2.imencode(f'.{extension}', image, params)
+    if not ok:
+        raise Exception(f"Failed to encode image as {profile}")
+    return buffer
+
+
+def write_image(image, path_stem, profile):
+    """Encode and write one image next to path_stem
+
+    The encoded buffer is written as-is, without an intermediate bytes copy.
+    Returns (file_path, encoded_bytes, encode_seconds).
+    """
+    start = time.perf_counter()
+    buffer = encode_image(image, profile)
+    encode_seconds = time.perf_counter() - start
+
+    file_path = f'{path_stem}.{IMAGE_CODEC_PROFILES[profile][0]}'
+    with replace_file(file_path) as f:
+        f.write(buffer.data)
+    return file_path, buffer.nbytes, encode_seconds
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from processor.models import ExtractedFile, ExtractionJob
+from processor.depth_codecs import DEPTH_ENCODING_EXTENSIONS, encode_depth, load_depth, lz4
+from processor.depth_store import STORE_FILENAME
+import numpy as np
+import os
+import tempfile
+import time
+
+class Command(BaseCommand):
+    help = 'Compare depth encodings (size and encode/decode time) on depth frames from a finished job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_id', type=int, help='Job whose depth output is used as sample data')
+        parser.add_argument('--frames', type=int, default=10, help='Number of evenly spaced frames to sample')
+
+    def handle(self, *args, **options):
+        job_id = options['job_id']
+
+        try:
+            job = ExtractionJob.objects.get(id=job_id)
+        except ExtractionJob.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'Job {job_id} not found'))
+            return
+
+        samples = self._load_samples(job, options['frames'])
+        if not samples:
+            self.stdout.write(self.style.ERROR(f'No depth data found for job {job_id}'))
+            return
+
+        raw_bytes = samples[0].nbytes
+        self.stdout.write(f'{len(samples)} frames of {samples[0].shape[1]}x{samples[0].shape[0]}, raw float32 {raw_bytes / 1e6:.2f} MB/frame')
+        self.stdout.write(f"{'encoding':<14}{'MB/frame':>10}{'ratio':>8}{'encode ms':>11}{'decode ms':>11}{'max err m':>11}")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for encoding, extension in DEPTH_ENCODING_EXTENSIONS.items():
+                if encoding == 'npy_lz4' and lz4 is None:
+                    self.stdout.write(f'{encoding:<14}  skipped (lz4 not installed)')
+                    continue
+
+                sizes, encode_times, decode_times, errors = [], [], [], []
+                for i, depth in enumerate(samples):
+                    start = time.perf_counter()
+                    data = encode_depth(depth, encoding)
+                    encode_times.append(time.perf_counter() - start)
+                    sizes.append(len(data))
+
+                    path = os.path.join(tmp_dir, f'sample_{i}.{extension}')
+                    with open(path, 'wb') as f:
+                        f.write(data)
+                    start = time.perf_counter()
+                    decoded = load_depth(path)
+                    decode_times.append(time.perf_counter() - start)
+
+                    valid = np.isfinite(depth) & np.isfinite(decoded)
+                    errors.append(float(np.abs(decoded[valid] - depth[valid]).max()) if valid.any() else 0.0)
+
+                mean_size = np.mean(sizes)
+                self.stdout.write(
+                    f'{encoding:<14}{mean_size / 1e6:>10.2f}{raw_bytes / mean_size:>8.1f}'
+                    f'{np.mean(encode_times) * 1000:>11.1f}{np.mean(decode_times) * 1000:>11.1f}{max(errors):>11.4f}'
+                )
+
+    def _load_samples(self, job, count):
+        """Evenly spaced float32 depth frames from the job's depth output"""
+        depth_files = ExtractedFile.objects.filter(job=job, category='depth', file_type='depth')
+
+        store = depth_files.filter(filename=STORE_FILENAME).first()
+        if store:
+            frames = np.load(store.file_path, mmap_mode='r')
+            picks = np.linspace(0, len(frames) - 1, min(count, len(frames))).astype(int)
+            return [np.array(frames[i], dtype=np.float32) for i in picks]
+
+        paths = list(depth_files.exclude(frame_number=None).order_by('frame_number').values_list('file_path', flat=True))
+        if not paths:
+            return []
+        picks = np.linspace(0, len(paths) - 1, min(count, len(paths))).astype(int)
+        return [load_depth(paths[i]) for i in picks]
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from processor.models import ExtractedFile, ExtractionJob
+from processor.image_codecs import IMAGE_CODEC_PROFILES, LOSSLESS_PROFILES, encode_image
+from processor.video_writer import read_video_frame
+import cv2
+import numpy as np
+import time
+
+class Command(BaseCommand):
+    help = 'Compare image codec profiles (encode time and size) on image frames from a finished job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_id', type=int, help='Job whose image output is used as sample data')
+        parser.add_argument('--frames', type=int, default=10, help='Number of evenly spaced frames to sample per category')
+        parser.add_argument('--category', action='append', choices=[c for c, _ in ExtractedFile.CATEGORY_CHOICES],
+                            help='Only benchmark this category (repeatable)')
+
+    def handle(self, *args, **options):
+        job_id = options['job_id']
+
+        try:
+            job = ExtractionJob.objects.get(id=job_id)
+        except ExtractionJob.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'Job {job_id} not found'))
+            return
+
+        categories = options['category'] or ['rgb_left', 'rgb_right', 'depth', 'confidence', 'normals']
+        benchmarked = False
+
+        for category in categories:
+            samples = self._load_samples(job, category, options['frames'])
+            if not samples:
+                continue
+            benchmarked = True
+
+            raw_bytes = samples[0].nbytes
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{category}: {len(samples)} frames of {samples[0].shape[1]}x{samples[0].shape[0]}, raw {raw_bytes / 1e3:.0f} KB/frame'
+            ))
+            self.stdout.write(f"{'profile':<15}{'KB/frame':>10}{'ratio':>8}{'encode ms':>11}  lossless")
+
+            for profile in IMAGE_CODEC_PROFILES:
+                sizes, encode_times = [], []
+                for image in samples:
+                    start = time.perf_counter()
+                    buffer = encode_image(image, profile)
+                    encode_times.append(time.perf_counter() - start)
+                    sizes.append(buffer.nbytes)
+
+                mean_size = np.mean(sizes)
+                self.stdout.write(
+                    f'{profile:<15}{mean_size / 1e3:>10.1f}{raw_bytes / mean_size:>8.1f}'
+                    f'{np.mean(encode_times) * 1000:>11.2f}  {"yes" if profile in LOSSLESS_PROFILES else "no"}'
+                )
+
+        if not benchmarked:
+            self.stdout.write(self.style.ERROR(f'No image data found for job {job_id}'))
+
+    def _load_samples(self, job, category, count):
+        """Evenly spaced decoded images of one category from per-frame files or a video"""
+        files = ExtractedFile.objects.filter(job=job, category=category)
+
+        paths = list(files.filter(file_type='image').order_by('frame_number').values_list('file_path', flat=True))
+        if paths:
+            picks = np.linspace(0, len(paths) - 1, min(count, len(paths))).astype(int)
+            images = [cv2.imread(paths[i], cv2.IMREAD_UNCHANGED) for i in picks]
+            return [image for image in images if image is not None]
+
+        video = files.filter(file_type='video').first()
+        if video:
+            capture = cv2.VideoCapture(video.file_path)
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+            if frame_count > 0:
+                picks = np.linspace(0, frame_count - 1, min(count, frame_count)).astype(int)
+                images = [read_video_frame(video.file_path, i) for i in picks]
+                return [image for image in images if image is not None]
+
+        return []
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from processor.models import SVO2Upload, ExtractionJob
+from processor.svo2_preview import SVO2Preview, PREVIEW_VIEWS, DEFAULT_PREVIEW_VIEWS, DEFAULT_PREVIEW_WIDTH
+import numpy as np
+import time
+
+class Command(BaseCommand):
+    help = 'Compare preview latency of one multi-view render against separate per-view renders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_id', type=int, help='Uploaded SVO2 file to preview')
+        parser.add_argument('--frames', type=int, default=10, help='Number of evenly spaced frames to sample')
+        parser.add_argument('--view', action='append', choices=PREVIEW_VIEWS,
+                            help='View to render (repeatable, defaults to the configure page views)')
+        parser.add_argument('--depth-mode', default='ULTRA', choices=[m for m, _ in ExtractionJob.DEPTH_MODE_CHOICES])
+        parser.add_argument('--width', type=int, default=DEFAULT_PREVIEW_WIDTH)
+        parser.add_argument('--cold', action='store_true',
+                            help='Also time separate renders that each open their own camera (unpooled requests)')
+
+    def handle(self, *args, **options):
+        file_id = options['file_id']
+
+        try:
+            svo_file = SVO2Upload.objects.get(id=file_id)
+        except SVO2Upload.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'File {file_id} not found'))
+            return
+
+        views = options['view'] or list(DEFAULT_PREVIEW_VIEWS)
+        depth_mode, width = options['depth_mode'], options['width']
+
+        # Renders bypass the preview cache, so every sample grabs
+        preview = SVO2Preview(svo_file.file.path)
+        preview.set_depth_mode(depth_mode)
+        preview.open()
+        try:
+            total_frames = preview.get_total_frames()
+            if total_frames <= 0:
+                self.stdout.write(self.style.ERROR(f'{svo_file.filename} has no frames'))
+                return
+            picks = np.linspace(0, total_frames - 1, min(options['frames'], total_frames)).astype(int)
+            timings = {'separate': [], 'multi-view': []}
+            if options['cold']:
+                timings['separate, cold'] = []
+
+            for frame in picks:
+                frame = int(frame)
+                start = time.perf_counter()
+                for view in views:
+                    preview.render_frame(frame, view, depth_mode, width)
+                timings['separate'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                preview.render_views(frame, views, depth_mode, width)
+                timings['multi-view'].append(time.perf_counter() - start)
+
+                if options['cold']:
+                    start = time.perf_counter()
+                    for view in views:
+                        cold = SVO2Preview(svo_file.file.path)
+                        cold.set_depth_mode(depth_mode)
+                        cold.open()
+                        cold.render_frame(frame, view, depth_mode, width)
+                        cold.close()
+                    timings['separate, cold'].append(time.perf_counter() - start)
+        finally:
+            preview.close()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{svo_file.filename}: {len(picks)} frames, views {", ".join(views)}, depth {depth_mode}, width {width}'
+        ))
+        self.stdout.write(f"{'mode':<16}{'grabs':>7}{'mean ms':>10}{'p95 ms':>10}")
+        for mode, samples in timings.items():
+            grabs = 1 if mode == 'multi-view' else len(views)
+            self.stdout.write(
+                f'{mode:<16}{grabs:>7}{np.mean(samples) * 1000:>10.1f}{np.percentile(samples, 95) * 1000:>10.1f}'
+            )
+
+        speedup = np.mean(timings['separate']) / np.mean(timings['multi-view'])
+        self.stdout.write(self.style.SUCCESS(f'Multi-view is {speedup:.1f}x faster than {len(views)} separate renders'))
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from processor.models import ExtractedFile, ExtractionJob
+from processor.depth_store import INDEX_FILENAME
+from processor.video_writer import frame_table_path
 import os
 from django.conf import settings
 
@@ -39,7 +41,20 @@ class Command(BaseCommand):
             # Scan subdirectories
             for root, dirs, files in os.walk(file_output_dir):
                 for filename in files:
+                    # The depth store index is a sidecar of depth_frames.npy;
+                    # dotfiles (e.g. the manifest) are bookkeeping
+                    if filename == INDEX_FILENAME or filename.startswith('.'):
+                        continue
+                    
                     file_path = os.path.join(root, filename)
+                    
+                    # Frame tables are sidecars of their video
+                    if filename.endswith('_frames.csv') and any(
+                        frame_table_path(os.path.join(root, other)) == file_path
+                        for other in files if other.endswith(('.mp4', '.mkv'))
+                    ):
+                        continue
+                    
                     file_size = os.path.getsize(file_path)
                     
                     # Determine category from directory name
@@ -56,7 +71,7 @@ class Command(BaseCommand):
                         file_type = 'image'
                     elif 'Depth' in dir_name or '3_Depth' in dir_name:
                         category = 'depth'
-                        if filename.endswith('.npy'):
+                        if filename.endswith(('.npy', '.depth.png', '.npz', '.npy.lz4')):
                             file_type = 'depth'
                         else:
                             file_type = 'image'
@@ -71,7 +86,10 @@ class Command(BaseCommand):
                         file_type = 'image'
                     elif 'IMU' in dir_name or '7_IMU' in dir_name:
                         category = 'imu'
-                        file_type = 'csv'
+                        file_type = 'sensor' if filename.endswith('.npy') else 'csv'
+                    
+                    if category and filename.endswith(('.mp4', '.mkv')):
+                        file_type = 'video'
                     
                     if category:
                         # Extract frame number if present
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from processor.models import SVO2Upload
+from processor.tasks import ingest_upload
+
+class Command(BaseCommand):
+    help = 'Backfill the stored metadata (and optionally thumbnails/filmstrips) of existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file-id', type=int, action='append', help='Only index this upload (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Re-read uploads that are already indexed')
+        parser.add_argument('--previews', action='store_true',
+                            help='Also render thumbnails and filmstrips of uploads missing them')
+
+    def handle(self, *args, **options):
+        uploads = SVO2Upload.objects.order_by('id')
+        if options['file_id']:
+            uploads = uploads.filter(id__in=options['file_id'])
+        if not options['force']:
+            pending = Q(metadata_indexed_at__isnull=True)
+            if options['previews']:
+                pending |= Q(thumbnail='') | Q(filmstrip='')
+            uploads = uploads.filter(pending)
+
+        indexed = 0
+        for svo_file in uploads:
+            needs_metadata = options['force'] or svo_file.metadata_indexed_at is None
+            needs_previews = options['previews'] and (options['force'] or not svo_file.thumbnail or not svo_file.filmstrip)
+            ingest_upload(svo_file.id, metadata=needs_metadata, previews=needs_previews)
+
+            svo_file.refresh_from_db()
+            if svo_file.metadata_indexed_at is None:
+                self.stdout.write(self.style.ERROR(f'{svo_file.id}: {svo_file.filename} could not be indexed'))
+                continue
+            indexed += 1
+            self.stdout.write(
+                f'{svo_file.id}: {svo_file.filename} - {svo_file.total_frames} frames, '
+                f'{svo_file.width}x{svo_file.height} @ {svo_file.fps:g} fps, {svo_file.camera_model} #{svo_file.camera_serial}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} upload(s)'))
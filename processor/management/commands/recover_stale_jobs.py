@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from processor.tasks import recover_stale_jobs
+
+class Command(BaseCommand):
+    help = 'Resume processing jobs whose workers stopped sending heartbeats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-seconds', type=int, default=settings.STALE_JOB_SECONDS,
+                            help='Heartbeat age after which a processing job counts as orphaned')
+
+    def handle(self, *args, **options):
+        resumed = recover_stale_jobs(options['stale_seconds'])
+        
+        if resumed:
+            self.stdout.write(self.style.SUCCESS(
+                f'Resumed {len(resumed)} job(s): {", ".join(str(job_id) for job_id in resumed)}'
+            ))
+        else:
+            self.stdout.write('No stale jobs found')
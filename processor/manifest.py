@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+# Hidden so it is left out of archives and directory imports
+MANIFEST_FILENAME = '.manifest.jsonl'
+
+
+class ManifestWriter:
+    """Append-only JSON Lines log of extracted file records
+
+    One record per written file, appended as it is written (safe to call
+    from writer threads), so nothing accumulates in memory and the records
+    can be registered in batches afterwards. With append=True an existing
+    manifest is continued (resumed extraction).
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.file = open(path, 'a' if append else 'w')
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def append(self, record):
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.count += 1
+
+    def sync(self):
+        """Force the records appended so far to disk"""
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+def read_manifest(path):
+    """Yield the records of a manifest in the order they were written"""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def trim_manifest(path, before_frame):
+    """Keep only the per-frame records of frames before before_frame
+
+    Used when resuming: later frames are extracted again, per-file records
+    (videos, stores, sensor files) are re-added at the end, and a line torn
+    by a crash is dropped. Returns the number of records kept.
+    """
+    tmp_path = path + '.tmp'
+    kept = 0
+    with open(path, 'r') as src, open(tmp_path, 'w') as dst:
+        for line in src:
+            if not line.endswith('\n'):
+                break
+            record = json.loads(line)
+            if record['frame_number'] is not None and record['frame_number'] < before_frame:
+                dst.write(line)
+                kept += 1
+    os.replace(tmp_path, path)
+    return kept
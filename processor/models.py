@@ -1,5 +1,7 @@
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 import os
+import uuid
 
 class SVO2Upload(models.Model):
     file = models.FileField(upload_to='svo2_files/')
@@ -7,8 +9,57 @@ class SVO2Upload(models.Model):
     file_size = models.BigIntegerField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    # SHA-256 of the file; keys its outputs in the extraction cache. Unique: a
+    # repeat upload of the same content reuses this row and its stored file.
+    content_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)
+    
+    # Rendered once after upload (see ingest_upload) so listings never open a camera
+    thumbnail = models.FileField(upload_to='svo2_previews/', blank=True)
+    filmstrip = models.FileField(upload_to='svo2_previews/', blank=True)
+    filmstrip_frames = models.JSONField(default=list, blank=True)  # SVO frame of each filmstrip tile
+    
+    # Recording metadata, read once at ingest (see ingest_upload) so nothing else needs the SDK for it
+    metadata_indexed_at = models.DateTimeField(null=True, blank=True)
+    total_frames = models.IntegerField(null=True, blank=True)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    fps = models.FloatField(null=True, blank=True)
+    first_timestamp_ns = models.BigIntegerField(null=True, blank=True, db_index=True)
+    last_timestamp_ns = models.BigIntegerField(null=True, blank=True)
+    camera_model = models.CharField(max_length=50, blank=True, db_index=True)
+    camera_serial = models.BigIntegerField(null=True, blank=True, db_index=True)
+    calibration = models.JSONField(default=dict, blank=True)  # left/right intrinsics and baseline
+    sensors = models.JSONField(default=dict, blank=True)  # sensor name -> available
+    
     def __str__(self):
         return self.filename
+    
+    @property
+    def duration_seconds(self):
+        if self.first_timestamp_ns is None or self.last_timestamp_ns is None:
+            return None
+        return (self.last_timestamp_ns - self.first_timestamp_ns) / 1e9
+
+class UploadSession(models.Model):
+    """A chunked upload in progress: bytes up to `offset` are on disk in `temp_path`"""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    file_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    temp_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    upload = models.ForeignKey(SVO2Upload, null=True, blank=True, on_delete=models.SET_NULL)
+    deduplicated = models.BooleanField(default=False)  # Content was already stored; nothing was written
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.file_size})"
 
 class ExtractionJob(models.Model):
     STATUS_CHOICES = [
@@ -25,6 +76,53 @@ class ExtractionJob(models.Model):
         ('NEURAL', 'Neural'),
     ]
     
+    POINT_CLOUD_FORMAT_CHOICES = [
+        ('ply_binary', 'PLY (binary)'),
+        ('ply_ascii', 'PLY (ASCII)'),
+        ('pcd', 'PCD (binary)'),
+        ('npz', 'NumPy (.npz)'),
+    ]
+    
+    DEPTH_STORAGE_CHOICES = [
+        ('per_frame', 'One .npy per frame'),
+        ('memmap', 'Single memory-mapped .npy'),
+    ]
+    
+    DEPTH_ENCODING_CHOICES = [
+        ('float32_npy', 'Float32 .npy (raw)'),
+        ('float16_npy', 'Float16 .npy'),
+        ('uint16_png', '16-bit PNG (millimeters)'),
+        ('npz_zlib', 'Compressed .npz (zlib)'),
+        ('npy_lz4', 'LZ4-compressed .npy'),
+    ]
+    
+    IMAGE_OUTPUT_CHOICES = [
+        ('frames', 'Per-frame JPEG'),
+        ('mp4', 'MP4 video'),
+        ('mkv', 'MKV video'),
+    ]
+    
+    IMAGE_CODEC_CHOICES = [
+        ('jpeg_95', 'JPEG quality 95'),
+        ('jpeg_85', 'JPEG quality 85'),
+        ('jpeg_75', 'JPEG quality 75'),
+        ('webp_90', 'WebP quality 90'),
+        ('webp_75', 'WebP quality 75'),
+        ('webp_lossless', 'WebP lossless'),
+        ('png_fast', 'PNG (fast)'),
+        ('png_small', 'PNG (smallest)'),
+    ]
+    
+    IMU_RATE_CHOICES = [
+        ('image', 'One sample per frame'),
+        ('full', 'Every IMU sample'),
+    ]
+    
+    IMU_FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('npy', 'NumPy structured .npy'),
+    ]
+    
     svo2_files = models.ManyToManyField(SVO2Upload, related_name='jobs')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     progress = models.FloatField(default=0.0)
@@ -43,11 +141,36 @@ class ExtractionJob(models.Model):
     frame_start = models.IntegerField(default=0)
     frame_end = models.IntegerField(null=True, blank=True)
     frame_step = models.IntegerField(default=1)
+    point_cloud_format = models.CharField(max_length=20, choices=POINT_CLOUD_FORMAT_CHOICES, default='ply_binary')
+    depth_storage = models.CharField(max_length=20, choices=DEPTH_STORAGE_CHOICES, default='per_frame')
+    depth_encoding = models.CharField(max_length=20, choices=DEPTH_ENCODING_CHOICES, default='float32_npy')
+    image_output = models.CharField(max_length=20, choices=IMAGE_OUTPUT_CHOICES, default='frames')
+    
+    # Image codec profiles per category
+    rgb_codec = models.CharField(max_length=20, choices=IMAGE_CODEC_CHOICES, default='jpeg_95')
+    depth_image_codec = models.CharField(max_length=20, choices=IMAGE_CODEC_CHOICES, default='jpeg_95')
+    confidence_codec = models.CharField(max_length=20, choices=IMAGE_CODEC_CHOICES, default='png_fast')
+    normals_codec = models.CharField(max_length=20, choices=IMAGE_CODEC_CHOICES, default='png_fast')
+    
+    # IMU options
+    imu_rate = models.CharField(max_length=20, choices=IMU_RATE_CHOICES, default='image')
+    imu_format = models.CharField(max_length=20, choices=IMU_FORMAT_CHOICES, default='csv')
+    
+    # Pipeline options
+    writer_threads = models.IntegerField(default=4, validators=[MinValueValidator(1), MaxValueValidator(64)])
+    queue_depth = models.IntegerField(default=8, validators=[MinValueValidator(1), MaxValueValidator(256)])
+    num_shards = models.IntegerField(default=1, validators=[MinValueValidator(1), MaxValueValidator(64)])
     
     # Output
     output_path = models.CharField(max_length=500, blank=True)
     error_message = models.TextField(blank=True)
     
+    # Liveness: refreshed by running tasks, so stale jobs can be found and resumed
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    resume_count = models.IntegerField(default=0)
+    # Celery task id of the current run's finalize step; other finalize tasks exit
+    finalize_task_id = models.CharField(max_length=50, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -70,8 +193,27 @@ class FileProgress(models.Model):
     total_frames = models.IntegerField(default=0)
     error_message = models.TextField(blank=True)
     
+    # Per-frame outputs linked from / written to the extraction cache
+    cache_hits = models.IntegerField(default=0)
+    cache_misses = models.IntegerField(default=0)
+    
+    # Celery task id dispatched for each unit (the file, or each shard) by the
+    # current run, keyed by unit; any other task for the unit exits
+    task_ids = models.JSONField(default=dict, blank=True)
+    
+    # When the current run dispatched its units, and how many of them a worker
+    # has picked up so far; the rest are still queued (see recover_stale_jobs)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    units_started = models.IntegerField(default=0)
+    
     def __str__(self):
         return f"{self.svo2_file.filename} - {self.progress}%"
+    
+    @property
+    def cache_hit_rate(self):
+        """Percentage of per-frame outputs reused from the cache, None if nothing was looked up"""
+        lookups = self.cache_hits + self.cache_misses
+        return 100.0 * self.cache_hits / lookups if lookups else None
 
 class ExtractionResult(models.Model):
     job = models.ForeignKey(ExtractionJob, on_delete=models.CASCADE, related_name='results')
@@ -88,6 +230,8 @@ class ExtractedFile(models.Model):
         ('point_cloud', 'Point Cloud'),
         ('csv', 'CSV Data'),
         ('depth', 'Depth Data'),
+        ('video', 'Video'),
+        ('sensor', 'Sensor Data'),
     ]
     
     CATEGORY_CHOICES = [
@@ -0,0 +1,148 @@
+import numpy as np
+from .atomic_file import replace_file
+
+# On-disk vertex layout shared by the PLY writers (15 bytes, no padding)
+PLY_VERTEX_DTYPE = np.dtype([
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('red', 'u1'),
+    ('green', 'u1'),
+    ('blue', 'u1'),
+])
+
+# PCL convention: colour packed as 0x00RRGGBB in a 4-byte field
+PCD_POINT_DTYPE = np.dtype([
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('rgb', '<u4'),
+])
+
+POINT_CLOUD_EXTENSIONS = {
+    'ply_binary': 'ply',
+    'ply_ascii': 'ply',
+    'pcd': 'pcd',
+    'npz': 'npz',
+}
+
+# Rows formatted per string operation when writing ASCII PLY
+ASCII_CHUNK_ROWS = 65536
+
+
+def pack_point_cloud(point_cloud_data):
+    """Convert a ZED XYZRGBA array into a structured array of valid points"""
+    points = point_cloud_data.reshape(-1, 4)
+    xyz = points[:, :3]
+
+    # The 4th channel is a bit pattern, not a number, so only XYZ is validated
+    valid = np.isfinite(xyz).all(axis=1)
+
+    # Colour is stored as four bytes (R, G, B, A) packed into the float
+    rgba = np.ascontiguousarray(points[valid, 3]).view(np.uint32)
+
+    vertices = np.empty(rgba.shape[0], dtype=PLY_VERTEX_DTYPE)
+    vertices['x'] = xyz[valid, 0]
+    vertices['y'] = xyz[valid, 1]
+    vertices['z'] = xyz[valid, 2]
+    vertices['red'] = rgba & 0xFF
+    vertices['green'] = (rgba >> 8) & 0xFF
+    vertices['blue'] = (rgba >> 16) & 0xFF
+    return vertices
+
+
+def _ply_header(vertex_count, fmt):
+    return (
+        "ply\n"
+        f"format {fmt} 1.0\n"
+        f"element vertex {vertex_count}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "property uchar red\n"
+        "property uchar green\n"
+        "property uchar blue\n"
+        "end_header\n"
+    ).encode('ascii')
+
+
+def write_ply_binary(vertices, output_path):
+    """Write vertices as binary_little_endian PLY"""
+    with replace_file(output_path) as f:
+        f.write(_ply_header(len(vertices), 'binary_little_endian'))
+        f.write(vertices.tobytes())
+
+
+def write_ply_ascii(vertices, output_path):
+    """Write vertices as ASCII PLY, formatting whole chunks at once"""
+    columns = np.column_stack([
+        vertices['x'], vertices['y'], vertices['z'],
+        vertices['red'], vertices['green'], vertices['blue'],
+    ]).astype(np.float64)
+    row_format = "%.7g %.7g %.7g %d %d %d\n"
+
+    with replace_file(output_path) as f:
+        f.write(_ply_header(len(vertices), 'ascii'))
+        for start in range(0, len(columns), ASCII_CHUNK_ROWS):
+            chunk = columns[start:start + ASCII_CHUNK_ROWS]
+            text = (row_format * len(chunk)) % tuple(chunk.ravel().tolist())
+            f.write(text.encode('ascii'))
+
+
+def write_pcd_binary(vertices, output_path):
+    """Write vertices as a binary PCD v0.7 file"""
+    points = np.empty(len(vertices), dtype=PCD_POINT_DTYPE)
+    points['x'] = vertices['x']
+    points['y'] = vertices['y']
+    points['z'] = vertices['z']
+    points['rgb'] = (
+        (vertices['red'].astype(np.uint32) << 16)
+        | (vertices['green'].astype(np.uint32) << 8)
+        | vertices['blue'].astype(np.uint32)
+    )
+
+    header = (
+        "# .PCD v0.7 - Point Cloud Data file format\n"
+        "VERSION 0.7\n"
+        "FIELDS x y z rgb\n"
+        "SIZE 4 4 4 4\n"
+        "TYPE F F F U\n"
+        "COUNT 1 1 1 1\n"
+        f"WIDTH {len(points)}\n"
+        "HEIGHT 1\n"
+        "VIEWPOINT 0 0 0 1 0 0 0\n"
+        f"POINTS {len(points)}\n"
+        "DATA binary\n"
+    ).encode('ascii')
+
+    with replace_file(output_path) as f:
+        f.write(header)
+        f.write(points.tobytes())
+
+
+def write_npz(vertices, output_path):
+    """Write vertices as an .npz with `xyz` (N, 3) float32 and `rgb` (N, 3) uint8"""
+    xyz = np.column_stack([vertices['x'], vertices['y'], vertices['z']])
+    rgb = np.column_stack([vertices['red'], vertices['green'], vertices['blue']])
+    with replace_file(output_path) as f:
+        np.savez(f, xyz=xyz, rgb=rgb)
+
+
+WRITERS = {
+    'ply_binary': write_ply_binary,
+    'ply_ascii': write_ply_ascii,
+    'pcd': write_pcd_binary,
+    'npz': write_npz,
+}
+
+
+def save_point_cloud(point_cloud_data, output_path, fmt='ply_binary'):
+    """Filter a ZED point cloud and write it in the requested format
+
+    Returns the number of points written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown point cloud format: {fmt}")
+    vertices = pack_point_cloud(point_cloud_data)
+    WRITERS[fmt](vertices, output_path)
+    return len(vertices)
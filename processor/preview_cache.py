@@ -0,0 +1,364 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict, deque
+from django.conf import settings
+from .preview_pool import preview_pool
+from .svo2_preview import view_needs_depth
+
+
+def preview_key(file_id, frame_number, view_type, depth_mode, max_width):
+    """Cache key of one rendered preview; depth_mode only matters for depth views"""
+    if not view_needs_depth(view_type):
+        depth_mode = 'NONE'
+    return (file_id, frame_number, view_type, depth_mode, max_width)
+
+
+class PreviewFrameCache:
+    """Byte-bounded LRU of rendered preview JPEGs, with an optional disk tier
+
+    Memory holds up to max_bytes of JPEGs. With disk_dir set, every render
+    is also written under <disk_dir>/<file id>/, which survives restarts
+    and is shared by web processes; it is trimmed to disk_max_bytes from
+    this process's view of it (least recently used first).
+    """
+
+    def __init__(self, max_bytes, disk_dir=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()  # key -> JPEG bytes, least recently used first
+        self.size = 0
+        self.disk_entries = None  # path -> size, loaded on first use
+        self.disk_size = 0
+        self.counts = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'prefetched': 0, 'evictions': 0}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Rendered JPEG for key, or None; counts a hit when found"""
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.counts['hits'] += 1
+                return data
+
+        data = self._disk_read(key)
+        if data is not None:
+            with self.lock:
+                self.counts['disk_hits'] += 1
+                self._remember(key, data)
+        return data
+
+    def contains(self, key):
+        with self.lock:
+            if key in self.entries:
+                return True
+        return self.disk_dir is not None and os.path.exists(self._disk_path(key))
+
+    def put(self, key, data):
+        with self.lock:
+            self._remember(key, data)
+        self._disk_write(key, data)
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def discard(self, file_id):
+        """Drop every render of a file (e.g. before it is deleted)"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == file_id]:
+                self.size -= len(self.entries.pop(key))
+            if self.disk_dir is None:
+                return
+            file_dir = os.path.join(self.disk_dir, str(file_id))
+            if self.disk_entries is not None:
+                for path in [path for path in self.disk_entries if os.path.dirname(path) == file_dir]:
+                    self.disk_size -= self.disk_entries.pop(path)
+        shutil.rmtree(file_dir, ignore_errors=True)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counts['hits'] + self.counts['disk_hits'] + self.counts['misses']
+            hits = self.counts['hits'] + self.counts['disk_hits']
+            return {
+                **self.counts,
+                'hit_rate': round(hits / lookups, 3) if lookups else None,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'disk_bytes': self.disk_size if self.disk_dir else None,
+                'disk_max_bytes': self.disk_max_bytes if self.disk_dir else None,
+            }
+
+    def _remember(self, key, data):
+        """Add to the memory tier and evict over max_bytes (lock held)"""
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        if len(data) > self.max_bytes:
+            return
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.counts['evictions'] += 1
+
+    def _disk_path(self, key):
+        file_id = key[0]
+        name = hashlib.sha1(repr(key[1:]).encode()).hexdigest()
+        return os.path.join(self.disk_dir, str(file_id), f'{name}.jpg')
+
+    def _disk_read(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self.lock:
+            self._load_disk_entries()
+            if path not in self.disk_entries:
+                # Rendered by another process
+                self.disk_size += len(data)
+            self.disk_entries.pop(path, None)
+            self.disk_entries[path] = len(data)
+        return data
+
+    def _disk_write(self, key, data):
+        if self.disk_dir is None or len(data) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a private name, then renamed, so readers never see a partial file
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing preview cache entry: {e}")
+            return
+
+        with self.lock:
+            self._load_disk_entries()
+            self.disk_size += len(data) - self.disk_entries.pop(path, 0)
+            self.disk_entries[path] = len(data)
+            stale = []
+            while self.disk_size > self.disk_max_bytes:
+                stale_path, size = self.disk_entries.popitem(last=False)
+                self.disk_size -= size
+                stale.append(stale_path)
+        for stale_path in stale:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+    def _load_disk_entries(self):
+        """Index what earlier processes left on disk, oldest first (lock held)"""
+        if self.disk_entries is not None:
+            return
+        found = []
+        for root, dirs, files in os.walk(self.disk_dir):
+            for filename in files:
+                if not filename.endswith('.jpg'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        found.sort()
+        self.disk_entries = OrderedDict((path, size) for _, path, size in found)
+        self.disk_size = sum(self.disk_entries.values())
+
+
+def preview_session_mode(view_types, depth_mode):
+    """Depth mode of the pooled session that renders view_types"""
+    # RGB views share the depth-free session, so they skip depth engine initialisation
+    if any(view_needs_depth(view_type) for view_type in view_types):
+        return depth_mode
+    return 'NONE'
+
+
+def render_previews(file_id, svo_path, frame_number, view_types, depth_mode, max_width, wait=True):
+    """{view_type: JPEG bytes or None} of one frame, rendered from a single grab on a pooled camera
+
+    Returns None if the frame cannot be grabbed, or if wait=False and the
+    camera is busy serving another request.
+    """
+    session_mode = preview_session_mode(view_types, depth_mode)
+    with preview_pool.session(file_id, svo_path, session_mode, wait=wait) as preview:
+        if preview is None:
+            return None
+        return preview.render_views(frame_number, view_types, depth_mode, max_width)
+
+
+class PreviewPrefetcher:
+    """Renders the frames around each requested one in the background
+
+    After a request for frame N, frames N+1..N+frames and N-1..N-frames are
+    queued, nearest first, with the same views as the request (rendered
+    from one grab per frame). The newest request's frames are rendered
+    first and the queue is bounded, so frames of ranges the user has
+    scrubbed past are dropped. Prefetching never waits for a camera
+    serving a user request; it skips that frame instead.
+    """
+
+    def __init__(self, cache, frames):
+        self.cache = cache
+        self.frames = frames
+        self.max_pending = max(1, frames) * 8
+        self.pending = deque()
+        self.pending_keys = set()
+        self.condition = threading.Condition()
+        self.worker = None
+
+    def schedule(self, file_id, svo_path, frame_number, total_frames, view_types, depth_mode, max_width):
+        if self.frames <= 0:
+            return
+        neighbours = []
+        for distance in range(1, self.frames + 1):
+            neighbours += [frame_number + distance, frame_number - distance]
+
+        jobs = []
+        for neighbour in neighbours:
+            if 0 <= neighbour < total_frames:
+                job_key = (file_id, neighbour, tuple(view_types), depth_mode, max_width)
+                jobs.append((job_key, svo_path))
+
+        with self.condition:
+            for job in reversed(jobs):
+                if job[0] in self.pending_keys:
+                    self.pending.remove(job)
+                self.pending.appendleft(job)
+                self.pending_keys.add(job[0])
+            while len(self.pending) > self.max_pending:
+                stale_key, _ = self.pending.pop()
+                self.pending_keys.discard(stale_key)
+            self._start_worker()
+            self.condition.notify()
+
+    def discard(self, file_id):
+        with self.condition:
+            for job in [job for job in self.pending if job[0][0] == file_id]:
+                self.pending.remove(job)
+                self.pending_keys.discard(job[0])
+
+    def _start_worker(self):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, name='preview-prefetch', daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                job_key, svo_path = self.pending.popleft()
+                self.pending_keys.discard(job_key)
+
+            file_id, frame_number, view_types, depth_mode, max_width = job_key
+            missing = [
+                view_type for view_type in view_types
+                if not self.cache.contains(preview_key(file_id, frame_number, view_type, depth_mode, max_width))
+            ]
+            if not missing:
+                continue
+            try:
+                rendered = render_previews(file_id, svo_path, frame_number, missing, depth_mode, max_width, wait=False)
+            except Exception as e:
+                print(f"Error prefetching preview frame {frame_number}: {e}")
+                continue
+            for view_type, data in (rendered or {}).items():
+                if data is not None:
+                    self.cache.put(preview_key(file_id, frame_number, view_type, depth_mode, max_width), data)
+                    self.cache.count('prefetched')
+
+
+preview_cache = PreviewFrameCache(
+    settings.PREVIEW_CACHE_MAX_BYTES,
+    settings.PREVIEW_CACHE_DIR,
+    settings.PREVIEW_CACHE_DISK_MAX_BYTES,
+)
+preview_prefetcher = PreviewPrefetcher(preview_cache, settings.PREVIEW_PREFETCH_FRAMES)
+
+# Frame counts of previewed files, so cache hits need no camera
+_total_frames = {}
+
+
+def preview_frame_count(file_id, svo_path, session_mode='NONE', total_frames=None):
+    """Number of frames of a file, opening a camera only if it is not indexed, and only the first time"""
+    if total_frames is not None:
+        _total_frames[file_id] = total_frames
+        return total_frames
+    total_frames = _total_frames.get(file_id)
+    if total_frames is None:
+        with preview_pool.session(file_id, svo_path, session_mode) as preview:
+            total_frames = _total_frames[file_id] = preview.get_total_frames()
+    return total_frames
+
+
+def get_preview_views(file_id, svo_path, frame_number, view_types, depth_mode, max_width, prefetch=True,
+                      total_frames=None):
+    """({view_type: JPEG bytes or None}, clamped frame number, total frames) of one frame
+
+    Cached views are served from the cache; the rest are rendered together
+    from a single grab on a pooled camera. Unless prefetch is False, the
+    neighbouring frames are then queued for prefetch. Pass the indexed
+    total_frames when known.
+    """
+    session_mode = preview_session_mode(view_types, depth_mode)
+    total_frames = preview_frame_count(file_id, svo_path, session_mode, total_frames)
+    frame_number = max(0, min(frame_number, total_frames - 1))
+
+    images = {}
+    missing = []
+    for view_type in view_types:
+        images[view_type] = preview_cache.get(preview_key(file_id, frame_number, view_type, depth_mode, max_width))
+        if images[view_type] is None:
+            missing.append(view_type)
+            preview_cache.count('misses')
+
+    if missing:
+        rendered = render_previews(file_id, svo_path, frame_number, missing, depth_mode, max_width) or {}
+        for view_type in missing:
+            images[view_type] = rendered.get(view_type)
+            if images[view_type] is not None:
+                preview_cache.put(preview_key(file_id, frame_number, view_type, depth_mode, max_width), images[view_type])
+
+    if prefetch and any(data is not None for data in images.values()):
+        preview_prefetcher.schedule(file_id, svo_path, frame_number, total_frames, view_types, depth_mode, max_width)
+    return images, frame_number, total_frames
+
+
+def get_preview_frame(file_id, svo_path, frame_number, view_type, depth_mode, max_width, prefetch=True,
+                      total_frames=None):
+    """(JPEG bytes or None, clamped frame number, total frames) of one view of a frame"""
+    images, frame_number, total_frames = get_preview_views(
+        file_id, svo_path, frame_number, [view_type], depth_mode, max_width, prefetch, total_frames
+    )
+    return images[view_type], frame_number, total_frames
+
+
+def get_preview_thumbnail(file_id, svo_path, max_width, total_frames=None):
+    """(JPEG bytes or None, frame number) of the left image of the middle frame"""
+    total_frames = preview_frame_count(file_id, svo_path, total_frames=total_frames)
+    data, frame_number, _ = get_preview_frame(
+        file_id, svo_path, total_frames // 2, 'rgb_left', 'NONE', max_width, prefetch=False, total_frames=total_frames
+    )
+    return data, frame_number
+
+
+def discard_previews(file_id):
+    """Forget everything cached or queued for a file"""
+    preview_prefetcher.discard(file_id)
+    preview_cache.discard(file_id)
+    _total_frames.pop(file_id, None)
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.conf import settings
+from .svo2_preview import SVO2Preview
+
+
+class PreviewSession:
+    """One open SVO2Preview camera, used by one request at a time"""
+
+    def __init__(self, svo_path, depth_mode):
+        self.preview = SVO2Preview(svo_path)
+        self.depth_mode = depth_mode
+        self.lock = threading.Lock()
+        self.opened = False
+        # Guarded by the pool lock: requests using or waiting for the session,
+        # and whether it was dropped from the pool (its last user closes it)
+        self.users = 0
+        self.retired = False
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.opened:
+            self.preview.close()
+            self.opened = False
+
+
+class PreviewPool:
+    """Process-wide pool of open preview cameras keyed by (file id, depth mode)
+
+    Opening an SVO (and its depth engine) is the expensive part of a
+    preview, so sessions stay open between requests. Sessions idle for
+    idle_timeout seconds are closed by a background reaper, and the least
+    recently used idle ones are closed once more than max_open are open
+    (sessions in use are never closed, so the pool may briefly exceed it).
+    Each web process has its own pool.
+    """
+
+    def __init__(self, max_open, idle_timeout):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self.sessions = OrderedDict()  # Least recently used first
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    @contextmanager
+    def session(self, file_id, svo_path, depth_mode='NONE', wait=True):
+        """Exclusive use of an open SVO2Preview of file_id with depth_mode
+
+        The camera is opened on first use. If anything raises while it is
+        held, the session is dropped rather than handed out again. With
+        wait=False, None is yielded instead of waiting for a busy session.
+        """
+        key = (file_id, depth_mode)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = PreviewSession(svo_path, depth_mode)
+                self.sessions[key] = session
+            self.sessions.move_to_end(key)
+            session.users += 1
+            evicted = self._evict()
+            self._start_reaper()
+        self._close(evicted)
+
+        try:
+            if not session.lock.acquire(blocking=wait):
+                yield None
+                return
+            try:
+                if not session.opened:
+                    session.preview.set_depth_mode(depth_mode)
+                    session.preview.open()
+                    session.opened = True
+                yield session.preview
+            finally:
+                session.lock.release()
+        except Exception:
+            with self.lock:
+                self._retire(key, session)
+            raise
+        finally:
+            with self.lock:
+                session.users -= 1
+                session.last_used = time.monotonic()
+                close_now = session.retired and session.users == 0
+            if close_now:
+                session.close()
+
+    def discard(self, file_id):
+        """Close every session of a file (e.g. before it is deleted)"""
+        with self.lock:
+            keys = [key for key in self.sessions if key[0] == file_id]
+            sessions = [self.sessions[key] for key in keys]
+            for key, session in zip(keys, sessions):
+                self._retire(key, session)
+            idle = [session for session in sessions if session.users == 0]
+        self._close(idle)
+
+    def stats(self):
+        """Open sessions, most recently used last"""
+        now = time.monotonic()
+        with self.lock:
+            return [
+                {
+                    'file_id': file_id,
+                    'depth_mode': depth_mode,
+                    'opened': session.opened,
+                    'users': session.users,
+                    'idle_seconds': round(now - session.last_used, 1),
+                }
+                for (file_id, depth_mode), session in self.sessions.items()
+            ]
+
+    def _retire(self, key, session):
+        """Drop a session from the pool; its last user closes it (pool lock held)"""
+        if self.sessions.get(key) is session:
+            del self.sessions[key]
+        session.retired = True
+
+    def _evict(self):
+        """Drop expired sessions, then the least recently used idle ones over max_open (pool lock held)"""
+        now = time.monotonic()
+        evicted = []
+        for key, session in list(self.sessions.items()):
+            if session.users:
+                continue
+            if now - session.last_used >= self.idle_timeout or len(self.sessions) > self.max_open:
+                self._retire(key, session)
+                evicted.append(session)
+        return evicted
+
+    def _close(self, sessions):
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                print(f"Error closing preview session: {e}")
+
+    def _start_reaper(self):
+        if self.reaper is None:
+            self.reaper = threading.Thread(target=self._reap, name='preview-pool-reaper', daemon=True)
+            self.reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, self.idle_timeout / 2))
+            with self.lock:
+                evicted = self._evict()
+            self._close(evicted)
+
+
+preview_pool = PreviewPool(settings.PREVIEW_POOL_MAX_OPEN, settings.PREVIEW_POOL_IDLE_SECONDS)
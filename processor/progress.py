@@ -0,0 +1,186 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import ExtractionJob, FileProgress
+
+# Live progress outlives the job long enough for the last poll to see it
+PROGRESS_CACHE_TIMEOUT = 60 * 60
+
+
+class TaskSuperseded(Exception):
+    """The unit was handed to another task (the job was resumed); this one stops"""
+
+
+def owns_unit(file_progress_id, unit, task_id):
+    """Whether task_id is the task dispatched for a unit of a file
+
+    Units dispatched before task ids were recorded belong to any task.
+    """
+    task_ids = FileProgress.objects.filter(id=file_progress_id).values_list('task_ids', flat=True).first() or {}
+    return task_ids.get(str(unit)) in (None, task_id)
+
+
+def progress_cache_key(job_id, file_progress_id=None, unit=0):
+    """Cache key of a job's unit plan, or of one unit (a file or one of its shards)"""
+    if file_progress_id is None:
+        return f'job_progress:{job_id}'
+    return f'job_progress:{job_id}:{file_progress_id}:{unit}'
+
+
+def set_job_units(job_id, units):
+    """Record how many units (tasks) report progress for each FileProgress id"""
+    cache.set(progress_cache_key(job_id), {str(file_id): count for file_id, count in units.items()}, PROGRESS_CACHE_TIMEOUT)
+
+
+def get_cached_progress(job_id):
+    """Live progress per FileProgress id (as str), aggregated over each file's units"""
+    units = cache.get(progress_cache_key(job_id))
+    if not units:
+        return {}
+
+    keys = {
+        file_id: [progress_cache_key(job_id, file_id, unit) for unit in range(count)]
+        for file_id, count in units.items()
+    }
+    found = cache.get_many([key for file_keys in keys.values() for key in file_keys])
+
+    files = {}
+    for file_id, file_keys in keys.items():
+        entries = [found[key] for key in file_keys if key in found]
+        if entries:
+            files[file_id] = _aggregate(entries, len(file_keys))
+    return files
+
+
+def _aggregate(entries, unit_count):
+    """Combine the entries of a file's units (shards run in parallel, so rates add up)"""
+    statuses = [entry['status'] for entry in entries]
+    if 'failed' in statuses:
+        status = 'failed'
+    elif len(entries) == unit_count and all(s == 'completed' for s in statuses):
+        status = 'completed'
+    else:
+        status = 'processing'
+
+    running = [entry for entry in entries if entry['status'] == 'processing']
+    fps = sum(entry['fps'] for entry in running)
+    eta_seconds = None
+    if status == 'completed':
+        eta_seconds = 0
+    elif fps > 0 and len(entries) == unit_count:
+        remaining = sum(entry['output_frames'] - entry['frames_done'] for entry in entries)
+        eta_seconds = remaining / fps
+
+    return {
+        'status': status,
+        'progress': sum(entry['progress'] for entry in entries) / unit_count,
+        'current_frame': max(entry['current_frame'] for entry in entries),
+        'total_frames': entries[0]['total_frames'],
+        'error_message': next((entry['error_message'] for entry in entries if entry['error_message']), ''),
+        'fps': fps,
+        'eta_seconds': eta_seconds,
+    }
+
+
+class ProgressReporter:
+    """Coalesces per-frame progress of one unit of work (a file, or one shard of it)
+
+    Every frame updates in-memory counters. They are published to the cache
+    (read by job_progress) once PROGRESS_CACHE_INTERVAL seconds or
+    PROGRESS_CACHE_FRAMES frames have passed, whichever comes first, and
+    the file's FileProgress row is updated only every PROGRESS_DB_INTERVAL
+    seconds, together with the job's heartbeat (also refreshed when the unit
+    finishes). Status changes are saved by the tasks themselves. Given the task id, each heartbeat also checks the
+    task still owns its unit and raises TaskSuperseded otherwise.
+    """
+
+    def __init__(self, job_id, file_progress_id, unit=0, task_id=None):
+        self.job_id = job_id
+        self.file_progress_id = file_progress_id
+        self.unit = unit
+        self.task_id = task_id
+        self.key = progress_cache_key(job_id, file_progress_id, unit)
+        self.cache_interval = settings.PROGRESS_CACHE_INTERVAL
+        self.cache_frames = settings.PROGRESS_CACHE_FRAMES
+        self.db_interval = settings.PROGRESS_DB_INTERVAL
+        self.status = 'processing'
+        self.error_message = ''
+        self.progress = 0.0
+        self.current_frame = 0
+        self.total_frames = 0
+        self.output_frames = 1
+        self.started = time.monotonic()
+        self.start_frames = 0
+        self.fps = 0.0
+        self.last_cache = 0.0
+        self.last_db = time.monotonic()
+        self.frames_since_cache = 0
+
+    def start(self, total_frames, output_frames, frames_done=0):
+        """The unit starts extracting frames (frames_done of them written by an earlier run)"""
+        self.total_frames = total_frames
+        self.output_frames = max(1, output_frames)
+        self.start_frames = frames_done
+        self.progress = 100.0 * frames_done / self.output_frames
+        self.started = time.monotonic()
+        self.publish()
+        self.heartbeat()
+
+    def update(self, progress, current_frame):
+        """Per-frame progress; only touches the cache/database when due"""
+        self.progress = progress
+        self.current_frame = current_frame
+        self.frames_since_cache += 1
+
+        now = time.monotonic()
+        if now - self.last_cache >= self.cache_interval or self.frames_since_cache >= self.cache_frames:
+            self.publish()
+        if now - self.last_db >= self.db_interval:
+            self._save_row()
+            self.last_db = now
+
+    def finish(self, status, error_message=''):
+        """The unit completed or failed"""
+        self.status = status
+        self.error_message = error_message
+        if status == 'completed':
+            self.progress = 100.0
+        self.publish()
+        # Finalize may still be queued; the stale window starts from here
+        ExtractionJob.objects.filter(id=self.job_id).update(heartbeat_at=timezone.now())
+
+    def _save_row(self):
+        """Store the file's aggregated progress (all of its units) on its row"""
+        live = get_cached_progress(self.job_id).get(str(self.file_progress_id))
+        if live:
+            FileProgress.objects.filter(id=self.file_progress_id).update(
+                progress=live['progress'], current_frame=live['current_frame']
+            )
+        self.heartbeat()
+
+    def heartbeat(self):
+        """Mark the job as alive (see recover_stale_jobs)"""
+        ExtractionJob.objects.filter(id=self.job_id).update(heartbeat_at=timezone.now())
+        if self.task_id is not None and not owns_unit(self.file_progress_id, self.unit, self.task_id):
+            raise TaskSuperseded(f'Unit {self.unit} of file progress {self.file_progress_id} was resumed by another task')
+
+    def publish(self):
+        """Write this unit's live counters to the cache"""
+        frames_done = self.progress / 100 * self.output_frames
+        elapsed = time.monotonic() - self.started
+        if self.status == 'processing' and elapsed > 0:
+            # Frames a resumed run skipped were not extracted at this rate
+            self.fps = max(0.0, frames_done - self.start_frames) / elapsed
+        cache.set(self.key, {
+            'status': self.status,
+            'progress': self.progress,
+            'current_frame': self.current_frame,
+            'total_frames': self.total_frames,
+            'error_message': self.error_message,
+            'frames_done': frames_done,
+            'output_frames': self.output_frames,
+            'fps': self.fps,
+        }, PROGRESS_CACHE_TIMEOUT)
+        self.last_cache = time.monotonic()
+        self.frames_since_cache = 0
@@ -0,0 +1,209 @@
+import csv
+import os
+import shutil
+import numpy as np
+
+# One row per IMU sample; timestamp is in milliseconds as in the original CSV
+IMU_DTYPE = np.dtype([
+    ('frame', '<i8'),
+    ('timestamp', '<i8'),
+    ('orientation_x', '<f8'),
+    ('orientation_y', '<f8'),
+    ('orientation_z', '<f8'),
+    ('orientation_w', '<f8'),
+    ('angular_velocity_x', '<f8'),
+    ('angular_velocity_y', '<f8'),
+    ('angular_velocity_z', '<f8'),
+    ('linear_acceleration_x', '<f8'),
+    ('linear_acceleration_y', '<f8'),
+    ('linear_acceleration_z', '<f8'),
+])
+
+SENSOR_FORMAT_EXTENSIONS = {
+    'csv': 'csv',
+    'npy': 'npy',
+}
+
+# Rows buffered in memory between flushes
+SENSOR_BUFFER_ROWS = 4096
+
+
+def _npy_header(dtype, rows):
+    """Fixed-size .npy v1.0 header, so the row count can be rewritten in place"""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(dtype), rows
+    )
+    # Room for any 20-digit row count, rounded up to the 64-byte alignment numpy uses
+    reserved = len(header.replace(f'({rows},)', f'({"9" * 20},)'))
+    total = -(-(10 + reserved + 1) // 64) * 64
+    header = header.ljust(total - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+
+class SensorWriter:
+    """Streams IMU samples to a CSV or structured .npy file
+
+    Samples are buffered in a preallocated structured array (one column per
+    field) and flushed whenever it fills, so memory stays constant however
+    long the recording is. The .npy file can be read with `np.load(path)`
+    and a column taken with e.g. `data['timestamp']`.
+
+    Pass existing_rows to append to a file already holding that many rows
+    (see truncate_sensor_file) instead of starting a new one.
+    """
+
+    def __init__(self, path, fmt='csv', buffer_rows=SENSOR_BUFFER_ROWS, existing_rows=None):
+        if fmt not in SENSOR_FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown sensor format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.buffer = np.empty(buffer_rows, dtype=IMU_DTYPE)
+        self.buffered = 0
+        self.row_count = existing_rows or 0
+        self.last_timestamp_ns = None
+
+        if existing_rows is not None:
+            if fmt == 'csv':
+                self.file = open(path, 'a', newline='')
+                self.writer = csv.writer(self.file)
+            else:
+                self.file = open(path, 'r+b')
+                self.file.seek(0, os.SEEK_END)
+        elif fmt == 'csv':
+            self.file = open(path, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(IMU_DTYPE.names)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(_npy_header(IMU_DTYPE, 0))
+
+    def append_imu(self, frame, imu):
+        """Buffer one sl.IMUData sample; returns False for a repeat of the last sample"""
+        timestamp_ns = imu.timestamp.get_nanoseconds()
+        if timestamp_ns == self.last_timestamp_ns:
+            return False
+        self.last_timestamp_ns = timestamp_ns
+
+        orientation = imu.get_pose().get_orientation().get()
+        angular_velocity = imu.get_angular_velocity()
+        linear_acceleration = imu.get_linear_acceleration()
+        self.buffer[self.buffered] = (
+            frame, imu.timestamp.get_milliseconds(),
+            orientation[0], orientation[1], orientation[2], orientation[3],
+            angular_velocity[0], angular_velocity[1], angular_velocity[2],
+            linear_acceleration[0], linear_acceleration[1], linear_acceleration[2],
+        )
+        self.buffered += 1
+        if self.buffered == len(self.buffer):
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write buffered rows to disk"""
+        if not self.buffered:
+            return
+        rows = self.buffer[:self.buffered]
+        if self.fmt == 'csv':
+            self.writer.writerows(rows.tolist())
+        else:
+            self.file.write(rows.data)
+        self.file.flush()
+        self.row_count += self.buffered
+        self.buffered = 0
+
+    def close(self):
+        """Flush, finalize the file and return the number of rows written"""
+        self.flush()
+        if self.fmt == 'npy':
+            self.file.seek(0)
+            self.file.write(_npy_header(IMU_DTYPE, self.row_count))
+        self.file.close()
+        return self.row_count
+
+
+def _npy_data_offset(path):
+    """(data offset, row count) of a 1-D .npy file"""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+        return f.tell(), shape[0]
+
+
+def truncate_sensor_file(path, fmt, before_frame):
+    """Drop the rows of frames from before_frame on from an interrupted sensor file
+
+    Also drops a row torn by the crash; an interrupted .npy file still has
+    a 0-row header, so its rows are counted from the file size. Returns
+    the number of rows kept.
+    """
+    if fmt == 'csv':
+        tmp_path = path + '.tmp'
+        kept = 0
+        with open(path, 'r', newline='') as src, open(tmp_path, 'w', newline='') as dst:
+            dst.write(src.readline())
+            for line in src:
+                if not line.endswith('\n') or int(line.split(',', 1)[0]) >= before_frame:
+                    break
+                dst.write(line)
+                kept += 1
+        os.replace(tmp_path, path)
+        return kept
+
+    offset, _ = _npy_data_offset(path)
+    rows = (os.path.getsize(path) - offset) // IMU_DTYPE.itemsize
+    kept = 0
+    if rows:
+        frames = np.memmap(path, dtype=IMU_DTYPE, mode='r', offset=offset, shape=(rows,))['frame']
+        kept = int(np.searchsorted(frames, before_frame, side='left'))
+        del frames
+    with open(path, 'r+b') as f:
+        f.truncate(offset + kept * IMU_DTYPE.itemsize)
+        f.write(_npy_header(IMU_DTYPE, kept))
+    return kept
+
+
+def merge_sensor_files(paths, output_path, fmt='csv'):
+    """Concatenate sensor files of one format in order, streaming, and delete the parts"""
+    if fmt == 'csv':
+        with open(output_path, 'w', newline='') as merged:
+            for i, path in enumerate(paths):
+                with open(path, 'r', newline='') as part:
+                    header = part.readline()
+                    if i == 0:
+                        merged.write(header)
+                    shutil.copyfileobj(part, merged)
+    else:
+        row_count = 0
+        with open(output_path, 'wb') as merged:
+            merged.write(_npy_header(IMU_DTYPE, 0))
+            for path in paths:
+                offset, rows = _npy_data_offset(path)
+                with open(path, 'rb') as part:
+                    part.seek(offset)
+                    shutil.copyfileobj(part, merged)
+                row_count += rows
+            merged.seek(0)
+            merged.write(_npy_header(IMU_DTYPE, row_count))
+
+    for path in paths:
+        os.remove(path)
+
+
+def read_sensor_rows(path, limit=None):
+    """(rows as dicts, total row count) for a CSV or .npy sensor file"""
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        head = data if limit is None else data[:limit]
+        return [dict(zip(IMU_DTYPE.names, row)) for row in head.tolist()], len(data)
+
+    rows = []
+    total = 0
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            if limit is None or total < limit:
+                rows.append(row)
+            total += 1
+    return rows, total
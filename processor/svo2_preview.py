@@ -6,6 +6,21 @@ from io import BytesIO
 from PIL import Image
 import json
 
+# Views that only need the rectified images, not the depth engine
+RGB_VIEWS = ('rgb_left', 'rgb_right')
+
+PREVIEW_VIEWS = ('rgb_left', 'rgb_right', 'depth', 'depth_viz', 'confidence', 'normals', 'point_cloud')
+
+# Views rendered by the multi-view preview when none are requested
+DEFAULT_PREVIEW_VIEWS = ('rgb_left', 'rgb_right', 'depth', 'confidence', 'normals')
+
+# Preview images are scaled down to this width unless asked otherwise
+DEFAULT_PREVIEW_WIDTH = 800
+
+def view_needs_depth(view_type):
+    """Whether rendering view_type requires depth computation"""
+    return view_type not in RGB_VIEWS
+
 class SVO2Preview:
     def __init__(self, svo_path):
         self.svo_path = svo_path
@@ -18,6 +33,7 @@ class SVO2Preview:
     def set_depth_mode(self, mode_str):
         """Set depth mode for preview"""
         mode_map = {
+            'NONE': sl.DEPTH_MODE.NONE,
             'NEURAL': sl.DEPTH_MODE.NEURAL,
             'ULTRA': sl.DEPTH_MODE.ULTRA,
             'QUALITY': sl.DEPTH_MODE.QUALITY,
@@ -41,23 +57,61 @@ class SVO2Preview:
     def get_total_frames(self):
         return self.zed.get_svo_number_of_frames()
     
-    def get_frame(self, frame_number, view_type='rgb_left', depth_mode=None):
+    def get_frame(self, frame_number, view_type='rgb_left', depth_mode=None, max_width=DEFAULT_PREVIEW_WIDTH):
         """
         Get a specific frame as base64 encoded image
         view_type: 'rgb_left', 'rgb_right', 'depth', 'depth_viz', 'confidence', 'normals'
         """
-        # Change depth mode if requested
-        if depth_mode and depth_mode != self.current_depth_mode:
-            self.reopen_with_depth_mode(depth_mode)
+        jpeg = self.render_frame(frame_number, view_type, depth_mode, max_width)
+        if jpeg is None:
+            return None
+        return base64.b64encode(jpeg).decode('utf-8')
+    
+    def render_frame(self, frame_number, view_type='rgb_left', depth_mode=None, max_width=DEFAULT_PREVIEW_WIDTH):
+        """Render a specific frame as JPEG bytes, or None if it cannot be grabbed"""
+        rendered = self.render_views(frame_number, [view_type], depth_mode, max_width)
+        if rendered is None:
+            return None
+        return rendered[view_type]
+    
+    def render_views(self, frame_number, view_types, depth_mode=None, max_width=DEFAULT_PREVIEW_WIDTH):
+        """
+        Render several views of one frame from a single seek and grab
+        Returns {view_type: JPEG bytes or None}, or None if the frame cannot be grabbed
+        """
+        if not self._grab(frame_number, view_types, depth_mode):
+            return None
+        
+        return {view_type: self._encode_view(view_type, max_width) for view_type in view_types}
+    
+    def render_image(self, frame_number, view_type='rgb_left', depth_mode=None, max_width=DEFAULT_PREVIEW_WIDTH):
+        """Render one view of a frame as an RGB array scaled to max_width, or None"""
+        if not self._grab(frame_number, [view_type], depth_mode):
+            return None
+        
+        return self._scaled_view(view_type, max_width)
+    
+    def _grab(self, frame_number, view_types, depth_mode):
+        """Seek to and grab a frame, with depth only if a view needs it; False on failure"""
+        needs_depth = any(view_needs_depth(view_type) for view_type in view_types)
+        
+        # Change depth mode if requested; RGB views never need a reopen
+        if needs_depth:
+            if depth_mode and depth_mode != self.current_depth_mode:
+                self.reopen_with_depth_mode(depth_mode)
+            elif self.current_depth_mode == 'NONE':
+                self.reopen_with_depth_mode('ULTRA')
         
         self.zed.set_svo_position(frame_number)
         
         runtime_params = sl.RuntimeParameters()
+        runtime_params.enable_depth = needs_depth
         err = self.zed.grab(runtime_params)
         
-        if err != sl.ERROR_CODE.SUCCESS:
-            return None
-        
+        return err == sl.ERROR_CODE.SUCCESS
+    
+    def _view_image(self, view_type):
+        """RGB image of one view of the last grabbed frame, or None for an unknown view"""
         img_rgb = None
         
         if view_type == 'rgb_left':
@@ -127,33 +181,43 @@ class SVO2Preview:
             depth_colored = cv2.applyColorMap(depth_normalized, cv2.COLORMAP_TURBO)
             img_rgb = cv2.cvtColor(depth_colored, cv2.COLOR_BGR2RGB)
         
+        return img_rgb
+    
+    def _encode_view(self, view_type, max_width):
+        """One view of the last grabbed frame as JPEG bytes"""
+        img_rgb = self._scaled_view(view_type, max_width)
+        if img_rgb is None:
+            return None
+        
+        # Convert to JPEG
+        pil_img = Image.fromarray(img_rgb)
+        buffer = BytesIO()
+        pil_img.save(buffer, format='JPEG', quality=90)
+        
+        return buffer.getvalue()
+    
+    def _scaled_view(self, view_type, max_width):
+        """One view of the last grabbed frame, scaled down to max_width"""
+        img_rgb = self._view_image(view_type)
         if img_rgb is None:
             return None
         
         # Resize for web display
         height, width = img_rgb.shape[:2]
-        max_width = 800
         if width > max_width:
             scale = max_width / width
             new_width = max_width
             new_height = int(height * scale)
             img_rgb = cv2.resize(img_rgb, (new_width, new_height))
         
-        # Convert to JPEG
-        pil_img = Image.fromarray(img_rgb)
-        buffer = BytesIO()
-        pil_img.save(buffer, format='JPEG', quality=90)
-        
-        # Encode as base64
-        img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        return img_base64
+        return img_rgb
     
     def get_imu_data(self, frame_number):
         """Get IMU data for a specific frame"""
         self.zed.set_svo_position(frame_number)
         
         runtime_params = sl.RuntimeParameters()
+        runtime_params.enable_depth = False
         err = self.zed.grab(runtime_params)
         
         if err != sl.ERROR_CODE.SUCCESS:
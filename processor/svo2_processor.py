@@ -2,8 +2,58 @@ import pyzed.sl as sl
 import cv2
 import numpy as np
 import os
-import csv
+import json
+import threading
+import time
 from datetime import datetime
+from .frame_pipeline import FramePipeline
+from .point_cloud_writer import save_point_cloud, POINT_CLOUD_EXTENSIONS
+from .depth_store import DepthStore
+from .depth_codecs import write_depth, MEMMAP_DEPTH_DTYPES
+from .video_writer import VideoStream
+from .sensor_writer import SensorWriter, SENSOR_FORMAT_EXTENSIONS, merge_sensor_files, truncate_sensor_file
+from .manifest import ManifestWriter, MANIFEST_FILENAME, read_manifest, trim_manifest
+from .checkpoint import CHECKPOINT_FILENAME, WrittenFrames, read_checkpoint, write_checkpoint, remove_checkpoint
+from .image_codecs import write_image, IMAGE_CODEC_OPTIONS, DEFAULT_IMAGE_CODECS
+from .extraction_cache import ExtractionCache, DEPTH_CATEGORIES, frame_product
+from contextlib import nullcontext
+
+# frame_step at which seeking beats decoding through the skipped frames
+SEEK_MIN_STEP = 5
+
+# Output subfolder per category
+CATEGORY_FOLDERS = {
+    'rgb_left': '1_RGB_Left',
+    'rgb_right': '2_RGB_Right',
+    'depth': '3_Depth',
+    'point_cloud': '4_PointCloud',
+    'confidence': '5_Confidence',
+    'normals': '6_Normals',
+    'imu': '7_IMU',
+}
+
+DEPTH_STATS_FILENAME = 'depth_encoding_stats.json'
+
+# Categories saved as images; image_output decides per-frame JPEGs or one video.
+# Depth is written as its colorized visualization.
+IMAGE_CATEGORIES = ('rgb_left', 'rgb_right', 'depth', 'confidence', 'normals')
+VIDEO_STREAM_NAMES = {
+    'rgb_left': 'rgb_left',
+    'rgb_right': 'rgb_right',
+    'depth': 'depth_viz',
+    'confidence': 'confidence',
+    'normals': 'normals',
+}
+
+# Cap on full-rate IMU reads per grab, in case the SDK keeps returning new
+# samples (the IMU runs at up to 400 Hz, a few dozen samples per frame)
+MAX_IMU_SAMPLES_PER_GRAB = 1024
+
+# Seconds between checkpoints of the written frames
+CHECKPOINT_INTERVAL = 15
+
+# Options whose products come from the depth engine
+DEPTH_PRODUCT_OPTIONS = ('extract_depth', 'extract_point_cloud', 'extract_confidence', 'extract_normals')
 
 class SVO2Processor:
     def __init__(self, svo_path, output_dir, options):
@@ -11,31 +61,37 @@ class SVO2Processor:
         self.output_dir = output_dir
         self.options = options
         self.camera = sl.Camera()
-        self.extracted_files = []  # Track all extracted files
+        self.records_lock = threading.Lock()
+        
+        # Extracted file records are streamed here as files are written
+        self.manifest_path = os.path.join(output_dir, options.get('manifest_filename', MANIFEST_FILENAME))
+        self.manifest = None
+        
+        # How far the output is written, for resuming an interrupted run
+        self.checkpoint_path = os.path.join(output_dir, options.get('checkpoint_filename', CHECKPOINT_FILENAME))
+        self.written = None
         
         # Create category subfolders
         self.folders = {}
-        if options['extract_rgb_left']:
-            self.folders['rgb_left'] = os.path.join(output_dir, '1_RGB_Left')
-            os.makedirs(self.folders['rgb_left'], exist_ok=True)
-        if options['extract_rgb_right']:
-            self.folders['rgb_right'] = os.path.join(output_dir, '2_RGB_Right')
-            os.makedirs(self.folders['rgb_right'], exist_ok=True)
-        if options['extract_depth']:
-            self.folders['depth'] = os.path.join(output_dir, '3_Depth')
-            os.makedirs(self.folders['depth'], exist_ok=True)
-        if options['extract_point_cloud']:
-            self.folders['point_cloud'] = os.path.join(output_dir, '4_PointCloud')
-            os.makedirs(self.folders['point_cloud'], exist_ok=True)
-        if options['extract_confidence']:
-            self.folders['confidence'] = os.path.join(output_dir, '5_Confidence')
-            os.makedirs(self.folders['confidence'], exist_ok=True)
-        if options['extract_normals']:
-            self.folders['normals'] = os.path.join(output_dir, '6_Normals')
-            os.makedirs(self.folders['normals'], exist_ok=True)
-        if options['extract_imu']:
-            self.folders['imu'] = os.path.join(output_dir, '7_IMU')
-            os.makedirs(self.folders['imu'], exist_ok=True)
+        for category, folder_name in CATEGORY_FOLDERS.items():
+            if options[f'extract_{category}']:
+                self.folders[category] = os.path.join(output_dir, folder_name)
+                os.makedirs(self.folders[category], exist_ok=True)
+        
+        # Depth encoding size/time totals, written next to the depth files.
+        # Checkpoints save only the totals of frames they cover.
+        self.depth_stats = empty_depth_stats()
+        self.checkpointed_depth_stats = empty_depth_stats()
+        self.uncheckpointed_depth_stats = {}
+        self.video_streams = {}
+        self.depth_store = None
+        
+        # Per-frame outputs shared with other jobs through the content-addressed cache
+        self.cache = None
+        self.cached_products = {}
+        if options.get('cache_dir') and options.get('content_hash'):
+            self.cache = ExtractionCache(options['cache_dir'], options['content_hash'])
+            self.cached_products = self.cacheable_products()
         
     def open(self):
         """Open the SVO file"""
@@ -43,7 +99,7 @@ class SVO2Processor:
         init_params.set_from_svo_file(self.svo_path)
         init_params.svo_real_time_mode = False
         
-        # Set depth mode
+        # Set depth mode (disabled entirely when no product needs it)
         depth_mode_map = {
             'PERFORMANCE': sl.DEPTH_MODE.PERFORMANCE,
             'QUALITY': sl.DEPTH_MODE.QUALITY,
@@ -54,6 +110,8 @@ class SVO2Processor:
             self.options.get('depth_mode', 'ULTRA'),
             sl.DEPTH_MODE.ULTRA
         )
+        if not self.needs_depth():
+            init_params.depth_mode = sl.DEPTH_MODE.NONE
         
         init_params.coordinate_units = sl.UNIT.METER
         
@@ -63,12 +121,25 @@ class SVO2Processor:
         
         return True
     
+    def needs_depth(self):
+        """Whether any requested product is derived from depth"""
+        return any(self.options.get(option) for option in DEPTH_PRODUCT_OPTIONS)
+    
     def get_total_frames(self):
-        """Get total number of frames in the SVO file"""
+        """Get total number of frames in the SVO file (from the options when indexed)"""
+        if self.options.get('total_frames') is not None:
+            return self.options['total_frames']
         return self.camera.get_svo_number_of_frames()
     
-    def process(self, progress_callback=None):
-        """Process the SVO file and extract data"""
+    def get_resolution(self):
+        """(width, height) of the recorded images"""
+        if self.options.get('frame_width') and self.options.get('frame_height'):
+            return self.options['frame_width'], self.options['frame_height']
+        resolution = self.camera.get_camera_information().camera_configuration.resolution
+        return resolution.width, resolution.height
+    
+    def get_frame_range(self):
+        """Get (frame_start, frame_end, frame_step) clamped to the file length"""
         total_frames = self.get_total_frames()
         frame_start = self.options.get('frame_start', 0)
         frame_end = self.options.get('frame_end', total_frames)
@@ -77,194 +148,492 @@ class SVO2Processor:
         if frame_end is None or frame_end > total_frames:
             frame_end = total_frames
         
-        # Set starting position
-        self.camera.set_svo_position(frame_start)
+        return frame_start, frame_end, frame_step
+    
+    def get_output_frame_count(self):
+        """Number of frames this processor will extract"""
+        return len(range(*self.get_frame_range()))
+    
+    def resume_frame_count(self):
+        """Output frames an earlier run already wrote, which process() will skip"""
+        if not self.options.get('resume') or self.options.get('image_output', 'frames') != 'frames':
+            return 0
+        checkpoint = read_checkpoint(self.checkpoint_path)
+        return checkpoint['frames_done'] if checkpoint else 0
+    
+    def open_depth_store(self, frame_count):
+        """Open (or create) the single-file depth store in the depth folder"""
+        width, height = self.get_resolution()
+        dtype = MEMMAP_DEPTH_DTYPES.get(self.options.get('depth_encoding', 'float32_npy'), np.float32)
+        return DepthStore(self.folders['depth'], frame_count, height, width, dtype)
+    
+    def open_video_streams(self, frame_step):
+        """One VideoStream per extracted image category when image_output is a video container"""
+        container = self.options.get('image_output', 'frames')
+        if container == 'frames':
+            return {}
+        
+        # Playback at the recording rate, slowed down by the frame step
+        fps = self.options.get('fps') or self.camera.get_camera_information().camera_configuration.fps
+        fps = max(1.0, fps / frame_step)
+        
+        streams = {}
+        for category in IMAGE_CATEGORIES:
+            if category in self.folders:
+                video_path = os.path.join(self.folders[category], f'{VIDEO_STREAM_NAMES[category]}.{container}')
+                streams[category] = VideoStream(video_path, container, fps)
+        return streams
+    
+    def cacheable_products(self):
+        """{(category, file_type): (cache key, extension)} of the per-frame outputs
+        
+        Videos and the depth store hold every frame in one file, so they are
+        always written by the job itself.
+        """
+        products = {}
+        if self.options.get('image_output', 'frames') == 'frames':
+            for category in IMAGE_CATEGORIES:
+                if category in self.folders:
+                    products[(category, 'image')] = frame_product(category, 'image', self.options)
+        if 'depth' in self.folders and self.options.get('depth_storage') != 'memmap':
+            products[('depth', 'depth')] = frame_product('depth', 'depth', self.options)
+        if 'point_cloud' in self.folders:
+            products[('point_cloud', 'point_cloud')] = frame_product('point_cloud', 'point_cloud', self.options)
+        return products
+    
+    def open_imu_writer(self, resume_before=None):
+        """Streaming writer for this processor's IMU file
+        
+        With resume_before, an interrupted file is continued, keeping the
+        samples of the frames before that output index.
+        """
+        fmt = self.options.get('imu_format', 'csv')
+        filename = self.options.get('imu_filename', f'imu_data.{SENSOR_FORMAT_EXTENSIONS[fmt]}')
+        path = os.path.join(self.folders['imu'], filename)
+        existing_rows = None
+        if resume_before is not None and os.path.exists(path):
+            existing_rows = truncate_sensor_file(path, fmt, resume_before)
+        return SensorWriter(path, fmt, existing_rows=existing_rows)
+    
+    def process(self, progress_callback=None):
+        """Process the SVO file and extract data
+        
+        Records of the extracted files are appended to the manifest at
+        manifest_path; returns the number of frames processed. With
+        options['resume'], an interrupted run is continued from its last
+        checkpoint instead of from frame_start.
+        """
+        frame_index_offset = self.options.get('frame_index_offset', 0)
+        checkpoint = read_checkpoint(self.checkpoint_path) if self.options.get('resume') else None
+        if checkpoint and checkpoint['complete']:
+            # Extraction finished before; only what came after it was interrupted
+            return checkpoint['frames_done']
+        
+        # Videos cannot be reopened for appending, so video output starts over
+        resume_frames = 0
+        if checkpoint and self.options.get('image_output', 'frames') == 'frames':
+            resume_frames = checkpoint['frames_done']
+            self.depth_stats = dict(checkpoint['depth_stats'])
+            self.checkpointed_depth_stats = dict(checkpoint['depth_stats'])
+        
+        if resume_frames:
+            kept = trim_manifest(self.manifest_path, frame_index_offset + resume_frames)
+            print(f"Resuming {os.path.basename(self.svo_path)} at output frame {frame_index_offset + resume_frames} ({kept} files kept)")
+        else:
+            remove_checkpoint(self.checkpoint_path)
+        
+        self.manifest = ManifestWriter(self.manifest_path, append=resume_frames > 0)
+        try:
+            with self._coalesced(progress_callback):
+                processed_count = self._extract(progress_callback, resume_frames)
+        finally:
+            self.manifest.close()
+        
+        write_checkpoint(self.checkpoint_path, {
+            'frames_done': processed_count,
+            'depth_stats': self.depth_stats,
+            'complete': True,
+        })
+        return processed_count
+    
+    def _coalesced(self, progress_callback):
+        """Wait out an identical extraction of this file running in another job
+        
+        Once it finishes, every output is a cache hit.
+        """
+        if not self.cached_products:
+            return nullcontext()
+        frame_range = self.get_frame_range()
+        
+        def on_wait():
+            if progress_callback:
+                progress_callback(0.0, frame_range[0], self.get_total_frames())
+        
+        keys = [key for key, _ in self.cached_products.values()]
+        return self.cache.coalesce(keys, frame_range, on_wait)
+    
+    def _extract(self, progress_callback, resume_frames=0):
+        total_frames = self.get_total_frames()
+        frame_start, frame_end, frame_step = self.get_frame_range()
+        frame_index_offset = self.options.get('frame_index_offset', 0)
+        
+        # Depth goes into one memory-mapped container instead of per-frame .npy files
+        self.depth_store = None
+        if self.options['extract_depth'] and self.options.get('depth_storage') == 'memmap':
+            self.depth_store = self.open_depth_store(frame_index_offset + self.get_output_frame_count())
+        
+        # Image categories go into one video file each instead of per-frame JPEGs
+        self.video_streams = self.open_video_streams(frame_step)
+        
+        # Per-frame output can be checkpointed and resumed
+        if not self.video_streams:
+            self.written = WrittenFrames(frame_index_offset + resume_frames)
+        checkpoint_interval = self.options.get('checkpoint_interval', CHECKPOINT_INTERVAL)
+        last_checkpoint = time.monotonic()
+        
+        # Set starting position (past the frames a resumed run already wrote)
+        first_frame = frame_start + resume_frames * frame_step
+        self.camera.set_svo_position(first_frame)
         
         # Prepare data containers
-        rgb_left = sl.Mat()
-        rgb_right = sl.Mat()
-        depth_map = sl.Mat()
-        point_cloud = sl.Mat()
-        confidence_map = sl.Mat()
-        normals_map = sl.Mat()
+        mats = {
+            'rgb_left': sl.Mat(),
+            'rgb_right': sl.Mat(),
+            'depth': sl.Mat(),
+            'point_cloud': sl.Mat(),
+            'confidence': sl.Mat(),
+            'normals': sl.Mat(),
+        }
         
-        # IMU data storage
-        imu_data_list = []
+        # IMU samples stream to disk as they are read
+        imu_writer = None
+        if self.options['extract_imu']:
+            imu_writer = self.open_imu_writer(frame_index_offset + resume_frames if resume_frames else None)
+        full_rate_imu = imu_writer is not None and self.options.get('imu_rate') == 'full'
+        sensors_data = sl.SensorsData()
+        self.imu_truncated = False
         
         runtime_params = sl.RuntimeParameters()
+        runtime_params.enable_depth = self.needs_depth()
+        
+        # Frames we step over never need depth
+        skip_params = sl.RuntimeParameters()
+        skip_params.enable_depth = False
+        
+        # Large steps jump with set_svo_position; small ones are cheaper to
+        # decode through with depth-free grabs. Full-rate IMU never seeks: the
+        # samples between processed frames are read during the skipped grabs.
+        use_seek = frame_step >= SEEK_MIN_STEP and not full_rate_imu
         
-        current_frame = frame_start
-        processed_count = 0
-        
-        while current_frame < frame_end:
-            # Grab frame
-            if self.camera.grab(runtime_params) == sl.ERROR_CODE.SUCCESS:
-                # Check if we should process this frame
-                if (current_frame - frame_start) % frame_step == 0:
-                    frame_index = processed_count
-                    
-                    # Extract RGB Left
-                    if self.options['extract_rgb_left']:
-                        self.camera.retrieve_image(rgb_left, sl.VIEW.LEFT)
-                        img_path = os.path.join(self.folders['rgb_left'], f'frame_{frame_index:06d}.jpg')
-                        cv2.imwrite(img_path, rgb_left.get_data())
-                        self.extracted_files.append({
-                            'category': 'rgb_left',
-                            'file_type': 'image',
-                            'file_path': img_path,
-                            'filename': f'frame_{frame_index:06d}.jpg',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(img_path)
-                        })
-                    
-                    # Extract RGB Right
-                    if self.options['extract_rgb_right']:
-                        self.camera.retrieve_image(rgb_right, sl.VIEW.RIGHT)
-                        img_path = os.path.join(self.folders['rgb_right'], f'frame_{frame_index:06d}.jpg')
-                        cv2.imwrite(img_path, rgb_right.get_data())
-                        self.extracted_files.append({
-                            'category': 'rgb_right',
-                            'file_type': 'image',
-                            'file_path': img_path,
-                            'filename': f'frame_{frame_index:06d}.jpg',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(img_path)
-                        })
-                    
-                    # Extract Depth
-                    if self.options['extract_depth']:
-                        self.camera.retrieve_measure(depth_map, sl.MEASURE.DEPTH)
-                        depth_data = depth_map.get_data()
-                        
-                        # Save raw depth as numpy
-                        depth_path = os.path.join(self.folders['depth'], f'frame_{frame_index:06d}.npy')
-                        np.save(depth_path, depth_data)
-                        
-                        # Save colorized depth as image
-                        depth_viz = self._colorize_depth(depth_data)
-                        depth_img_path = os.path.join(self.folders['depth'], f'frame_{frame_index:06d}.jpg')
-                        cv2.imwrite(depth_img_path, depth_viz)
-                        
-                        self.extracted_files.append({
-                            'category': 'depth',
-                            'file_type': 'depth',
-                            'file_path': depth_path,
-                            'filename': f'frame_{frame_index:06d}.npy',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(depth_path)
-                        })
-                        self.extracted_files.append({
-                            'category': 'depth',
-                            'file_type': 'image',
-                            'file_path': depth_img_path,
-                            'filename': f'frame_{frame_index:06d}.jpg',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(depth_img_path)
-                        })
-                    
-                    # Extract Point Cloud
-                    if self.options['extract_point_cloud']:
-                        self.camera.retrieve_measure(point_cloud, sl.MEASURE.XYZRGBA)
-                        pc_data = point_cloud.get_data()
-                        
-                        # Save as PLY
-                        ply_path = os.path.join(self.folders['point_cloud'], f'frame_{frame_index:06d}.ply')
-                        self._save_point_cloud_ply(pc_data, ply_path)
-                        
-                        self.extracted_files.append({
-                            'category': 'point_cloud',
-                            'file_type': 'point_cloud',
-                            'file_path': ply_path,
-                            'filename': f'frame_{frame_index:06d}.ply',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(ply_path)
-                        })
-                    
-                    # Extract Confidence
-                    if self.options['extract_confidence']:
-                        self.camera.retrieve_measure(confidence_map, sl.MEASURE.CONFIDENCE)
-                        conf_data = confidence_map.get_data()
-                        conf_img = (conf_data * 255).astype(np.uint8)
-                        conf_path = os.path.join(self.folders['confidence'], f'frame_{frame_index:06d}.jpg')
-                        cv2.imwrite(conf_path, conf_img)
-                        
-                        self.extracted_files.append({
-                            'category': 'confidence',
-                            'file_type': 'image',
-                            'file_path': conf_path,
-                            'filename': f'frame_{frame_index:06d}.jpg',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(conf_path)
-                        })
-                    
-                    # Extract Normals
-                    if self.options['extract_normals']:
-                        self.camera.retrieve_measure(normals_map, sl.MEASURE.NORMALS)
-                        normals_data = normals_map.get_data()
-                        normals_vis = self._visualize_normals(normals_data)
-                        normals_path = os.path.join(self.folders['normals'], f'frame_{frame_index:06d}.jpg')
-                        cv2.imwrite(normals_path, normals_vis)
-                        
-                        self.extracted_files.append({
-                            'category': 'normals',
-                            'file_type': 'image',
-                            'file_path': normals_path,
-                            'filename': f'frame_{frame_index:06d}.jpg',
-                            'frame_number': frame_index,
-                            'file_size': os.path.getsize(normals_path)
-                        })
-                    
-                    # Extract IMU data
-                    if self.options['extract_imu']:
-                        imu_data = sl.SensorsData()
-                        if self.camera.get_sensors_data(imu_data, sl.TIME_REFERENCE.IMAGE) == sl.ERROR_CODE.SUCCESS:
-                            imu_dict = {
-                                'frame': frame_index,
-                                'timestamp': imu_data.get_imu_data().timestamp.get_milliseconds(),
-                                'orientation_x': imu_data.get_imu_data().get_pose().get_orientation().get()[0],
-                                'orientation_y': imu_data.get_imu_data().get_pose().get_orientation().get()[1],
-                                'orientation_z': imu_data.get_imu_data().get_pose().get_orientation().get()[2],
-                                'orientation_w': imu_data.get_imu_data().get_pose().get_orientation().get()[3],
-                                'angular_velocity_x': imu_data.get_imu_data().get_angular_velocity()[0],
-                                'angular_velocity_y': imu_data.get_imu_data().get_angular_velocity()[1],
-                                'angular_velocity_z': imu_data.get_imu_data().get_angular_velocity()[2],
-                                'linear_acceleration_x': imu_data.get_imu_data().get_linear_acceleration()[0],
-                                'linear_acceleration_y': imu_data.get_imu_data().get_linear_acceleration()[1],
-                                'linear_acceleration_z': imu_data.get_imu_data().get_linear_acceleration()[2],
-                            }
-                            imu_data_list.append(imu_dict)
-                    
-                    processed_count += 1
-                    
-                    # Progress callback
-                    if progress_callback:
-                        progress = (current_frame - frame_start) / (frame_end - frame_start) * 100
-                        progress_callback(progress, current_frame, total_frames)
+        # Encoding and writes run on worker threads while this thread grabs.
+        # Each video stream adds one ordered task per frame, so scale the
+        # backlog to keep queue_depth frames in flight.
+        pipeline = FramePipeline(
+            num_workers=self.options.get('writer_threads', 4),
+            queue_depth=self.options.get('queue_depth', 8) * (1 + len(self.video_streams))
+        )
+        
+        next_position = first_frame  # Frame the next grab() will return
+        processed_count = resume_frames
+        
+        try:
+            for current_frame in range(first_frame, frame_end, frame_step):
+                # Output index; shards start at their offset in the full job
+                frame_index = frame_index_offset + processed_count
+                
+                # Outputs found in the cache are linked; only the rest needs the SDK
+                reused = self._reuse_cached(frame_index, current_frame)
+                categories = self._categories_to_retrieve(reused)
+                
+                if categories or imu_writer is not None:
+                    # Grab frame, computing depth only if a depth product is still missing
+                    params = runtime_params if any(c in DEPTH_CATEGORIES for c in categories) else skip_params
+                    on_skip = (lambda: self._drain_imu(imu_writer, frame_index, sensors_data)) if full_rate_imu else None
+                    if not self._grab_at(current_frame, next_position, use_seek, params, skip_params, on_skip):
+                        break
+                    next_position = current_frame + 1
+                
+                if categories:
+                    # Copy out of the SDK buffers before they are reused by the next grab
+                    frame_data = self._retrieve_frame(mats, categories)
+                    frame_info = {
+                        'svo_frame': current_frame,
+                        'timestamp_ns': self.camera.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds(),
+                    }
+                    pipeline.submit(self._write_frame, frame_index, frame_data, frame_info, reused)
+                    for category in self.video_streams:
+                        pipeline.submit(
+                            self._write_video_frame, category, frame_index, frame_data[category], frame_info,
+                            lane=category
+                        )
+                elif self.written is not None:
+                    self.written.mark(frame_index)
+                
+                # Extract IMU data: the sample at the image, or every new sample since the last frame
+                if full_rate_imu:
+                    self._drain_imu(imu_writer, frame_index, sensors_data)
+                elif imu_writer is not None:
+                    if self.camera.get_sensors_data(sensors_data, sl.TIME_REFERENCE.IMAGE) == sl.ERROR_CODE.SUCCESS:
+                        imu_writer.append_imu(frame_index, sensors_data.get_imu_data())
                 
-                current_frame += 1
+                processed_count += 1
+                
+                # Progress callback
+                if progress_callback:
+                    progress = (current_frame - frame_start) / (frame_end - frame_start) * 100
+                    progress_callback(progress, current_frame, total_frames)
+                
+                if self.written is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    self._save_checkpoint(imu_writer)
+                    last_checkpoint = time.monotonic()
+        finally:
+            # Drain pending writes; re-raises the first writer error
+            pipeline.close()
+            if self.depth_store is not None:
+                self.depth_store.close()
+            for stream in self.video_streams.values():
+                stream.close()
+            imu_rows = imu_writer.close() if imu_writer is not None else 0
+        
+        for category, stream in self.video_streams.items():
+            if stream.frame_count:
+                self._record(category, 'video', stream.video_path, None)
+        
+        if self.depth_store is not None:
+            self._record('depth', 'depth', self.depth_store.store_path, None)
+        
+        if self.options['extract_depth'] and self.depth_stats['frames']:
+            stats_path = os.path.join(self.folders['depth'], self.options.get('depth_stats_filename', DEPTH_STATS_FILENAME))
+            write_depth_stats(stats_path, self.options.get('depth_encoding', 'float32_npy'), self.depth_stats)
+        
+        if imu_writer is not None:
+            if imu_rows:
+                self._record('imu', imu_file_type(imu_writer.fmt), imu_writer.path, None)
             else:
-                break
-        
-        # Save IMU data to CSV
-        if self.options['extract_imu'] and imu_data_list:
-            csv_path = os.path.join(self.folders['imu'], 'imu_data.csv')
-            with open(csv_path, 'w', newline='') as csvfile:
-                fieldnames = imu_data_list[0].keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(imu_data_list)
-            
-            self.extracted_files.append({
-                'category': 'imu',
-                'file_type': 'csv',
-                'file_path': csv_path,
-                'filename': 'imu_data.csv',
-                'frame_number': None,
-                'file_size': os.path.getsize(csv_path)
-            })
+                os.remove(imu_writer.path)
         
         return processed_count
     
+    def _grab_at(self, target, next_position, use_seek, runtime_params, skip_params, on_skip=None):
+        """Grab frame `target`, seeking or skipping forward from next_position
+        
+        With on_skip, frames in between are always decoded and on_skip is
+        called after each of them. Returns False at the end of the file.
+        Raises if the SDK lands on a different frame than requested, even
+        after re-seeking.
+        """
+        if target != next_position:
+            # Gaps left by cache hits are seeked over like large frame steps
+            if on_skip is None and (use_seek or target - next_position >= SEEK_MIN_STEP):
+                self.camera.set_svo_position(target)
+            else:
+                for _ in range(next_position, target):
+                    if self.camera.grab(skip_params) != sl.ERROR_CODE.SUCCESS:
+                        return False
+                    if on_skip is not None:
+                        on_skip()
+        
+        if self.camera.grab(runtime_params) != sl.ERROR_CODE.SUCCESS:
+            return False
+        
+        landed = self.camera.get_svo_position()
+        if landed != target:
+            # Retry once with an explicit seek before giving up
+            self.camera.set_svo_position(target)
+            if self.camera.grab(runtime_params) != sl.ERROR_CODE.SUCCESS:
+                return False
+            landed = self.camera.get_svo_position()
+            if landed != target:
+                raise Exception(f"SVO seek landed on frame {landed}, expected {target}")
+        
+        return True
+    
+    def _drain_imu(self, imu_writer, frame_index, sensors_data):
+        """Write every new IMU sample up to the timestamp of the frame just grabbed"""
+        image_ns = self.camera.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+        for _ in range(MAX_IMU_SAMPLES_PER_GRAB):
+            if self.camera.get_sensors_data(sensors_data, sl.TIME_REFERENCE.CURRENT) != sl.ERROR_CODE.SUCCESS:
+                return
+            imu = sensors_data.get_imu_data()
+            if not imu_writer.append_imu(frame_index, imu) or imu.timestamp.get_nanoseconds() >= image_ns:
+                return
+        if not self.imu_truncated:
+            self.imu_truncated = True
+            print(f"Warning: more than {MAX_IMU_SAMPLES_PER_GRAB} IMU samples before frame {frame_index} "
+                  f"of {self.svo_path}; the rest were skipped")
+    
+    def _save_checkpoint(self, imu_writer):
+        """Checkpoint the frames written so far (from the grab thread)
+        
+        Only the contiguous prefix of finished frames counts. Manifest
+        records, IMU rows and the depth store are flushed first, so the
+        checkpoint never points past data a resumed run relies on; frames
+        after it are simply extracted again.
+        """
+        next_index = self.written.next_index
+        frames_done = next_index - self.options.get('frame_index_offset', 0)
+        with self.records_lock:
+            # Stats of frames past the written prefix are saved by a later checkpoint
+            for frame_index in [i for i in self.uncheckpointed_depth_stats if i < next_index]:
+                add_depth_stats(self.checkpointed_depth_stats, *self.uncheckpointed_depth_stats.pop(frame_index))
+            depth_stats = dict(self.checkpointed_depth_stats)
+        if imu_writer is not None:
+            imu_writer.flush()
+        if self.depth_store is not None:
+            self.depth_store.flush()
+        self.manifest.sync()
+        write_checkpoint(self.checkpoint_path, {
+            'frames_done': frames_done,
+            'depth_stats': depth_stats,
+            'complete': False,
+        })
+    
+    def _reuse_cached(self, frame_index, svo_frame):
+        """Link this frame's cached outputs into the job; returns the products reused"""
+        reused = set()
+        for (category, file_type), (key, extension) in self.cached_products.items():
+            path = os.path.join(self.folders[category], f'frame_{frame_index:06d}.{extension}')
+            if self.cache.fetch(key, svo_frame, extension, path):
+                self._record(category, file_type, path, frame_index)
+                reused.add((category, file_type))
+        return reused
+    
+    def _categories_to_retrieve(self, reused):
+        """Categories of this frame that still have to come from the SDK"""
+        categories = []
+        for category in self.folders:
+            if category == 'imu':
+                continue
+            products = [product for product in self.cached_products if product[0] == category]
+            written_here = category in self.video_streams or (category == 'depth' and self.depth_store is not None)
+            if written_here or not products or any(product not in reused for product in products):
+                categories.append(category)
+        return categories
+    
+    def _retrieve_frame(self, mats, categories):
+        """Retrieve the given categories of the grabbed frame as owned arrays"""
+        frame_data = {}
+        
+        if 'rgb_left' in categories:
+            self.camera.retrieve_image(mats['rgb_left'], sl.VIEW.LEFT)
+            frame_data['rgb_left'] = mats['rgb_left'].get_data().copy()
+        
+        if 'rgb_right' in categories:
+            self.camera.retrieve_image(mats['rgb_right'], sl.VIEW.RIGHT)
+            frame_data['rgb_right'] = mats['rgb_right'].get_data().copy()
+        
+        if 'depth' in categories:
+            self.camera.retrieve_measure(mats['depth'], sl.MEASURE.DEPTH)
+            frame_data['depth'] = mats['depth'].get_data().copy()
+        
+        if 'point_cloud' in categories:
+            self.camera.retrieve_measure(mats['point_cloud'], sl.MEASURE.XYZRGBA)
+            frame_data['point_cloud'] = mats['point_cloud'].get_data().copy()
+        
+        if 'confidence' in categories:
+            self.camera.retrieve_measure(mats['confidence'], sl.MEASURE.CONFIDENCE)
+            frame_data['confidence'] = mats['confidence'].get_data().copy()
+        
+        if 'normals' in categories:
+            self.camera.retrieve_measure(mats['normals'], sl.MEASURE.NORMALS)
+            frame_data['normals'] = mats['normals'].get_data().copy()
+        
+        return frame_data
+    
+    def _write_frame(self, frame_index, frame_data, frame_info, reused=()):
+        """Encode and write every product of one frame not reused from the cache (runs on a writer thread)"""
+        frame_name = f'frame_{frame_index:06d}'
+        svo_frame = frame_info['svo_frame']
+        
+        # Per-frame images (categories written as video go through _write_video_frame)
+        for category in IMAGE_CATEGORIES:
+            if category in frame_data and category not in self.video_streams and (category, 'image') not in reused:
+                img_path, encoded_bytes, _ = write_image(
+                    self._render_image(category, frame_data[category]),
+                    os.path.join(self.folders[category], frame_name),
+                    self.image_codec(category)
+                )
+                self._record(category, 'image', img_path, frame_index, encoded_bytes)
+                self._publish((category, 'image'), img_path, svo_frame)
+        
+        # Raw depth
+        if 'depth' in frame_data and ('depth', 'depth') not in reused:
+            depth_data = frame_data['depth']
+            
+            # Save raw depth into the store slot, or as its own encoded file
+            if self.depth_store is not None:
+                start = time.perf_counter()
+                self.depth_store.write(frame_index, depth_data, frame_info['svo_frame'], frame_info['timestamp_ns'])
+                encoded_bytes = depth_data.size * self.depth_store.frames.dtype.itemsize
+                encode_seconds = time.perf_counter() - start
+            else:
+                depth_path, encoded_bytes, encode_seconds = write_depth(
+                    depth_data,
+                    os.path.join(self.folders['depth'], frame_name),
+                    self.options.get('depth_encoding', 'float32_npy')
+                )
+                self._record('depth', 'depth', depth_path, frame_index, encoded_bytes)
+                self._publish(('depth', 'depth'), depth_path, svo_frame)
+            self._add_depth_stats(frame_index, depth_data.nbytes, encoded_bytes, encode_seconds)
+        
+        # Point Cloud, in the selected format (binary PLY by default)
+        if 'point_cloud' in frame_data and ('point_cloud', 'point_cloud') not in reused:
+            pc_format = self.options.get('point_cloud_format', 'ply_binary')
+            pc_path = os.path.join(self.folders['point_cloud'], f'{frame_name}.{POINT_CLOUD_EXTENSIONS[pc_format]}')
+            save_point_cloud(frame_data['point_cloud'], pc_path, pc_format)
+            self._record('point_cloud', 'point_cloud', pc_path, frame_index)
+            self._publish(('point_cloud', 'point_cloud'), pc_path, svo_frame)
+        
+        if self.written is not None:
+            self.written.mark(frame_index)
+    
+    def _publish(self, product, path, svo_frame):
+        """Add a freshly written per-frame output to the cache"""
+        if product in self.cached_products:
+            key, extension = self.cached_products[product]
+            self.cache.store(key, svo_frame, extension, path)
+    
+    def image_codec(self, category):
+        """Codec profile used for a category's per-frame images"""
+        option = IMAGE_CODEC_OPTIONS[category]
+        return self.options.get(option, DEFAULT_IMAGE_CODECS[option])
+    
+    def _write_video_frame(self, category, frame_index, data, frame_info):
+        """Append one frame to a category's video (runs on that category's lane)"""
+        self.video_streams[category].append(
+            self._render_image(category, data), frame_index, frame_info['svo_frame'], frame_info['timestamp_ns']
+        )
+    
+    def _render_image(self, category, data):
+        """Image saved for a category: the frame itself or its visualization"""
+        if category == 'depth':
+            return self._colorize_depth(data)
+        if category == 'confidence':
+            return (data * 255).astype(np.uint8)
+        if category == 'normals':
+            return self._visualize_normals(data)
+        return data
+    
+    def _add_depth_stats(self, frame_index, raw_bytes, encoded_bytes, encode_seconds):
+        with self.records_lock:
+            add_depth_stats(self.depth_stats, raw_bytes, encoded_bytes, encode_seconds)
+            if self.written is not None:
+                self.uncheckpointed_depth_stats[frame_index] = (raw_bytes, encoded_bytes, encode_seconds)
+    
+    def _record(self, category, file_type, file_path, frame_number, file_size=None):
+        """Log an extracted file to the manifest (safe to call from writer threads)
+        
+        Pass file_size when the writer already knows it to skip a stat call.
+        """
+        self.manifest.append({
+            'category': category,
+            'file_type': file_type,
+            'file_path': file_path,
+            'filename': os.path.basename(file_path),
+            'frame_number': frame_number,
+            'file_size': os.path.getsize(file_path) if file_size is None else file_size
+        })
+    
     def _colorize_depth(self, depth_data):
         """Colorize depth map for visualization"""
         depth_normalized = cv2.normalize(depth_data, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
@@ -276,64 +645,106 @@ class SVO2Processor:
         normals_vis = ((normals_data[:, :, :3] + 1.0) * 127.5).astype(np.uint8)
         return cv2.cvtColor(normals_vis, cv2.COLOR_RGB2BGR)
     
-    def _save_point_cloud_ply(self, point_cloud_data, output_path):
-        """Save point cloud as PLY file"""
-        height, width, _ = point_cloud_data.shape
-        
-        with open(output_path, 'w') as f:
-            # First pass: count valid points
-            valid_points = 0
-            for y in range(height):
-                for x in range(width):
-                    point = point_cloud_data[y, x]
-                    # Check if point coordinates are valid (not NaN or Inf)
-                    if (not np.isnan(point[0]) and not np.isinf(point[0]) and
-                        not np.isnan(point[1]) and not np.isinf(point[1]) and
-                        not np.isnan(point[2]) and not np.isinf(point[2]) and
-                        not np.isnan(point[3]) and not np.isinf(point[3])):
-                        valid_points += 1
-            
-            # Write PLY header
-            f.write("ply\n")
-            f.write("format ascii 1.0\n")
-            f.write(f"element vertex {valid_points}\n")
-            f.write("property float x\n")
-            f.write("property float y\n")
-            f.write("property float z\n")
-            f.write("property uchar red\n")
-            f.write("property uchar green\n")
-            f.write("property uchar blue\n")
-            f.write("end_header\n")
-            
-            # Second pass: write valid point data
-            for y in range(height):
-                for x in range(width):
-                    point = point_cloud_data[y, x]
-                    # Check if all components are valid
-                    if (not np.isnan(point[0]) and not np.isinf(point[0]) and
-                        not np.isnan(point[1]) and not np.isinf(point[1]) and
-                        not np.isnan(point[2]) and not np.isinf(point[2]) and
-                        not np.isnan(point[3]) and not np.isinf(point[3])):
-                        
-                        x_coord, y_coord, z_coord = point[:3]
-                        
-                        # RGBA is packed in the 4th component
-                        # Handle potential NaN in RGBA by defaulting to white
-                        try:
-                            rgba = int(point[3])
-                            r = (rgba >> 16) & 0xFF
-                            g = (rgba >> 8) & 0xFF
-                            b = rgba & 0xFF
-                        except (ValueError, OverflowError):
-                            # Default to white if RGBA is invalid
-                            r, g, b = 255, 255, 255
-                        
-                        f.write(f"{x_coord} {y_coord} {z_coord} {r} {g} {b}\n")
-    
     def get_extracted_files(self):
-        """Get list of all extracted files"""
-        return self.extracted_files
+        """Iterate over the extracted file records in the manifest"""
+        return read_manifest(self.manifest_path)
     
     def close(self):
         """Close the camera"""
-        self.camera.close()
\ No newline at end of file
+        self.camera.close()
+
+
+def plan_shards(frame_start, frame_end, frame_step, num_shards):
+    """Split [frame_start, frame_end) into contiguous shards aligned to frame_step
+
+    Returns a list of (shard_start, shard_end, frame_index_offset) tuples, where
+    the offset is the output index of the shard's first frame in the full job.
+    """
+    frame_count = len(range(frame_start, frame_end, frame_step))
+    num_shards = max(1, min(num_shards, frame_count))
+    
+    shards = []
+    per_shard, remainder = divmod(frame_count, num_shards)
+    first_index = 0
+    for shard_index in range(num_shards):
+        count = per_shard + (1 if shard_index < remainder else 0)
+        shard_start = frame_start + first_index * frame_step
+        shard_end = min(frame_start + (first_index + count) * frame_step, frame_end)
+        shards.append((shard_start, shard_end, first_index))
+        first_index += count
+    return shards
+
+
+def imu_file_type(fmt):
+    """ExtractedFile.file_type for an IMU file of the given format"""
+    return 'csv' if fmt == 'csv' else 'sensor'
+
+
+def merge_imu_shards(imu_folder, shard_records, output_filename='imu_data.csv', fmt='csv'):
+    """Concatenate per-shard IMU files (in shard order) into one file
+
+    Returns the record for the merged file, or None if no shard wrote IMU data.
+    """
+    shard_paths = [record['file_path'] for record in shard_records]
+    if not shard_paths:
+        return None
+    
+    output_path = os.path.join(imu_folder, output_filename)
+    merge_sensor_files(shard_paths, output_path, fmt)
+    
+    return {
+        'category': 'imu',
+        'file_type': imu_file_type(fmt),
+        'file_path': output_path,
+        'filename': output_filename,
+        'frame_number': None,
+        'file_size': os.path.getsize(output_path)
+    }
+
+
+def empty_depth_stats():
+    """Depth encoding totals of no frames"""
+    return {'frames': 0, 'raw_bytes': 0, 'encoded_bytes': 0, 'encode_seconds': 0.0}
+
+
+def add_depth_stats(totals, raw_bytes, encoded_bytes, encode_seconds):
+    """Count one depth frame into a depth stats dict"""
+    totals['frames'] += 1
+    totals['raw_bytes'] += raw_bytes
+    totals['encoded_bytes'] += encoded_bytes
+    totals['encode_seconds'] += encode_seconds
+
+
+def write_depth_stats(stats_path, encoding, totals):
+    """Write depth encoding totals plus per-frame averages as JSON"""
+    frames = max(1, totals['frames'])
+    stats = dict(
+        totals,
+        encoding=encoding,
+        compression_ratio=totals['raw_bytes'] / max(1, totals['encoded_bytes']),
+        mean_bytes_per_frame=totals['encoded_bytes'] / frames,
+        mean_encode_ms=totals['encode_seconds'] * 1000.0 / frames,
+    )
+    with open(stats_path, 'w') as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+def merge_depth_stats_shards(depth_folder, shard_filenames, output_filename=DEPTH_STATS_FILENAME):
+    """Sum per-shard depth encoding stats into one file"""
+    totals = empty_depth_stats()
+    encoding = None
+    for filename in shard_filenames:
+        shard_path = os.path.join(depth_folder, filename)
+        if not os.path.exists(shard_path):
+            continue
+        with open(shard_path) as f:
+            shard_stats = json.load(f)
+        encoding = shard_stats['encoding']
+        for key in totals:
+            totals[key] += shard_stats[key]
+        os.remove(shard_path)
+    
+    if encoding is None:
+        return None
+    return write_depth_stats(os.path.join(depth_folder, output_filename), encoding, totals)
@@ -0,0 +1,68 @@
+import pyzed.sl as sl
+
+# Sensors reported in SVO2Upload.sensors, by sensors_configuration attribute
+SENSOR_PARAMETERS = {
+    'accelerometer': 'accelerometer_parameters',
+    'gyroscope': 'gyroscope_parameters',
+    'magnetometer': 'magnetometer_parameters',
+    'barometer': 'barometer_parameters',
+}
+
+CAMERA_CALIBRATION_FIELDS = ('fx', 'fy', 'cx', 'cy', 'disto', 'h_fov', 'v_fov')
+
+
+def _camera_calibration(camera_parameters):
+    calibration = {}
+    for field in CAMERA_CALIBRATION_FIELDS:
+        value = getattr(camera_parameters, field, None)
+        if value is not None:
+            calibration[field] = [float(v) for v in value] if field == 'disto' else float(value)
+    return calibration
+
+
+def _frame_timestamp(camera, frame_number):
+    """Image timestamp (ns) of a frame, or None if it cannot be grabbed"""
+    camera.set_svo_position(frame_number)
+    runtime_params = sl.RuntimeParameters()
+    runtime_params.enable_depth = False
+    if camera.grab(runtime_params) != sl.ERROR_CODE.SUCCESS:
+        return None
+    return camera.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+
+
+def read_svo_metadata(camera):
+    """SVO2Upload metadata fields of an open camera
+
+    Grabs the first and last frames (without depth) for their timestamps.
+    """
+    info = camera.get_camera_information()
+    configuration = info.camera_configuration
+    total_frames = camera.get_svo_number_of_frames()
+
+    calibration = {}
+    calibration_parameters = getattr(configuration, 'calibration_parameters', None)
+    if calibration_parameters is not None:
+        calibration = {
+            'left': _camera_calibration(calibration_parameters.left_cam),
+            'right': _camera_calibration(calibration_parameters.right_cam),
+            'baseline': float(calibration_parameters.get_camera_baseline()),
+        }
+
+    sensors = {}
+    sensors_configuration = getattr(info, 'sensors_configuration', None)
+    for sensor, attribute in SENSOR_PARAMETERS.items():
+        parameters = getattr(sensors_configuration, attribute, None)
+        sensors[sensor] = bool(parameters is not None and parameters.is_available)
+
+    return {
+        'total_frames': total_frames,
+        'width': configuration.resolution.width,
+        'height': configuration.resolution.height,
+        'fps': float(configuration.fps),
+        'first_timestamp_ns': _frame_timestamp(camera, 0) if total_frames > 0 else None,
+        'last_timestamp_ns': _frame_timestamp(camera, total_frames - 1) if total_frames > 0 else None,
+        'camera_model': str(info.camera_model),
+        'camera_serial': int(info.serial_number),
+        'calibration': calibration,
+        'sensors': sensors,
+    }
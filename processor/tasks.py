@@ -1,135 +1,506 @@
 from .models import ExtractionJob, FileProgress, ExtractedFile, SVO2Upload
-from .svo2_processor import SVO2Processor
+from .svo2_processor import (
+    SVO2Processor, CATEGORY_FOLDERS, plan_shards, merge_imu_shards, merge_depth_stats_shards
+)
+from .sensor_writer import SENSOR_FORMAT_EXTENSIONS
+from .manifest import ManifestWriter, MANIFEST_FILENAME, read_manifest
+from .progress import ProgressReporter, TaskSuperseded, owns_unit, set_job_units
+from .extraction_cache import file_sha256
+from .upload_previews import render_upload_previews
+from .svo_metadata import read_svo_metadata
+from .svo2_preview import SVO2Preview
+from celery import shared_task, chord
+from celery.signals import worker_ready
+from celery.utils import uuid
+from django.core.files.base import ContentFile
+from django.db import transaction, IntegrityError
+from django.db.models import F, Q
 from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import glob
 import os
-import zipfile
-import shutil
+import traceback
 
-def process_svo2_files_sync(job_id):
-    """Process SVO2 files synchronously"""
+def job_output_base(job_id):
+    """Directory holding all outputs of a job"""
+    return os.path.join(settings.MEDIA_ROOT, 'extraction_results', f'job_{job_id}')
+
+def file_output_dir(job_id, svo_file):
+    """Directory holding the outputs of one SVO file of a job"""
+    return os.path.join(job_output_base(job_id), f'file_{svo_file.id}_{svo_file.filename.replace(".svo2", "")}')
+
+def job_options(job):
+    """Extraction options for SVO2Processor from a job's settings"""
+    return {
+        'extract_rgb_left': job.extract_rgb_left,
+        'extract_rgb_right': job.extract_rgb_right,
+        'extract_depth': job.extract_depth,
+        'extract_point_cloud': job.extract_point_cloud,
+        'extract_confidence': job.extract_confidence,
+        'extract_normals': job.extract_normals,
+        'extract_imu': job.extract_imu,
+        'depth_mode': job.depth_mode,
+        'frame_start': job.frame_start,
+        'frame_end': job.frame_end,
+        'frame_step': job.frame_step,
+        'point_cloud_format': job.point_cloud_format,
+        'writer_threads': job.writer_threads,
+        'queue_depth': job.queue_depth,
+        'depth_storage': job.depth_storage,
+        'depth_encoding': job.depth_encoding,
+        'image_output': job.image_output,
+        'rgb_codec': job.rgb_codec,
+        'depth_image_codec': job.depth_image_codec,
+        'confidence_codec': job.confidence_codec,
+        'normals_codec': job.normals_codec,
+        'imu_rate': job.imu_rate,
+        'imu_format': job.imu_format,
+    }
+
+def metadata_options(svo_file):
+    """Indexed metadata SVO2Processor uses instead of asking the SDK (empty until indexed)"""
+    if svo_file.metadata_indexed_at is None:
+        return {}
+    return {
+        'total_frames': svo_file.total_frames,
+        'frame_width': svo_file.width,
+        'frame_height': svo_file.height,
+        'fps': svo_file.fps,
+    }
+
+def task_options(job, svo_file, resume=False):
+    """job_options plus the metadata, checkpoint and cache settings of one extraction task"""
+    options = dict(job_options(job), resume=resume, checkpoint_interval=settings.CHECKPOINT_INTERVAL)
+    options.update(metadata_options(svo_file))
+    if settings.EXTRACTION_CACHE_ENABLED and svo_file.content_hash:
+        options.update(cache_dir=settings.EXTRACTION_CACHE_DIR, content_hash=svo_file.content_hash)
+    return options
+
+def ensure_content_hash(svo_file):
+    """Hash an upload the first time it is extracted; returns the hash"""
+    if not svo_file.content_hash:
+        svo_file.content_hash = file_sha256(svo_file.file.path)
+        try:
+            with transaction.atomic():
+                svo_file.save(update_fields=['content_hash'])
+        except IntegrityError:
+            # Another upload already holds this content; the hash still keys the cache
+            pass
+    return svo_file.content_hash
+
+def _count_cache_use(file_progress_id, processor):
+    """Add a task's cache hits/misses to its file (shards report separately)"""
+    if processor.cache is not None:
+        FileProgress.objects.filter(id=file_progress_id).update(
+            cache_hits=F('cache_hits') + processor.cache.hits,
+            cache_misses=F('cache_misses') + processor.cache.misses,
+        )
+
+def shard_options(options, shard_index, shard_start, shard_end, index_offset):
+    """Options for one frame-range shard; per-shard side files are merged by finalize"""
+    imu_extension = SENSOR_FORMAT_EXTENSIONS[options.get('imu_format', 'csv')]
+    return dict(
+        options,
+        frame_start=shard_start,
+        frame_end=shard_end,
+        frame_index_offset=index_offset,
+        imu_filename=f'imu_data_shard_{shard_index:03d}.{imu_extension}',
+        depth_stats_filename=f'depth_encoding_stats_shard_{shard_index:03d}.json',
+        manifest_filename=f'.manifest_shard_{shard_index:03d}.jsonl',
+        checkpoint_filename=f'.checkpoint_shard_{shard_index:03d}.json',
+    )
+
+def merge_shards(output_dir, options):
+    """Merge the side files of a sharded file into the file-level ones
+
+    Frame outputs already share one namespace; IMU parts are concatenated and
+    shard manifests are streamed into the file's manifest and removed once
+    it is complete. Shard checkpoints are kept, so a resumed job knows the
+    shards are done. Returns the path of the merged manifest.
+    """
+    shard_manifests = sorted(glob.glob(os.path.join(output_dir, '.manifest_shard_*.jsonl')))
+    imu_format = options.get('imu_format', 'csv')
+
+    manifest = ManifestWriter(os.path.join(output_dir, MANIFEST_FILENAME))
     try:
-        job = ExtractionJob.objects.get(id=job_id)
-        job.status = 'processing'
-        job.save()
-        
-        svo2_files = job.svo2_files.all()
-        total_files = svo2_files.count()
-        
-        # Create output directory
-        output_base = os.path.join(settings.MEDIA_ROOT, 'extraction_results', f'job_{job_id}')
-        os.makedirs(output_base, exist_ok=True)
-        
-        for idx, svo_file in enumerate(svo2_files):
-            # Create or get file progress
-            file_progress, created = FileProgress.objects.get_or_create(
-                job=job,
-                svo2_file=svo_file,
-                defaults={'status': 'processing'}
-            )
+        imu_records = []
+        shared_paths = set()
+        for shard_manifest in shard_manifests:
+            for record in read_manifest(shard_manifest):
+                if record['category'] == 'imu':
+                    imu_records.append(record)
+                elif record['frame_number'] is None:
+                    # Per-file containers (e.g. the depth store) are reported by every shard
+                    if record['file_path'] not in shared_paths:
+                        shared_paths.add(record['file_path'])
+                        manifest.append(record)
+                else:
+                    manifest.append(record)
+
+        if imu_records:
+            manifest.append(merge_imu_shards(
+                os.path.dirname(imu_records[0]['file_path']), imu_records,
+                f'imu_data.{SENSOR_FORMAT_EXTENSIONS[imu_format]}', imu_format
+            ))
+    finally:
+        manifest.close()
+
+    for shard_manifest in shard_manifests:
+        os.remove(shard_manifest)
+
+    if options['extract_depth']:
+        merge_depth_stats_shards(
+            os.path.join(output_dir, CATEGORY_FOLDERS['depth']),
+            [f'depth_encoding_stats_shard_{shard_index:03d}.json' for shard_index in range(len(shard_manifests))]
+        )
+
+    return manifest.path
+
+def register_manifest(job, svo_file, manifest_path, batch_size=None):
+    """Insert a manifest's records as ExtractedFile rows, one transaction per batch
+
+    Rows left by an interrupted earlier registration are replaced. Returns
+    the number of rows created.
+    """
+    batch_size = batch_size or settings.EXTRACTED_FILE_BATCH_SIZE
+    ExtractedFile.objects.filter(job=job, svo2_file=svo_file).delete()
+    registered = 0
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            ExtractedFile.objects.bulk_create(batch, batch_size=batch_size)
+
+    for record in read_manifest(manifest_path):
+        batch.append(ExtractedFile(job=job, svo2_file=svo_file, **record))
+        if len(batch) >= batch_size:
+            flush()
+            registered += len(batch)
+            batch = []
+
+    if batch:
+        flush()
+        registered += len(batch)
+
+    return registered
+
+def _fail_file(file_progress_id, reporter, error):
+    print(f"Error processing file progress {file_progress_id}: {error}")
+    traceback.print_exc()
+    reporter.finish('failed', str(error))
+    FileProgress.objects.filter(id=file_progress_id).update(status='failed', error_message=str(error))
+
+@shared_task
+def start_extraction(job_id, resume=False):
+    """Fan a job out into one task per SVO file (or per shard) and finalize with a chord
+
+    How many of them run at once is up to the worker's concurrency. With
+    resume, completed files are skipped and the others continue from their
+    checkpoints. Task ids are recorded before dispatch, so tasks left from
+    an earlier run of the job exit instead of running alongside these.
+    """
+    job = ExtractionJob.objects.get(id=job_id)
+    job.status = 'processing'
+    job.error_message = ''
+    job.heartbeat_at = timezone.now()
+    job.save()
+
+    try:
+        os.makedirs(job_output_base(job_id), exist_ok=True)
+        options = job_options(job)
+
+        header = []
+        units = {}
+        for svo_file in job.svo2_files.all():
+            file_progress, created = FileProgress.objects.get_or_create(job=job, svo2_file=svo_file)
+            if resume and file_progress.status == 'completed':
+                continue
             file_progress.status = 'processing'
+            if not resume:
+                file_progress.progress = 0.0
+                file_progress.cache_hits = 0
+                file_progress.cache_misses = 0
+            file_progress.error_message = ''
             file_progress.save()
-            
-            try:
-                # Create output directory for this file
-                file_output_dir = os.path.join(output_base, f'file_{svo_file.id}_{svo_file.filename.replace(".svo2", "")}')
-                os.makedirs(file_output_dir, exist_ok=True)
-                
-                # Prepare extraction options
-                options = {
-                    'extract_rgb_left': job.extract_rgb_left,
-                    'extract_rgb_right': job.extract_rgb_right,
-                    'extract_depth': job.extract_depth,
-                    'extract_point_cloud': job.extract_point_cloud,
-                    'extract_confidence': job.extract_confidence,
-                    'extract_normals': job.extract_normals,
-                    'extract_imu': job.extract_imu,
-                    'depth_mode': job.depth_mode,
-                    'frame_start': job.frame_start,
-                    'frame_end': job.frame_end,
-                    'frame_step': job.frame_step,
-                }
-                
-                # Initialize processor
-                processor = SVO2Processor(svo_file.file.path, file_output_dir, options)
-                processor.open()
-                
-                total_frames = processor.get_total_frames()
-                file_progress.total_frames = total_frames
-                file_progress.save()
-                
-                # Progress callback
-                def progress_callback(progress, current_frame, total):
-                    file_progress.progress = progress
-                    file_progress.current_frame = current_frame
-                    file_progress.save()
-                    
-                    # Update overall job progress
-                    overall_progress = ((idx + (progress / 100)) / total_files) * 100
-                    job.progress = overall_progress
-                    job.save()
-                
-                # Process the file
-                processor.process(progress_callback=progress_callback)
-                
-                # Save extracted files to database
-                extracted_files_data = processor.get_extracted_files()
-                print(f"Saving {len(extracted_files_data)} extracted files to database...")
-                
-                for file_data in extracted_files_data:
-                    ExtractedFile.objects.create(
-                        job=job,
-                        svo2_file=svo_file,
-                        category=file_data['category'],
-                        file_type=file_data['file_type'],
-                        file_path=file_data['file_path'],
-                        filename=file_data['filename'],
-                        frame_number=file_data['frame_number'],
-                        file_size=file_data['file_size']
-                    )
-                    print(f"Saved: {file_data['category']} - {file_data['filename']}")
-                
-                processor.close()
-                
-                file_progress.status = 'completed'
-                file_progress.progress = 100.0
-                file_progress.save()
-                
-                print(f"Completed processing {svo_file.filename}")
-                
-            except Exception as e:
-                print(f"Error processing {svo_file.filename}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                file_progress.status = 'failed'
-                file_progress.error_message = str(e)
-                file_progress.save()
-                raise
-        
-        # Create ZIP file
-        print("Creating ZIP file...")
-        zip_path = os.path.join(settings.MEDIA_ROOT, 'extraction_results', f'job_{job_id}_results.zip')
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(output_base):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, output_base)
-                    zipf.write(file_path, arcname)
-        
-        print(f"ZIP created at: {zip_path}")
-        
-        job.output_path = zip_path
+
+            # Outputs are cached by content; a missing file fails in its own task
+            if settings.EXTRACTION_CACHE_ENABLED and os.path.exists(svo_file.file.path):
+                ensure_content_hash(svo_file)
+
+            output_dir = file_output_dir(job_id, svo_file)
+            os.makedirs(output_dir, exist_ok=True)
+
+            # Video output is appended in frame order, so it is never sharded
+            if job.num_shards > 1 and job.image_output == 'frames':
+                processor = SVO2Processor(svo_file.file.path, output_dir, dict(options, **metadata_options(svo_file)))
+                # Indexed uploads are planned from their stored metadata, without opening the SVO
+                if svo_file.metadata_indexed_at is None:
+                    processor.open()
+                try:
+                    shards = plan_shards(*processor.get_frame_range(), job.num_shards)
+                    # Create the shared depth store once so shards only open it
+                    if options['extract_depth'] and options['depth_storage'] == 'memmap':
+                        processor.open_depth_store(processor.get_output_frame_count()).close()
+                finally:
+                    processor.close()
+
+                tasks = [
+                    extract_shard.si(job_id, file_progress.id, shard_index, shard_start, shard_end, index_offset, resume)
+                    for shard_index, (shard_start, shard_end, index_offset) in enumerate(shards)
+                ]
+            else:
+                tasks = [extract_file.si(job_id, file_progress.id, resume)]
+
+            file_progress.task_ids = {}
+            for unit, task in enumerate(tasks):
+                file_progress.task_ids[str(unit)] = uuid()
+                header.append(task.set(task_id=file_progress.task_ids[str(unit)]))
+            file_progress.dispatched_at = timezone.now()
+            file_progress.units_started = 0
+            file_progress.save(update_fields=['task_ids', 'dispatched_at', 'units_started'])
+            units[file_progress.id] = len(tasks)
+
+        set_job_units(job_id, units)
+        job.finalize_task_id = uuid()
+        job.save(update_fields=['finalize_task_id'])
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        traceback.print_exc()
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.save()
+        return
+
+    finalize = finalize_extraction.si(job_id).set(task_id=job.finalize_task_id)
+    if header:
+        chord(header)(finalize)
+    else:
+        finalize.delay()
+
+@shared_task(bind=True)
+def extract_file(self, job_id, file_progress_id, resume=False):
+    """Extract one whole SVO file and register its outputs"""
+    file_progress = FileProgress.objects.select_related('job', 'svo2_file').get(id=file_progress_id)
+    if file_progress.status == 'completed':
+        return
+    if not owns_unit(file_progress_id, 0, self.request.id):
+        print(f"Task {self.request.id} for file progress {file_progress_id} was superseded, exiting")
+        return
+    FileProgress.objects.filter(id=file_progress_id).update(units_started=F('units_started') + 1)
+    job = file_progress.job
+    svo_file = file_progress.svo2_file
+    reporter = ProgressReporter(job_id, file_progress_id, task_id=self.request.id)
+
+    try:
+        processor = SVO2Processor(svo_file.file.path, file_output_dir(job_id, svo_file), task_options(job, svo_file, resume))
+        processor.open()
+        try:
+            total_frames = processor.get_total_frames()
+            FileProgress.objects.filter(id=file_progress_id).update(total_frames=total_frames)
+            reporter.start(total_frames, processor.get_output_frame_count(), processor.resume_frame_count())
+            processor.process(progress_callback=lambda progress, current_frame, total: reporter.update(progress, current_frame))
+        finally:
+            processor.close()
+        _count_cache_use(file_progress_id, processor)
+
+        # Save extracted files to database
+        registered = register_manifest(job, svo_file, processor.manifest_path)
+        print(f"Saved {registered} extracted files to database")
+
+        reporter.finish('completed')
+        FileProgress.objects.filter(id=file_progress_id).update(status='completed', progress=100.0)
+        print(f"Completed processing {svo_file.filename}")
+    except TaskSuperseded as e:
+        print(f"{e}, exiting")
+    except Exception as e:
+        _fail_file(file_progress_id, reporter, e)
+
+@shared_task(bind=True)
+def extract_shard(self, job_id, file_progress_id, shard_index, shard_start, shard_end, index_offset, resume=False):
+    """Extract one frame-range shard of an SVO file; finalize merges and registers it"""
+    if not owns_unit(file_progress_id, shard_index, self.request.id):
+        print(f"Task {self.request.id} for shard {shard_index} of file progress {file_progress_id} was superseded, exiting")
+        return
+    FileProgress.objects.filter(id=file_progress_id).update(units_started=F('units_started') + 1)
+    file_progress = FileProgress.objects.select_related('job', 'svo2_file').get(id=file_progress_id)
+    job = file_progress.job
+    svo_file = file_progress.svo2_file
+    reporter = ProgressReporter(job_id, file_progress_id, shard_index, task_id=self.request.id)
+    options = shard_options(task_options(job, svo_file, resume), shard_index, shard_start, shard_end, index_offset)
+
+    try:
+        processor = SVO2Processor(svo_file.file.path, file_output_dir(job_id, svo_file), options)
+        processor.open()
+        try:
+            total_frames = processor.get_total_frames()
+            if shard_index == 0:
+                FileProgress.objects.filter(id=file_progress_id).update(total_frames=total_frames)
+            reporter.start(total_frames, processor.get_output_frame_count(), processor.resume_frame_count())
+            processor.process(progress_callback=lambda progress, current_frame, total: reporter.update(progress, current_frame))
+        finally:
+            processor.close()
+        _count_cache_use(file_progress_id, processor)
+        reporter.finish('completed')
+    except TaskSuperseded as e:
+        print(f"{e}, exiting")
+    except Exception as e:
+        _fail_file(file_progress_id, reporter, e)
+
+@shared_task(bind=True)
+def finalize_extraction(self, job_id):
+    """Merge and register sharded files and mark the job complete (or failed)
+
+    There is no archive step: download_results streams the ZIP on demand.
+    """
+    job = ExtractionJob.objects.get(id=job_id)
+    if job.finalize_task_id not in ('', self.request.id):
+        print(f"Finalize task {self.request.id} of job {job_id} was superseded, exiting")
+        return
+    options = job_options(job)
+
+    try:
+        # Whole files are registered by their own task; sharded ones are left processing
+        for file_progress in job.file_progress.select_related('svo2_file').filter(status='processing'):
+            output_dir = file_output_dir(job_id, file_progress.svo2_file)
+            manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+            # Already merged when a resumed job is finalized again
+            if glob.glob(os.path.join(output_dir, '.manifest_shard_*.jsonl')):
+                manifest_path = merge_shards(output_dir, options)
+
+            registered = register_manifest(job, file_progress.svo2_file, manifest_path)
+            print(f"Saved {registered} extracted files to database")
+
+            file_progress.status = 'completed'
+            file_progress.progress = 100.0
+            file_progress.save()
+            print(f"Completed processing {file_progress.svo2_file.filename}")
+
+        failed = job.file_progress.select_related('svo2_file').filter(status='failed').first()
+        if failed:
+            raise Exception(f"{failed.svo2_file.filename}: {failed.error_message}")
+
         job.status = 'completed'
         job.progress = 100.0
         job.save()
-        
+
         # Verify database records
         extracted_count = ExtractedFile.objects.filter(job=job).count()
         print(f"Total extracted files in database: {extracted_count}")
-        
+
     except Exception as e:
         print(f"Job {job_id} failed: {str(e)}")
-        import traceback
         traceback.print_exc()
         job.status = 'failed'
         job.error_message = str(e)
-        job.save()
\ No newline at end of file
+        job.save()
+
+@shared_task
+def ingest_upload(svo_file_id, metadata=True, previews=True):
+    """Index the metadata and render the thumbnail/filmstrip of an uploaded SVO2 file
+
+    Both come from one camera open with depth disabled.
+    """
+    svo_file = SVO2Upload.objects.filter(id=svo_file_id).first()
+    if svo_file is None or not svo_file.file:
+        return
+
+    preview = SVO2Preview(svo_file.file.path)
+    preview.set_depth_mode('NONE')
+    try:
+        preview.open()
+        try:
+            indexed = read_svo_metadata(preview.zed) if metadata else {}
+            if previews:
+                thumbnail, filmstrip, frames = render_upload_previews(
+                    preview, settings.FILMSTRIP_FRAMES, settings.FILMSTRIP_TILE_WIDTH, settings.UPLOAD_THUMBNAIL_WIDTH
+                )
+        finally:
+            preview.close()
+    except Exception as e:
+        print(f"Error ingesting {svo_file.filename}: {e}")
+        return
+
+    update_fields = []
+    if metadata:
+        for field, value in indexed.items():
+            setattr(svo_file, field, value)
+        svo_file.metadata_indexed_at = timezone.now()
+        update_fields += list(indexed) + ['metadata_indexed_at']
+
+    if previews:
+        for field in (svo_file.thumbnail, svo_file.filmstrip):
+            if field:
+                field.delete(save=False)
+        svo_file.thumbnail.save(f'{svo_file.id}_thumbnail.jpg', ContentFile(thumbnail), save=False)
+        svo_file.filmstrip.save(f'{svo_file.id}_filmstrip.jpg', ContentFile(filmstrip), save=False)
+        svo_file.filmstrip_frames = frames
+        update_fields += ['thumbnail', 'filmstrip', 'filmstrip_frames']
+
+    svo_file.save(update_fields=update_fields)
+
+def has_queued_units(job):
+    """Whether units of the job's current run are still waiting for a worker
+
+    Each task counts itself in FileProgress.units_started when it starts.
+    Units dispatched more than MAX_QUEUED_SECONDS ago are presumed lost
+    (e.g. with the broker) and no longer keep the job alive. Finalize is
+    not tracked: units refresh the heartbeat as they finish, so it has the
+    whole stale window to start.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.MAX_QUEUED_SECONDS)
+    dispatched = job.file_progress.filter(status='processing', dispatched_at__gte=cutoff)
+    return any(
+        units_started < len(task_ids)
+        for task_ids, units_started in dispatched.values_list('task_ids', 'units_started')
+    )
+
+@shared_task
+def recover_stale_jobs(stale_seconds=None):
+    """Resume processing jobs whose heartbeat stopped (their worker died)
+
+    Each job is claimed with a compare-and-set on its heartbeat, so sweeps
+    running at the same time never resume it twice. A job lost more than
+    MAX_JOB_RESUMES times is marked failed instead. Returns the ids of the
+    resumed jobs.
+    """
+    if stale_seconds is None:
+        stale_seconds = settings.STALE_JOB_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+
+    stale = ExtractionJob.objects.filter(status='processing').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, updated_at__lt=cutoff)
+    )
+
+    resumed = []
+    for job in stale:
+        if has_queued_units(job):
+            # Waiting for a free worker, not orphaned
+            ExtractionJob.objects.filter(id=job.id, heartbeat_at=job.heartbeat_at).update(heartbeat_at=timezone.now())
+            continue
+
+        claimed = ExtractionJob.objects.filter(
+            id=job.id, status='processing', heartbeat_at=job.heartbeat_at
+        ).update(heartbeat_at=timezone.now(), resume_count=F('resume_count') + 1)
+        if not claimed:
+            continue
+
+        if job.resume_count >= settings.MAX_JOB_RESUMES:
+            print(f"Job {job.id} is stale again after {job.resume_count} resumes, marking it failed")
+            ExtractionJob.objects.filter(id=job.id).update(
+                status='failed', error_message=f'Worker lost {job.resume_count + 1} times'
+            )
+            continue
+
+        print(f"Resuming stale job {job.id} (last heartbeat: {job.heartbeat_at})")
+        start_extraction.delay(job.id, resume=True)
+        resumed.append(job.id)
+
+    return resumed
+
+@worker_ready.connect
+def recover_jobs_on_worker_start(sender, **kwargs):
+    """Sweep for jobs orphaned by a dead worker, now and once their heartbeats have expired"""
+    if settings.RECOVER_JOBS_ON_WORKER_START:
+        recover_stale_jobs.delay()
+        recover_stale_jobs.apply_async(countdown=settings.STALE_JOB_SECONDS)
@@ -1,3 +1,1478 @@
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from .point_cloud_writer import PLY_VERTEX_DTYPE, PCD_POINT_DTYPE, pack_point_cloud, save_point_cloud
+from .frame_pipeline import FramePipeline
+from .svo2_processor import plan_shards, SVO2Processor, empty_depth_stats
+from .svo2_preview import view_needs_depth
+from .depth_store import DepthStore, load_depth_frame, load_depth_index
+from .depth_codecs import DEPTH_ENCODING_EXTENSIONS, encode_depth, write_depth, load_depth, lz4
+from .image_codecs import LOSSLESS_PROFILES, encode_image, write_image
+from .sensor_writer import truncate_sensor_file, IMU_DTYPE, SensorWriter, merge_sensor_files, read_sensor_rows
+from .models import SVO2Upload, ExtractionJob, ExtractedFile, FileProgress, UploadSession
+from .manifest import ManifestWriter, read_manifest, MANIFEST_FILENAME, trim_manifest
+from .tasks import register_manifest, start_extraction, recover_stale_jobs, ensure_content_hash, extract_file
+from .progress import ProgressReporter, get_cached_progress, set_job_units, _aggregate, TaskSuperseded
+from .checkpoint import WrittenFrames, read_checkpoint, write_checkpoint
+from .extraction_cache import ExtractionCache, frame_product, link_file
+from .zip_stream import archive_members, stream_zip
+from .preview_pool import PreviewPool
+from .preview_cache import PreviewFrameCache, PreviewPrefetcher, preview_key
+from .svo_metadata import read_svo_metadata
+from unittest import skipIf, mock
+from celery.backends.base import DisabledBackend
+from zed_svo_processing.celery import app as celery_app
+from datetime import timedelta
+from email.parser import BytesParser
+from email import policy
+from types import SimpleNamespace
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import cv2
+import numpy as np
+import pyzed.sl as sl
 
-# Create your tests here.
+
+class TempDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+
+def zed_point_cloud(xyz, rgb):
+    """(H, W, 4) XYZRGBA array as the ZED SDK returns it, colour bytes packed into the 4th float"""
+    rgba = rgb[..., 0].astype(np.uint32) | (rgb[..., 1].astype(np.uint32) << 8) | (rgb[..., 2].astype(np.uint32) << 16)
+    rgba |= np.uint32(255) << 24
+    return np.concatenate([xyz.astype(np.float32), rgba.view(np.float32)[..., None]], axis=-1)
+
+
+class PointCloudWriterTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.xyz = rng.uniform(-5, 5, (4, 6, 3)).astype(np.float32)
+        self.rgb = rng.integers(0, 256, (4, 6, 3)).astype(np.uint8)
+        self.xyz[0, 0] = np.nan
+        self.xyz[1, 2, 2] = np.inf
+        self.cloud = zed_point_cloud(self.xyz, self.rgb)
+        valid = np.isfinite(self.xyz).all(axis=-1).ravel()
+        self.expected_xyz = self.xyz.reshape(-1, 3)[valid]
+        self.expected_rgb = self.rgb.reshape(-1, 3)[valid]
+
+    def read_ply_header(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        header, body = data.split(b'end_header\n', 1)
+        return header.decode('ascii'), body
+
+    def test_pack_filters_invalid_points(self):
+        vertices = pack_point_cloud(self.cloud)
+        self.assertEqual(len(vertices), 22)
+        np.testing.assert_array_equal(np.column_stack([vertices['x'], vertices['y'], vertices['z']]), self.expected_xyz)
+        np.testing.assert_array_equal(np.column_stack([vertices['red'], vertices['green'], vertices['blue']]), self.expected_rgb)
+
+    def test_binary_ply_round_trip(self):
+        path = os.path.join(self.dir, 'cloud.ply')
+        self.assertEqual(save_point_cloud(self.cloud, path, 'ply_binary'), 22)
+        header, body = self.read_ply_header(path)
+        self.assertIn('format binary_little_endian 1.0', header)
+        self.assertIn('element vertex 22', header)
+        vertices = np.frombuffer(body, dtype=PLY_VERTEX_DTYPE)
+        np.testing.assert_array_equal(np.column_stack([vertices['x'], vertices['y'], vertices['z']]), self.expected_xyz)
+        np.testing.assert_array_equal(np.column_stack([vertices['red'], vertices['green'], vertices['blue']]), self.expected_rgb)
+
+    def test_ascii_ply_round_trip(self):
+        path = os.path.join(self.dir, 'cloud.ply')
+        save_point_cloud(self.cloud, path, 'ply_ascii')
+        header, body = self.read_ply_header(path)
+        self.assertIn('format ascii 1.0', header)
+        rows = np.loadtxt(io.StringIO(body.decode('ascii')), ndmin=2)
+        np.testing.assert_allclose(rows[:, :3], self.expected_xyz, rtol=1e-6)
+        np.testing.assert_array_equal(rows[:, 3:].astype(np.uint8), self.expected_rgb)
+
+    def test_pcd_round_trip(self):
+        path = os.path.join(self.dir, 'cloud.pcd')
+        save_point_cloud(self.cloud, path, 'pcd')
+        with open(path, 'rb') as f:
+            data = f.read()
+        header, body = data.split(b'DATA binary\n', 1)
+        self.assertIn(b'POINTS 22\n', header)
+        points = np.frombuffer(body, dtype=PCD_POINT_DTYPE)
+        np.testing.assert_array_equal(np.column_stack([points['x'], points['y'], points['z']]), self.expected_xyz)
+        rgb = np.column_stack([(points['rgb'] >> 16) & 0xFF, (points['rgb'] >> 8) & 0xFF, points['rgb'] & 0xFF])
+        np.testing.assert_array_equal(rgb, self.expected_rgb)
+
+    def test_npz_round_trip(self):
+        path = os.path.join(self.dir, 'cloud.npz')
+        save_point_cloud(self.cloud, path, 'npz')
+        with np.load(path) as data:
+            np.testing.assert_array_equal(data['xyz'], self.expected_xyz)
+            np.testing.assert_array_equal(data['rgb'], self.expected_rgb)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            save_point_cloud(self.cloud, os.path.join(self.dir, 'cloud.xyz'), 'xyz')
+
+
+class FramePipelineTests(SimpleTestCase):
+    def test_runs_every_submitted_write(self):
+        done = []
+        pipeline = FramePipeline(num_workers=3, queue_depth=2)
+        for frame in range(20):
+            pipeline.submit(done.append, frame)
+        pipeline.close()
+        self.assertEqual(sorted(done), list(range(20)))
+
+    def test_worker_error_reaches_the_grab_loop(self):
+        def fail(frame):
+            raise ValueError(f'cannot write frame {frame}')
+
+        pipeline = FramePipeline(num_workers=1, queue_depth=1)
+        pipeline.submit(fail, 3)
+        with self.assertRaisesRegex(ValueError, 'frame 3'):
+            pipeline.close()
+
+    def test_submit_blocks_at_queue_depth(self):
+        release = threading.Event()
+        pipeline = FramePipeline(num_workers=2, queue_depth=2)
+        pipeline.submit(release.wait)
+        pipeline.submit(release.wait)
+
+        blocked = threading.Thread(target=pipeline.submit, args=(release.wait,))
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+
+        release.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        pipeline.close()
+
+
+class PlanShardsTests(SimpleTestCase):
+    def test_even_split(self):
+        self.assertEqual(plan_shards(0, 30, 1, 3), [(0, 10, 0), (10, 20, 10), (20, 30, 20)])
+
+    def test_split_follows_frame_step(self):
+        shards = plan_shards(5, 30, 3, 3)
+        self.assertEqual(shards, [(5, 14, 0), (14, 23, 3), (23, 30, 6)])
+        frames = [frame for start, end, _ in shards for frame in range(start, end, 3)]
+        self.assertEqual(frames, list(range(5, 30, 3)))
+
+    def test_never_more_shards_than_frames(self):
+        self.assertEqual(plan_shards(0, 2, 1, 8), [(0, 1, 0), (1, 2, 1)])
+        self.assertEqual(plan_shards(0, 10, 1, 0), [(0, 10, 0)])
+
+
+class FakeSVOCamera:
+    """Frame positions of an SVO as the SDK reports them
+
+    seek_errors holds how far off target each seek lands (0 once used up).
+    """
+
+    def __init__(self, frame_count=30, seek_errors=()):
+        self.frame_count = frame_count
+        self.seek_errors = list(seek_errors)
+        self.next_frame = 0
+        self.position = -1
+        self.grabs = 0
+        self.seeks = []
+
+    def set_svo_position(self, frame):
+        self.seeks.append(frame)
+        self.next_frame = frame + (self.seek_errors.pop(0) if self.seek_errors else 0)
+
+    def grab(self, runtime_params=None):
+        if self.next_frame >= self.frame_count:
+            return sl.ERROR_CODE.END_OF_SVOFILE_REACHED
+        self.position = self.next_frame
+        self.next_frame += 1
+        self.grabs += 1
+        return sl.ERROR_CODE.SUCCESS
+
+    def get_svo_position(self):
+        return self.position
+
+
+def processor_with_camera(camera):
+    """SVO2Processor around a fake camera, without opening an SVO"""
+    processor = SVO2Processor.__new__(SVO2Processor)
+    processor.camera = camera
+    return processor
+
+
+class GrabAtTests(SimpleTestCase):
+    def test_small_gaps_are_grabbed_through(self):
+        camera = FakeSVOCamera()
+        self.assertTrue(processor_with_camera(camera)._grab_at(3, 0, False, 'run', 'skip'))
+        self.assertEqual((camera.position, camera.grabs, camera.seeks), (3, 4, []))
+
+    def test_large_steps_seek(self):
+        camera = FakeSVOCamera()
+        camera.grab()
+        self.assertTrue(processor_with_camera(camera)._grab_at(20, 1, True, 'run', 'skip'))
+        self.assertEqual((camera.position, camera.grabs, camera.seeks), (20, 2, [20]))
+
+    def test_seek_landing_off_target_is_retried(self):
+        camera = FakeSVOCamera(seek_errors=[1])
+        self.assertTrue(processor_with_camera(camera)._grab_at(20, 0, True, 'run', 'skip'))
+        self.assertEqual((camera.position, camera.seeks), (20, [20, 20]))
+
+    def test_seek_that_never_lands_raises(self):
+        camera = FakeSVOCamera(seek_errors=[2, 2])
+        with self.assertRaisesRegex(Exception, 'landed on frame 22, expected 20'):
+            processor_with_camera(camera)._grab_at(20, 0, True, 'run', 'skip')
+
+    def test_end_of_file(self):
+        camera = FakeSVOCamera()
+        self.assertFalse(processor_with_camera(camera)._grab_at(40, 0, True, 'run', 'skip'))
+
+
+class DepthFreeGrabTests(SimpleTestCase):
+    def test_depth_engine_only_for_depth_products(self):
+        processor = SVO2Processor.__new__(SVO2Processor)
+        processor.options = {'extract_rgb_left': True, 'extract_rgb_right': True, 'extract_imu': True}
+        self.assertFalse(processor.needs_depth())
+        processor.options['extract_normals'] = True
+        self.assertTrue(processor.needs_depth())
+
+    def test_preview_views_needing_depth(self):
+        self.assertFalse(view_needs_depth('rgb_left'))
+        self.assertFalse(view_needs_depth('rgb_right'))
+        self.assertTrue(view_needs_depth('depth'))
+
+
+class DepthStoreTests(TempDirMixin, SimpleTestCase):
+    def test_write_and_read_frames(self):
+        store = DepthStore(self.dir, 4, 3, 5)
+        frame = np.arange(15, dtype=np.float32).reshape(3, 5)
+        store.write(2, frame, svo_frame=40, timestamp_ns=123)
+        store.close()
+
+        np.testing.assert_array_equal(load_depth_frame(store.store_path, 2), frame)
+        index = load_depth_index(store.store_path)
+        self.assertEqual(index['svo_frame'].tolist(), [-1, -1, 40, -1])
+        self.assertEqual(int(index['timestamp_ns'][2]), 123)
+
+    def test_existing_store_is_reused(self):
+        store = DepthStore(self.dir, 4, 3, 5)
+        store.write(0, np.ones((3, 5), dtype=np.float32), svo_frame=0)
+        store.close()
+
+        # A shard or resumed run opens the same store without clearing it
+        reopened = DepthStore(self.dir, 4, 3, 5)
+        reopened.write(1, np.full((3, 5), 2, dtype=np.float32), svo_frame=1)
+        reopened.close()
+        self.assertEqual(load_depth_index(store.store_path)['svo_frame'].tolist(), [0, 1, -1, -1])
+        np.testing.assert_array_equal(load_depth_frame(store.store_path, 0), np.ones((3, 5)))
+
+    def test_mismatched_store_is_replaced(self):
+        DepthStore(self.dir, 4, 3, 5).close()
+        store = DepthStore(self.dir, 4, 3, 5, dtype=np.float16)
+        store.close()
+        self.assertEqual(np.load(store.store_path, mmap_mode='r').dtype, np.float16)
+
+
+class DepthCodecTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.depth = np.random.default_rng(1).uniform(0.3, 20.0, (12, 16)).astype(np.float32)
+        self.depth[0, :4] = np.nan
+        self.depth[5, 5] = np.inf
+
+    def round_trip(self, encoding):
+        path, encoded_bytes, _ = write_depth(self.depth, os.path.join(self.dir, 'frame_000000'), encoding)
+        self.assertTrue(path.endswith(DEPTH_ENCODING_EXTENSIONS[encoding]))
+        self.assertEqual(os.path.getsize(path), encoded_bytes)
+        loaded = load_depth(path)
+        self.assertEqual(loaded.dtype, np.float32)
+        self.assertEqual(loaded.shape, self.depth.shape)
+        return loaded
+
+    def assert_invalid_is_nan(self, loaded):
+        self.assertTrue(np.isnan(loaded[0, :4]).all())
+        self.assertTrue(np.isnan(loaded[5, 5]))
+
+    def test_float32_npy_is_exact(self):
+        np.testing.assert_array_equal(self.round_trip('float32_npy'), self.depth)
+
+    def test_float16_npy(self):
+        loaded = self.round_trip('float16_npy')
+        finite = np.isfinite(self.depth)
+        np.testing.assert_allclose(loaded[finite], self.depth[finite], atol=0.02)
+        self.assertTrue(np.isnan(loaded[0, :4]).all())
+
+    def test_uint16_png_keeps_millimetres(self):
+        loaded = self.round_trip('uint16_png')
+        finite = np.isfinite(self.depth)
+        np.testing.assert_allclose(loaded[finite], self.depth[finite], atol=0.0005)
+        self.assert_invalid_is_nan(loaded)
+
+    def test_npz_zlib(self):
+        loaded = self.round_trip('npz_zlib')
+        finite = np.isfinite(self.depth)
+        np.testing.assert_array_equal(loaded[finite], self.depth[finite])
+        self.assert_invalid_is_nan(loaded)
+
+    @skipIf(lz4 is None, 'lz4 is not installed')
+    def test_npy_lz4(self):
+        loaded = self.round_trip('npy_lz4')
+        finite = np.isfinite(self.depth)
+        np.testing.assert_array_equal(loaded[finite], self.depth[finite])
+        self.assert_invalid_is_nan(loaded)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            encode_depth(self.depth, 'bogus')
+
+
+class ImageCodecTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.image = np.random.default_rng(2).integers(0, 256, (16, 24, 3)).astype(np.uint8)
+
+    def test_lossless_profiles_round_trip(self):
+        for profile in LOSSLESS_PROFILES:
+            decoded = cv2.imdecode(encode_image(self.image, profile), cv2.IMREAD_UNCHANGED)
+            np.testing.assert_array_equal(decoded, self.image, err_msg=profile)
+
+    def test_write_uses_the_profile_extension(self):
+        path, encoded_bytes, _ = write_image(self.image, os.path.join(self.dir, 'frame_000000'), 'webp_90')
+        self.assertTrue(path.endswith('frame_000000.webp'))
+        self.assertEqual(os.path.getsize(path), encoded_bytes)
+
+
+class FakeIMU:
+    """Just enough of sl.IMUData for SensorWriter"""
+
+    def __init__(self, sample):
+        self.sample = sample
+        self.timestamp = mock.Mock(
+            get_nanoseconds=lambda: sample * 1_000_000, get_milliseconds=lambda: sample
+        )
+
+    def get_pose(self):
+        return mock.Mock(get_orientation=lambda: mock.Mock(get=lambda: [0.0, 0.0, 0.0, 1.0]))
+
+    def get_angular_velocity(self):
+        return [float(self.sample), 0.0, 0.0]
+
+    def get_linear_acceleration(self):
+        return [0.0, 0.0, 9.81]
+
+
+class SensorWriterTests(TempDirMixin, SimpleTestCase):
+    def write(self, name, fmt, frames, samples_per_frame=3, first_sample=0):
+        path = os.path.join(self.dir, f'{name}.{fmt}')
+        writer = SensorWriter(path, fmt, buffer_rows=4)
+        sample = first_sample
+        for frame in frames:
+            for _ in range(samples_per_frame):
+                self.assertTrue(writer.append_imu(frame, FakeIMU(sample)))
+                sample += 1
+        self.assertFalse(writer.append_imu(frames[-1], FakeIMU(sample - 1)))
+        self.assertEqual(writer.close(), len(frames) * samples_per_frame)
+        return path
+
+    def frames_of(self, path):
+        rows, total = read_sensor_rows(path)
+        self.assertEqual(len(rows), total)
+        return [int(row['frame']) for row in rows]
+
+    def test_npy_loads_with_numpy(self):
+        path = self.write('imu', 'npy', range(4))
+        data = np.load(path)
+        self.assertEqual(data.dtype, IMU_DTYPE)
+        self.assertEqual(data['timestamp'].tolist(), list(range(12)))
+
+    def test_merge_in_order(self):
+        for fmt in ('csv', 'npy'):
+            parts = [
+                self.write(f'part0_{fmt}', fmt, range(0, 2)),
+                self.write(f'part1_{fmt}', fmt, range(2, 5), first_sample=6),
+            ]
+            merged = os.path.join(self.dir, f'merged.{fmt}')
+            merge_sensor_files(parts, merged, fmt)
+            self.assertEqual(self.frames_of(merged), [f for f in range(5) for _ in range(3)])
+            self.assertFalse(any(os.path.exists(part) for part in parts))
+
+    def test_truncate_and_append(self):
+        for fmt in ('csv', 'npy'):
+            path = self.write(f'imu_{fmt}', fmt, range(5))
+            kept = truncate_sensor_file(path, fmt, 3)
+            self.assertEqual(kept, 9)
+
+            writer = SensorWriter(path, fmt, existing_rows=kept)
+            for sample in range(9, 15):
+                writer.append_imu(3 + (sample - 9) // 3, FakeIMU(sample))
+            self.assertEqual(writer.close(), 15)
+            self.assertEqual(self.frames_of(path), [f for f in range(5) for _ in range(3)])
+
+    def test_truncate_drops_torn_rows(self):
+        path = self.write('imu', 'csv', range(3))
+        with open(path, 'a') as f:
+            f.write('3,99,0.0')
+        self.assertEqual(truncate_sensor_file(path, 'csv', 10), 9)
+
+        # An interrupted .npy file still has its 0-row header
+        path = os.path.join(self.dir, 'torn.npy')
+        writer = SensorWriter(path, 'npy', buffer_rows=2)
+        for sample in range(5):
+            writer.append_imu(sample, FakeIMU(sample))
+        writer.file.close()
+        with open(path, 'ab') as f:
+            f.write(b'\0' * 7)
+        self.assertEqual(truncate_sensor_file(path, 'npy', 10), 4)
+        self.assertEqual(np.load(path)['frame'].tolist(), [0, 1, 2, 3])
+
+
+def create_job(files=1, **fields):
+    """ExtractionJob over `files` uploads (their SVO files are not on disk)"""
+    job = ExtractionJob.objects.create(**fields)
+    for index in range(files):
+        job.svo2_files.add(SVO2Upload.objects.create(
+            file=f'svo2_files/{index}.svo2', filename=f'{index}.svo2', file_size=1
+        ))
+    return job
+
+
+def file_record(frame_number, category='rgb_left'):
+    return {
+        'category': category, 'file_type': 'image', 'file_path': f'/out/{frame_number}',
+        'filename': str(frame_number), 'frame_number': frame_number, 'file_size': 1,
+    }
+
+
+class ManifestTests(TempDirMixin, TestCase):
+    def test_records_are_registered_in_batches(self):
+        path = os.path.join(self.dir, '.manifest.jsonl')
+        manifest = ManifestWriter(path)
+        for frame in range(5):
+            manifest.append(file_record(frame))
+        manifest.close()
+        self.assertEqual([record['frame_number'] for record in read_manifest(path)], [0, 1, 2, 3, 4])
+
+        job = create_job()
+        svo_file = job.svo2_files.get()
+        self.assertEqual(register_manifest(job, svo_file, path, batch_size=2), 5)
+        self.assertEqual(
+            sorted(ExtractedFile.objects.filter(job=job, svo2_file=svo_file).values_list('frame_number', flat=True)),
+            [0, 1, 2, 3, 4]
+        )
+
+
+class Clock:
+    """Stands in for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(PROGRESS_CACHE_INTERVAL=60, PROGRESS_CACHE_FRAMES=5, PROGRESS_DB_INTERVAL=60)
+class ProgressReporterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.clock = Clock()
+        patcher = mock.patch('processor.progress.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job = create_job(status='processing')
+        self.file_progress = FileProgress.objects.create(job=self.job, svo2_file=self.job.svo2_files.get())
+        set_job_units(self.job.id, {self.file_progress.id: 1})
+
+    def live(self):
+        return get_cached_progress(self.job.id)[str(self.file_progress.id)]
+
+    def test_cache_is_written_every_n_frames(self):
+        reporter = ProgressReporter(self.job.id, self.file_progress.id)
+        reporter.start(100, 100)
+        for frame in range(4):
+            reporter.update(frame + 1.0, frame)
+        self.assertEqual(self.live()['progress'], 0.0)
+        reporter.update(5.0, 4)
+        self.assertEqual(self.live()['progress'], 5.0)
+
+    def test_rows_are_saved_every_interval(self):
+        reporter = ProgressReporter(self.job.id, self.file_progress.id)
+        reporter.start(100, 100)
+        for frame in range(10):
+            reporter.update(frame + 1.0, frame)
+        self.assertEqual(FileProgress.objects.get(id=self.file_progress.id).progress, 0.0)
+
+        self.clock.now += 61
+        reporter.update(11.0, 10)
+        self.assertEqual(FileProgress.objects.get(id=self.file_progress.id).progress, 11.0)
+
+    def test_rate_and_eta(self):
+        reporter = ProgressReporter(self.job.id, self.file_progress.id)
+        reporter.start(100, 200)
+        self.clock.now += 10
+        reporter.update(25.0, 50)
+        reporter.publish()
+        self.assertEqual(self.live()['fps'], 5.0)
+        self.assertEqual(self.live()['eta_seconds'], 30.0)
+
+    def test_resumed_frames_are_not_in_the_rate(self):
+        reporter = ProgressReporter(self.job.id, self.file_progress.id)
+        reporter.start(100, 200, frames_done=150)
+        self.assertEqual(self.live()['progress'], 75.0)
+        self.clock.now += 10
+        reporter.update(80.0, 160)
+        reporter.publish()
+        self.assertEqual(self.live()['fps'], 1.0)
+        self.assertEqual(self.live()['eta_seconds'], 40.0)
+
+
+def stream_events(response):
+    """Decoded data of each SSE event a streaming response yields (comments skipped)"""
+    for chunk in response.streaming_content:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('event: progress'):
+            yield json.loads(chunk.split('data: ', 1)[1])
+
+
+@override_settings(PROGRESS_STREAM_INTERVAL=0, PROGRESS_STREAM_MAX_SECONDS=60)
+class ProgressStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.job = create_job(status='processing')
+        self.file_progress = FileProgress.objects.create(
+            job=self.job, svo2_file=self.job.svo2_files.get(), status='processing', total_frames=30
+        )
+
+    def test_stream_sends_changes_until_the_job_ends(self):
+        response = self.client.get(f'/job/{self.job.id}/progress/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        events = stream_events(response)
+
+        first = next(events)
+        self.assertEqual(first['status'], 'processing')
+        self.assertEqual(first['files'][0]['progress'], 0.0)
+
+        FileProgress.objects.filter(id=self.file_progress.id).update(progress=50.0, current_frame=15)
+        second = next(events)
+        self.assertNotIn('status', second)
+        self.assertEqual([(f['id'], f['progress']) for f in second['files']], [(self.file_progress.id, 50.0)])
+
+        ExtractionJob.objects.filter(id=self.job.id).update(status='completed', progress=100.0)
+        self.assertEqual(next(events)['status'], 'completed')
+        self.assertEqual(list(events), [])
+
+    def test_polling_fallback_sends_the_full_state(self):
+        stream = next(stream_events(self.client.get(f'/job/{self.job.id}/progress/stream/')))
+        self.assertEqual(self.client.get(f'/job/{self.job.id}/progress/').json(), stream)
+
+        page = self.client.get(f'/job/{self.job.id}/').content.decode()
+        self.assertIn(f'/job/{self.job.id}/progress/stream/', page)
+        self.assertIn(f'/job/{self.job.id}/progress/', page)
+
+
+class ProgressAggregateTests(SimpleTestCase):
+    def entry(self, status='processing', progress=0.0, frames_done=0, output_frames=10, fps=0.0, error=''):
+        return {
+            'status': status, 'progress': progress, 'current_frame': int(progress), 'total_frames': 100,
+            'error_message': error, 'frames_done': frames_done, 'output_frames': output_frames, 'fps': fps,
+        }
+
+    def test_running_shards_add_up(self):
+        live = _aggregate([
+            self.entry(progress=50.0, frames_done=5, fps=2.0),
+            self.entry(progress=30.0, frames_done=3, fps=3.0),
+        ], 2)
+        self.assertEqual(live['status'], 'processing')
+        self.assertEqual(live['progress'], 40.0)
+        self.assertEqual(live['fps'], 5.0)
+        self.assertAlmostEqual(live['eta_seconds'], 12 / 5.0)
+
+    def test_missing_units_have_no_eta(self):
+        live = _aggregate([self.entry(progress=50.0, frames_done=5, fps=2.0)], 2)
+        self.assertEqual(live['progress'], 25.0)
+        self.assertIsNone(live['eta_seconds'])
+
+    def test_completed_and_failed(self):
+        done = _aggregate([self.entry('completed', 100.0, 10), self.entry('completed', 100.0, 10)], 2)
+        self.assertEqual((done['status'], done['eta_seconds']), ('completed', 0))
+
+        failed = _aggregate([self.entry('completed', 100.0, 10), self.entry('failed', 20.0, error='boom')], 2)
+        self.assertEqual((failed['status'], failed['error_message']), ('failed', 'boom'))
+
+
+class EagerTaskMixin:
+    """Runs Celery tasks in the test process, without a result backend"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(type(celery_app), 'backend', DisabledBackend(celery_app))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class StubProcessor:
+    """Stands in for SVO2Processor: "extracts" an RGB record per frame of a 30-frame file"""
+
+    total_frames = 30
+
+    def __init__(self, svo_path, output_dir, options):
+        self.output_dir = output_dir
+        self.options = options
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest_path = os.path.join(output_dir, options.get('manifest_filename', MANIFEST_FILENAME))
+        self.cache = None
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_total_frames(self):
+        return self.total_frames
+
+    def get_frame_range(self):
+        return self.options['frame_start'], self.options['frame_end'] or self.total_frames, self.options['frame_step']
+
+    def get_output_frame_count(self):
+        return len(range(*self.get_frame_range()))
+
+    def resume_frame_count(self):
+        return 0
+
+    def process(self, progress_callback=None):
+        offset = self.options.get('frame_index_offset', 0)
+        frames = range(*self.get_frame_range())
+        manifest = ManifestWriter(self.manifest_path)
+        for index, frame in enumerate(frames):
+            manifest.append(file_record(offset + index))
+            if progress_callback:
+                progress_callback(100.0 * (index + 1) / len(frames), frame, self.total_frames)
+        manifest.close()
+        return len(frames)
+
+
+@mock.patch('processor.tasks.SVO2Processor', StubProcessor)
+class ExtractionTaskTests(EagerTaskMixin, TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        settings = override_settings(MEDIA_ROOT=self.dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def start(self, job):
+        """Run start_extraction; returns the chord's (header, finalize) signatures"""
+        with mock.patch('processor.tasks.chord') as chord:
+            start_extraction(job.id)
+        return chord.call_args.args[0], chord.return_value.call_args.args[0]
+
+    def run_chord(self, header, finalize):
+        for signature in header:
+            signature.apply()
+        finalize.apply()
+
+    def test_one_task_per_file(self):
+        job = create_job(files=2)
+        header, finalize = self.start(job)
+        self.assertEqual([signature.task for signature in header], ['processor.tasks.extract_file'] * 2)
+        self.assertEqual(finalize.task, 'processor.tasks.finalize_extraction')
+
+        for file_progress in job.file_progress.all():
+            self.assertIsNotNone(file_progress.dispatched_at)
+            self.assertEqual(file_progress.units_started, 0)
+
+        self.run_chord(header, finalize)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(list(job.file_progress.values_list('status', flat=True)), ['completed'] * 2)
+        self.assertEqual(list(job.file_progress.values_list('units_started', flat=True)), [1, 1])
+        for svo_file in job.svo2_files.all():
+            self.assertEqual(ExtractedFile.objects.filter(job=job, svo2_file=svo_file).count(), 30)
+
+    def test_shards_are_merged_by_finalize(self):
+        job = create_job(num_shards=3, frame_step=2)
+        header, finalize = self.start(job)
+        self.assertEqual([signature.task for signature in header], ['processor.tasks.extract_shard'] * 3)
+        self.assertEqual([signature.args[3:5] for signature in header], [(0, 10), (10, 20), (20, 30)])
+
+        self.run_chord(header, finalize)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.file_progress.get().status, 'completed')
+        self.assertEqual(job.file_progress.get().units_started, 3)
+        frames = ExtractedFile.objects.filter(job=job).order_by('frame_number').values_list('frame_number', flat=True)
+        self.assertEqual(list(frames), list(range(15)))
+
+    def test_failed_file_fails_the_job(self):
+        job = create_job(files=2)
+        header, finalize = self.start(job)
+        with mock.patch.object(StubProcessor, 'process', side_effect=Exception('corrupt SVO')):
+            header[0].apply()
+        header[1].apply()
+        finalize.apply()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('corrupt SVO', job.error_message)
+
+
+class ResumeTests(TempDirMixin, SimpleTestCase):
+    def test_trim_keeps_earlier_frames_only(self):
+        path = os.path.join(self.dir, '.manifest.jsonl')
+        manifest = ManifestWriter(path)
+        for frame in (0, 2, 1, 3, 4):
+            manifest.append(file_record(frame))
+        manifest.append(file_record(None, 'imu'))
+        manifest.close()
+        with open(path, 'a') as f:
+            f.write('{"category": "rgb_left", "frame_')
+
+        self.assertEqual(trim_manifest(path, 3), 3)
+        self.assertEqual([record['frame_number'] for record in read_manifest(path)], [0, 2, 1])
+
+        # Resumed runs continue the trimmed manifest
+        manifest = ManifestWriter(path, append=True)
+        manifest.append(file_record(3))
+        manifest.close()
+        self.assertEqual([record['frame_number'] for record in read_manifest(path)], [0, 2, 1, 3])
+
+    def test_written_frames_tracks_contiguous_prefix(self):
+        written = WrittenFrames(10)
+        written.mark(12)
+        written.mark(11)
+        self.assertEqual(written.next_index, 10)
+        written.mark(10)
+        self.assertEqual(written.next_index, 13)
+        written.mark(14)
+        self.assertEqual(written.next_index, 13)
+
+    def test_checkpoint_round_trip(self):
+        path = os.path.join(self.dir, '.checkpoint.json')
+        self.assertIsNone(read_checkpoint(path))
+        write_checkpoint(path, {'frames_done': 12, 'complete': False})
+        self.assertEqual(read_checkpoint(path), {'frames_done': 12, 'complete': False})
+        self.assertEqual(os.listdir(self.dir), ['.checkpoint.json'])
+
+        with open(path, 'w') as f:
+            f.write('{"frames_do')
+        self.assertIsNone(read_checkpoint(path))
+
+    def test_resume_frame_count(self):
+        processor = SVO2Processor.__new__(SVO2Processor)
+        processor.checkpoint_path = os.path.join(self.dir, '.checkpoint.json')
+        processor.options = {'resume': True}
+        self.assertEqual(processor.resume_frame_count(), 0)
+
+        write_checkpoint(processor.checkpoint_path, {'frames_done': 12, 'complete': False})
+        self.assertEqual(processor.resume_frame_count(), 12)
+        # Video output starts over, and so does a run that is not resuming
+        processor.options = {'resume': True, 'image_output': 'mp4'}
+        self.assertEqual(processor.resume_frame_count(), 0)
+        processor.options = {}
+        self.assertEqual(processor.resume_frame_count(), 0)
+
+
+@override_settings(STALE_JOB_SECONDS=600, MAX_JOB_RESUMES=2)
+@mock.patch('processor.tasks.start_extraction')
+class StaleJobTests(TestCase):
+    def create_job(self, heartbeat_age, **fields):
+        job = create_job(status='processing', **fields)
+        ExtractionJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_age))
+        return job
+
+    def test_stale_jobs_are_resumed_once(self, start_extraction):
+        stale = self.create_job(900)
+        self.create_job(60)
+
+        self.assertEqual(recover_stale_jobs(), [stale.id])
+        start_extraction.delay.assert_called_once_with(stale.id, resume=True)
+        self.assertEqual(ExtractionJob.objects.get(id=stale.id).resume_count, 1)
+
+        # Claimed: the next sweep sees a fresh heartbeat
+        self.assertEqual(recover_stale_jobs(), [])
+
+    def test_jobs_lost_too_often_fail(self, start_extraction):
+        job = self.create_job(900, resume_count=2)
+        self.assertEqual(recover_stale_jobs(), [])
+        start_extraction.delay.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('3 times', job.error_message)
+
+
+class ExtractionCacheTests(TempDirMixin, SimpleTestCase):
+    content_hash = 'ab' * 32
+
+    def job_output(self, job, data=None):
+        path = os.path.join(self.dir, job, 'frame_000007.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if data is not None:
+            with open(path, 'wb') as f:
+                f.write(data)
+        return path
+
+    def test_outputs_are_reused_by_other_jobs(self):
+        root = os.path.join(self.dir, 'cache')
+        first = ExtractionCache(root, self.content_hash)
+        first_output = self.job_output('job_1', b'jpeg')
+        self.assertFalse(first.fetch('rgb_left-jpeg_95', 40, 'jpg', first_output))
+        first.store('rgb_left-jpeg_95', 40, 'jpg', first_output)
+
+        second = ExtractionCache(root, self.content_hash)
+        second_output = self.job_output('job_2')
+        self.assertTrue(second.fetch('rgb_left-jpeg_95', 40, 'jpg', second_output))
+        self.assertTrue(os.path.samefile(first_output, second_output))
+        self.assertEqual((first.hits, first.misses, second.hits, second.misses), (0, 1, 1, 0))
+
+        # Entries are keyed by SVO frame and product
+        self.assertFalse(second.fetch('rgb_left-jpeg_95', 41, 'jpg', second_output))
+        self.assertFalse(ExtractionCache(root, 'cd' * 32).fetch('rgb_left-jpeg_95', 40, 'jpg', second_output))
+
+    def test_keys_name_the_options_that_change_bytes(self):
+        options = {'rgb_codec': 'webp_90', 'depth_mode': 'NEURAL', 'depth_encoding': 'uint16_png'}
+        self.assertEqual(frame_product('rgb_left', 'image', options), ('rgb_left-webp_90', 'webp'))
+        self.assertEqual(frame_product('depth', 'depth', options), ('depth_raw-uint16_png-NEURAL', 'depth.png'))
+        self.assertEqual(frame_product('depth', 'image', options)[0], 'depth-jpeg_95-NEURAL')
+
+
+class ContentHashTests(TempDirMixin, TestCase):
+    def upload(self, name, data):
+        with override_settings(MEDIA_ROOT=self.dir):
+            svo_file = SVO2Upload(filename=name, file_size=len(data))
+            svo_file.file.save(name, ContentFile(data))
+        return svo_file
+
+    def test_hash_is_stored_once(self):
+        with override_settings(MEDIA_ROOT=self.dir):
+            svo_file = self.upload('a.svo2', b'svo data')
+            self.assertEqual(ensure_content_hash(svo_file), hashlib.sha256(b'svo data').hexdigest())
+            self.assertEqual(SVO2Upload.objects.get(id=svo_file.id).content_hash, svo_file.content_hash)
+
+    def test_second_upload_of_same_content_shares_the_cache(self):
+        with override_settings(MEDIA_ROOT=self.dir):
+            first = self.upload('a.svo2', b'svo data')
+            second = self.upload('b.svo2', b'svo data')
+            # content_hash is unique, so only the first upload stores it
+            content_hash = ensure_content_hash(first)
+            self.assertEqual(ensure_content_hash(second), content_hash)
+            self.assertIsNone(SVO2Upload.objects.get(id=second.id).content_hash)
+
+
+class StreamZipTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.members = []
+        for name, data in (('frame_000000.jpg', b'\xff\xd8' + os.urandom(3000)), ('imu_data.csv', b'frame,timestamp\n' * 500)):
+            path = os.path.join(self.dir, name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.members.append((path, f'file_1_a/{name}'))
+
+    def archive(self, chunk_size=1024):
+        return zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(self.members, chunk_size))))
+
+    def test_readable_with_compression_per_type(self):
+        archive = self.archive()
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), ['file_1_a/frame_000000.jpg', 'file_1_a/imu_data.csv'])
+        self.assertEqual(archive.getinfo('file_1_a/frame_000000.jpg').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo('file_1_a/imu_data.csv').compress_type, zipfile.ZIP_DEFLATED)
+        for path, arcname in self.members:
+            with open(path, 'rb') as f:
+                self.assertEqual(archive.read(arcname), f.read())
+
+    def test_only_compressed_npz_files_are_stored(self):
+        arrays = {'xyz': np.zeros((500, 3), dtype=np.float32)}
+        np.savez(os.path.join(self.dir, 'frame_000000.npz'), **arrays)
+        np.savez_compressed(os.path.join(self.dir, 'frame_000001.npz'), **arrays)
+        self.members = [(os.path.join(self.dir, name), name) for name in ('frame_000000.npz', 'frame_000001.npz')]
+
+        archive = self.archive()
+        self.assertEqual(archive.getinfo('frame_000000.npz').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo('frame_000001.npz').compress_type, zipfile.ZIP_STORED)
+        self.assertIsNone(archive.testzip())
+
+    def test_zip64(self):
+        # Shrink the limits instead of writing 4 GB
+        with mock.patch.object(zipfile, 'ZIP64_LIMIT', 1000), mock.patch.object(zipfile, 'ZIP_FILECOUNT_LIMIT', 1):
+            data = b''.join(stream_zip(self.members))
+        self.assertIn(b'PK\x06\x06', data)  # ZIP64 end of central directory
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(len(archive.namelist()), 2)
+
+    def test_subset_selection(self):
+        base = os.path.join(self.dir, 'job_1')
+        for relative in (
+            'file_1_a/1_RGB_Left/frame_000000.jpg', 'file_1_a/1_RGB_Left/frame_000005.jpg',
+            'file_1_a/7_IMU/imu_data.csv', 'file_1_a/.manifest.jsonl', 'file_2_b/1_RGB_Left/frame_000000.jpg',
+        ):
+            os.makedirs(os.path.dirname(os.path.join(base, relative)), exist_ok=True)
+            open(os.path.join(base, relative), 'w').close()
+
+        self.assertEqual([arcname for _, arcname in archive_members(base, svo_file_ids={1}, frame_end=5)], [
+            'file_1_a/1_RGB_Left/frame_000000.jpg', 'file_1_a/7_IMU/imu_data.csv',
+        ])
+        self.assertEqual([arcname for _, arcname in archive_members(base, categories=['rgb_left'], frame_start=1)], [
+            'file_1_a/1_RGB_Left/frame_000005.jpg',
+        ])
+
+
+@mock.patch('processor.preview_pool.SVO2Preview')
+class PreviewPoolTests(SimpleTestCase):
+    def test_sessions_stay_open_between_requests(self, SVO2Preview):
+        pool = PreviewPool(max_open=4, idle_timeout=60)
+        for _ in range(3):
+            with pool.session(1, '/a.svo2', 'NONE') as preview:
+                self.assertIs(preview, SVO2Preview.return_value)
+        SVO2Preview.assert_called_once_with('/a.svo2')
+        preview.set_depth_mode.assert_called_once_with('NONE')
+        preview.open.assert_called_once_with()
+        preview.close.assert_not_called()
+
+    def test_depth_modes_get_their_own_session(self, SVO2Preview):
+        pool = PreviewPool(max_open=4, idle_timeout=60)
+        with pool.session(1, '/a.svo2', 'NONE'):
+            pass
+        with pool.session(1, '/a.svo2', 'ULTRA'):
+            pass
+        self.assertEqual(SVO2Preview.call_count, 2)
+        self.assertEqual([(s['file_id'], s['depth_mode']) for s in pool.stats()], [(1, 'NONE'), (1, 'ULTRA')])
+
+    def test_least_recently_used_idle_session_is_closed(self, SVO2Preview):
+        previews = [mock.Mock(), mock.Mock(), mock.Mock()]
+        SVO2Preview.side_effect = previews
+        pool = PreviewPool(max_open=2, idle_timeout=60)
+        for file_id in (1, 2, 1, 3):
+            with pool.session(file_id, f'/{file_id}.svo2'):
+                pass
+        previews[1].close.assert_called_once_with()
+        previews[0].close.assert_not_called()
+        self.assertEqual([s['file_id'] for s in pool.stats()], [1, 3])
+
+    def test_failed_session_is_not_reused(self, SVO2Preview):
+        previews = [mock.Mock(), mock.Mock()]
+        SVO2Preview.side_effect = previews
+        pool = PreviewPool(max_open=4, idle_timeout=60)
+        with self.assertRaises(ValueError):
+            with pool.session(1, '/a.svo2'):
+                raise ValueError('grab failed')
+        previews[0].close.assert_called_once_with()
+
+        with pool.session(1, '/a.svo2') as preview:
+            self.assertIs(preview, previews[1])
+
+    def test_discard_closes_a_files_sessions(self, SVO2Preview):
+        pool = PreviewPool(max_open=4, idle_timeout=60)
+        with pool.session(1, '/a.svo2'):
+            pass
+        pool.discard(1)
+        SVO2Preview.return_value.close.assert_called_once_with()
+        self.assertEqual(pool.stats(), [])
+
+
+class PreviewFrameCacheTests(SimpleTestCase):
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = PreviewFrameCache(max_bytes=250)
+        for frame in range(3):
+            cache.put((1, frame, 'rgb_left', 'NONE', 800), bytes(100))
+        self.assertIsNone(cache.get((1, 0, 'rgb_left', 'NONE', 800)))
+        self.assertIsNotNone(cache.get((1, 1, 'rgb_left', 'NONE', 800)))
+
+        # Frame 1 was just used, so frame 2 goes next
+        cache.put((1, 3, 'rgb_left', 'NONE', 800), bytes(100))
+        self.assertIsNone(cache.get((1, 2, 'rgb_left', 'NONE', 800)))
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['bytes'], stats['evictions']), (2, 200, 2))
+
+    def test_oversized_entry_is_not_kept(self):
+        cache = PreviewFrameCache(max_bytes=250)
+        cache.put((1, 0, 'depth', 'ULTRA', 800), bytes(100))
+        cache.put((1, 1, 'depth', 'ULTRA', 800), bytes(300))
+        self.assertIsNone(cache.get((1, 1, 'depth', 'ULTRA', 800)))
+        self.assertIsNotNone(cache.get((1, 0, 'depth', 'ULTRA', 800)))
+
+    def test_discard_file(self):
+        cache = PreviewFrameCache(max_bytes=1000)
+        cache.put((1, 0, 'rgb_left', 'NONE', 800), bytes(10))
+        cache.put((2, 0, 'rgb_left', 'NONE', 800), bytes(10))
+        cache.discard(1)
+        self.assertIsNone(cache.get((1, 0, 'rgb_left', 'NONE', 800)))
+        self.assertEqual(cache.stats()['bytes'], 10)
+
+
+def render_stub(file_id, svo_path, frame_number, view_types, depth_mode, max_width, wait=True):
+    return {view_type: f'{view_type}:{frame_number}'.encode() for view_type in view_types}
+
+
+class PreviewPrefetchTests(SimpleTestCase):
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, 'prefetch did not finish')
+            time.sleep(0.01)
+
+    @mock.patch('processor.preview_cache.render_previews', side_effect=render_stub)
+    def test_neighbours_are_rendered_in_the_background(self, render_previews):
+        cache = PreviewFrameCache(max_bytes=10000)
+        cache.put(preview_key(1, 11, 'rgb_left', 'ULTRA', 800), b'already cached')
+        prefetcher = PreviewPrefetcher(cache, frames=2)
+        prefetcher.schedule(1, '/a.svo2', 10, 30, ['rgb_left'], 'ULTRA', 800)
+
+        keys = [preview_key(1, frame, 'rgb_left', 'ULTRA', 800) for frame in (8, 9, 12)]
+        self.wait_for(lambda: all(cache.contains(key) for key in keys))
+        self.assertEqual(cache.get(keys[0]), b'rgb_left:8')
+        self.assertEqual(cache.get(preview_key(1, 11, 'rgb_left', 'ULTRA', 800)), b'already cached')
+        self.assertEqual(sorted(call.args[2] for call in render_previews.call_args_list), [8, 9, 12])
+        # Prefetching never queues behind a user request for the camera
+        self.assertTrue(all(call.kwargs['wait'] is False for call in render_previews.call_args_list))
+
+    @mock.patch('processor.preview_cache.render_previews', side_effect=render_stub)
+    def test_frames_outside_the_file_are_skipped(self, render_previews):
+        cache = PreviewFrameCache(max_bytes=10000)
+        PreviewPrefetcher(cache, frames=2).schedule(1, '/a.svo2', 0, 2, ['rgb_left'], 'NONE', 800)
+        self.wait_for(lambda: cache.contains(preview_key(1, 1, 'rgb_left', 'NONE', 800)))
+        self.assertEqual([call.args[2] for call in render_previews.call_args_list], [1])
+
+    @mock.patch('processor.preview_pool.SVO2Preview')
+    def test_busy_session_is_skipped_without_waiting(self, SVO2Preview):
+        pool = PreviewPool(max_open=4, idle_timeout=60)
+        with pool.session(1, '/a.svo2'):
+            with pool.session(1, '/a.svo2', wait=False) as busy:
+                self.assertIsNone(busy)
+
+
+@mock.patch('processor.views.preview_frame_count', return_value=30)
+@mock.patch('processor.views.get_preview_frame', return_value=(b'\xff\xd8jpeg', 5, 30))
+class PreviewImageTests(TestCase):
+    def setUp(self):
+        self.upload = SVO2Upload.objects.create(
+            file='svo2_files/a.svo2', filename='a.svo2', file_size=1, content_hash='a' * 64
+        )
+        self.url = f'/svo2/{self.upload.id}/preview/frame.jpg'
+
+    def test_jpeg_with_cache_validators(self, get_preview_frame, preview_frame_count):
+        response = self.client.get(self.url, {'frame': 5, 'view_type': 'rgb_left'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'\xff\xd8jpeg')
+        self.assertEqual((response['X-Frame-Index'], response['X-Total-Frames']), ('5', '30'))
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response['ETag'])
+
+    def test_revalidation_skips_rendering(self, get_preview_frame, preview_frame_count):
+        etag = self.client.get(self.url, {'frame': 5})['ETag']
+        response = self.client.get(self.url, {'frame': 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(get_preview_frame.call_count, 1)
+
+        # Other render parameters are other representations
+        for params in ({'frame': 6}, {'frame': 5, 'view_type': 'depth'}, {'frame': 5, 'width': 320}):
+            self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_invalid_frame(self, get_preview_frame, preview_frame_count):
+        self.assertEqual(self.client.get(self.url, {'frame': 'x'}).status_code, 400)
+        get_preview_frame.assert_not_called()
+
+    def test_unknown_view(self, get_preview_frame, preview_frame_count):
+        self.assertEqual(self.client.get(self.url, {'frame': 5, 'view_type': 'thermal'}).status_code, 400)
+        get_preview_frame.assert_not_called()
+
+    def test_out_of_range_frames_share_the_clamped_etag(self, get_preview_frame, preview_frame_count):
+        etag = self.client.get(self.url, {'frame': 29})['ETag']
+        self.assertEqual(self.client.get(self.url, {'frame': 999})['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, {'frame': 999}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+def multipart_parts(response):
+    """{part name: bytes} of a multipart/form-data response"""
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        f'Content-Type: {response["Content-Type"]}\r\n\r\n'.encode() + response.content
+    )
+    return {
+        part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+
+
+@mock.patch('processor.views.preview_frame_count', return_value=30)
+@mock.patch('processor.views.get_preview_views', return_value=({'rgb_left': b'left', 'depth': b'depth'}, 4, 30))
+class PreviewViewsTests(TestCase):
+    def setUp(self):
+        self.upload = SVO2Upload.objects.create(
+            file='svo2_files/a.svo2', filename='a.svo2', file_size=1, content_hash='a' * 64
+        )
+        self.url = f'/svo2/{self.upload.id}/preview/views/'
+
+    def test_views_are_parts_of_one_response(self, get_preview_views, preview_frame_count):
+        response = self.client.get(self.url, {'views': 'rgb_left,depth', 'frame': 4, 'depth_mode': 'NEURAL'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('multipart/form-data; boundary='))
+        self.assertEqual(multipart_parts(response), {'rgb_left': b'left', 'depth': b'depth'})
+        self.assertEqual((response['X-Frame-Index'], response['X-Total-Frames']), ('4', '30'))
+
+        args = get_preview_views.call_args.args
+        self.assertEqual((args[2], args[3], args[4]), (4, ['rgb_left', 'depth'], 'NEURAL'))
+
+    def test_unknown_view(self, get_preview_views, preview_frame_count):
+        response = self.client.get(self.url, {'views': 'rgb_left,thermal'})
+        self.assertEqual(response.status_code, 400)
+        get_preview_views.assert_not_called()
+
+    def test_revalidation_skips_rendering(self, get_preview_views, preview_frame_count):
+        etag = self.client.get(self.url, {'views': 'rgb_left,depth'})['ETag']
+        self.assertEqual(self.client.get(self.url, {'views': 'rgb_left,depth'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, {'views': 'rgb_left'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(get_preview_views.call_count, 2)
+
+
+class FakeRecording(FakeSVOCamera):
+    """FakeSVOCamera with the information and timestamps of a 30 fps ZED X recording"""
+
+    def get_svo_number_of_frames(self):
+        return self.frame_count
+
+    def get_timestamp(self, reference):
+        return SimpleNamespace(get_nanoseconds=lambda: 1_000_000_000 + self.position * 33_333_333)
+
+    def get_camera_information(self):
+        left = SimpleNamespace(fx=700.0, fy=701.0, cx=640.0, cy=360.0, disto=[0.1, 0.0], h_fov=90.0, v_fov=60.0)
+        calibration = SimpleNamespace(left_cam=left, right_cam=left, get_camera_baseline=lambda: 120.0)
+        return SimpleNamespace(
+            camera_configuration=SimpleNamespace(
+                resolution=SimpleNamespace(width=1920, height=1200), fps=30, calibration_parameters=calibration
+            ),
+            sensors_configuration=SimpleNamespace(
+                accelerometer_parameters=SimpleNamespace(is_available=True),
+                gyroscope_parameters=SimpleNamespace(is_available=True),
+                magnetometer_parameters=SimpleNamespace(is_available=False),
+                barometer_parameters=None,
+            ),
+            camera_model='ZED_X',
+            serial_number=41234567,
+        )
+
+
+class SVOMetadataTests(TestCase):
+    def test_metadata_of_an_open_camera(self):
+        metadata = read_svo_metadata(FakeRecording(frame_count=30))
+        self.assertEqual(metadata['total_frames'], 30)
+        self.assertEqual((metadata['width'], metadata['height'], metadata['fps']), (1920, 1200, 30.0))
+        self.assertEqual(metadata['first_timestamp_ns'], 1_000_000_000)
+        self.assertEqual(metadata['last_timestamp_ns'], 1_000_000_000 + 29 * 33_333_333)
+        self.assertEqual((metadata['camera_model'], metadata['camera_serial']), ('ZED_X', 41234567))
+        self.assertEqual(metadata['calibration']['left']['disto'], [0.1, 0.0])
+        self.assertEqual(metadata['calibration']['baseline'], 120.0)
+        self.assertEqual(metadata['sensors'], {
+            'accelerometer': True, 'gyroscope': True, 'magnetometer': False, 'barometer': False,
+        })
+
+        upload = SVO2Upload.objects.create(file='svo2_files/a.svo2', filename='a.svo2', file_size=1, **metadata)
+        self.assertAlmostEqual(upload.duration_seconds, 29 * 0.033333333)
+
+    def test_empty_recording(self):
+        metadata = read_svo_metadata(FakeRecording(frame_count=0))
+        self.assertIsNone(metadata['first_timestamp_ns'])
+        self.assertIsNone(metadata['last_timestamp_ns'])
+
+    @mock.patch('processor.preview_cache.preview_pool')
+    def test_indexed_upload_needs_no_camera(self, preview_pool):
+        upload = SVO2Upload.objects.create(
+            file='svo2_files/a.svo2', filename='a.svo2', file_size=1, metadata_indexed_at=timezone.now(),
+            **read_svo_metadata(FakeRecording(frame_count=30))
+        )
+        info = self.client.get(f'/svo2/{upload.id}/preview/info/').json()
+        self.assertTrue(info['success'])
+        self.assertEqual(info['total_frames'], 30)
+        self.assertEqual(info['metadata']['camera_serial'], 41234567)
+        preview_pool.session.assert_not_called()
+
+
+@mock.patch('processor.views.ingest_upload')
+class UploadTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(MEDIA_ROOT=self.dir, UPLOAD_TEMP_DIR=os.path.join(self.dir, 'upload_tmp'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.data = os.urandom(300000)
+
+    def start_session(self, filename='a.svo2'):
+        response = self.client.post('/upload/sessions/', {'filename': filename, 'size': len(self.data)})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Upload-Offset'], '0')
+        return response['Location']
+
+    def patch(self, url, offset, chunk):
+        return self.client.generic(
+            'PATCH', url, chunk, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def upload(self, filename='a.svo2'):
+        url = self.start_session(filename)
+        self.assertEqual(self.patch(url, 0, self.data).status_code, 204)
+        return url
+
+    def test_resumable_upload(self, ingest_upload):
+        url = self.start_session()
+        response = self.patch(url, 0, self.data[:100000])
+        self.assertEqual((response.status_code, response['Upload-Offset']), (204, '100000'))
+
+        # A retried chunk at a stale offset is refused with the offset to resume from
+        response = self.patch(url, 0, self.data[:100000])
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, '100000'))
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '100000')
+
+        self.assertEqual(self.patch(url, 100000, self.data[100000:] + b'x').status_code, 413)
+        response = self.patch(url, 100000, self.data[100000:])
+        self.assertEqual(response.status_code, 204)
+
+        upload = SVO2Upload.objects.get()
+        self.assertEqual(response['X-Upload-Id'], str(upload.id))
+        self.assertEqual(upload.content_hash, hashlib.sha256(self.data).hexdigest())
+        with open(upload.file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'upload_tmp')), [])
+        ingest_upload.delay.assert_called_once_with(upload.id)
+        self.assertEqual(self.patch(url, len(self.data), b'').status_code, 409)
+
+    def test_abort(self, ingest_upload):
+        url = self.start_session()
+        self.patch(url, 0, self.data[:10])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'upload_tmp')), [])
+
+    def test_complete_sends_the_uploads_to_configure(self, ingest_upload):
+        session_id = self.upload().rstrip('/').split('/')[-1]
+        response = self.client.post('/upload/complete/', {'sessions': [session_id]})
+        self.assertEqual(response.json()['redirect'], '/configure/')
+        self.assertEqual(self.client.session['uploaded_ids'], [SVO2Upload.objects.get().id])
+
+    def test_repeat_chunked_upload_is_deduplicated(self, ingest_upload):
+        first = self.upload('a.svo2')
+        second = self.upload('b.svo2')
+
+        upload = SVO2Upload.objects.get()
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'svo2_files')), ['a.svo2'])
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'upload_tmp')), [])
+        self.assertEqual(ingest_upload.delay.call_count, 1)
+
+        session = UploadSession.objects.get(id=second.rstrip('/').split('/')[-1])
+        self.assertEqual((session.upload_id, session.deduplicated), (upload.id, True))
+
+        response = self.client.post('/upload/complete/', {'sessions': [first.rstrip('/').split('/')[-1], str(session.id)]})
+        self.assertEqual(response.json()['bytes_saved'], len(self.data))
+        self.assertEqual(self.client.session['uploaded_ids'], [upload.id])
+
+    def test_repeat_form_upload_is_deduplicated(self, ingest_upload):
+        for name in ('a.svo2', 'b.svo2'):
+            response = self.client.post('/upload/', {'files': [SimpleUploadedFile(name, self.data)]})
+            self.assertEqual(response.status_code, 302)
+
+        upload = SVO2Upload.objects.get()
+        self.assertEqual(upload.content_hash, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'svo2_files')), ['a.svo2'])
+        self.assertEqual(ingest_upload.delay.call_count, 1)
+
+
+class ExtractionJobValidationTests(TestCase):
+    def assert_rejected(self, field, value):
+        with self.assertRaises(ValidationError) as raised:
+            ExtractionJob(**{field: value}).full_clean()
+        self.assertIn(field, raised.exception.message_dict)
+
+    def test_pipeline_limits(self):
+        ExtractionJob(writer_threads=64, queue_depth=256).full_clean()
+        for field, value in (('writer_threads', 0), ('writer_threads', 65), ('queue_depth', 0), ('queue_depth', 257)):
+            self.assert_rejected(field, value)
+
+    def test_shard_limits(self):
+        ExtractionJob(num_shards=64).full_clean()
+        for value in (0, -1, 65):
+            self.assert_rejected('num_shards', value)
+
+
+class FakeSensorCamera:
+    """Serves IMU samples 1, 2, 3... ms, one per get_sensors_data call"""
+
+    def __init__(self, image_ms):
+        self.image_ms = image_ms
+        self.sample = 0
+
+    def get_timestamp(self, reference):
+        return mock.Mock(get_nanoseconds=lambda: self.image_ms * 1_000_000)
+
+    def get_sensors_data(self, sensors_data, reference):
+        self.sample += 1
+        sensors_data.imu = FakeIMU(self.sample)
+        return sl.ERROR_CODE.SUCCESS
+
+
+class FullRateImuTests(TempDirMixin, SimpleTestCase):
+    def drain(self, image_ms):
+        processor = processor_with_camera(FakeSensorCamera(image_ms))
+        processor.svo_path = 'a.svo2'
+        processor.imu_truncated = False
+        writer = SensorWriter(os.path.join(self.dir, 'imu.csv'), 'csv')
+        sensors_data = mock.Mock(get_imu_data=lambda: sensors_data.imu)
+        processor._drain_imu(writer, 0, sensors_data)
+        writer.close()
+        rows, _ = read_sensor_rows(writer.path)
+        return processor, [int(row['timestamp']) for row in rows]
+
+    def test_samples_up_to_the_image_are_written(self):
+        processor, timestamps = self.drain(image_ms=5)
+        self.assertEqual(timestamps, [1, 2, 3, 4, 5])
+        self.assertFalse(processor.imu_truncated)
+
+    def test_cap_is_reported(self):
+        with mock.patch('processor.svo2_processor.MAX_IMU_SAMPLES_PER_GRAB', 3):
+            processor, timestamps = self.drain(image_ms=5)
+        self.assertEqual(timestamps, [1, 2, 3])
+        self.assertTrue(processor.imu_truncated)
+
+
+@mock.patch('processor.tasks.SVO2Processor', StubProcessor)
+class TaskOwnershipTests(EagerTaskMixin, TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        settings = override_settings(MEDIA_ROOT=self.dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.job = create_job(status='processing')
+        self.file_progress = FileProgress.objects.create(
+            job=self.job, svo2_file=self.job.svo2_files.get(), status='processing', task_ids={'0': 'current'}
+        )
+
+    def test_superseded_task_exits(self):
+        extract_file.apply(args=(self.job.id, self.file_progress.id), task_id='previous-run')
+        self.assertEqual(FileProgress.objects.get(id=self.file_progress.id).status, 'processing')
+        self.assertEqual(FileProgress.objects.get(id=self.file_progress.id).units_started, 0)
+        self.assertFalse(ExtractedFile.objects.exists())
+
+        extract_file.apply(args=(self.job.id, self.file_progress.id), task_id='current')
+        self.assertEqual(FileProgress.objects.get(id=self.file_progress.id).status, 'completed')
+        self.assertEqual(ExtractedFile.objects.count(), 30)
+
+    def test_heartbeat_stops_a_task_that_lost_its_unit(self):
+        reporter = ProgressReporter(self.job.id, self.file_progress.id, task_id='current')
+        reporter.heartbeat()
+        FileProgress.objects.filter(id=self.file_progress.id).update(task_ids={'0': 'resumed'})
+        with self.assertRaises(TaskSuperseded):
+            reporter.heartbeat()
+
+
+class CheckpointDepthStatsTests(TempDirMixin, SimpleTestCase):
+    def test_only_written_frames_are_counted(self):
+        processor = SVO2Processor.__new__(SVO2Processor)
+        processor.options = {}
+        processor.records_lock = threading.Lock()
+        processor.checkpoint_path = os.path.join(self.dir, '.checkpoint.json')
+        processor.depth_stats = empty_depth_stats()
+        processor.checkpointed_depth_stats = empty_depth_stats()
+        processor.uncheckpointed_depth_stats = {}
+        processor.depth_store = None
+        processor.manifest = mock.Mock()
+        processor.written = WrittenFrames()
+        for frame_index in (0, 1, 3):
+            processor._add_depth_stats(frame_index, 100, 10, 0.5)
+            processor.written.mark(frame_index)
+
+        processor._save_checkpoint(None)
+        checkpoint = read_checkpoint(processor.checkpoint_path)
+        self.assertEqual(checkpoint['frames_done'], 2)
+        self.assertEqual(checkpoint['depth_stats']['frames'], 2)
+        self.assertEqual(checkpoint['depth_stats']['raw_bytes'], 200)
+
+        processor._add_depth_stats(2, 100, 10, 0.5)
+        processor.written.mark(2)
+        processor._save_checkpoint(None)
+        self.assertEqual(read_checkpoint(processor.checkpoint_path)['depth_stats']['frames'], 4)
+
+
+class LinkedOutputTests(TempDirMixin, SimpleTestCase):
+    def test_rewriting_an_output_leaves_its_links_alone(self):
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        entry, _, _ = write_image(image, os.path.join(self.dir, 'cached'), 'png_fast')
+        output = os.path.join(self.dir, 'frame_000000.png')
+        link_file(entry, output)
+        with open(entry, 'rb') as f:
+            cached = f.read()
+
+        write_image(image + 255, os.path.join(self.dir, 'frame_000000'), 'png_fast')
+        with open(entry, 'rb') as f:
+            self.assertEqual(f.read(), cached)
+        self.assertFalse(os.path.samefile(entry, output))
+
+        depth_entry, _, _ = write_depth(np.ones((4, 4), dtype=np.float32), os.path.join(self.dir, 'cached_depth'), 'float32_npy')
+        depth_output = os.path.join(self.dir, 'frame_000000.npy')
+        link_file(depth_entry, depth_output)
+        write_depth(np.zeros((4, 4), dtype=np.float32), os.path.join(self.dir, 'frame_000000'), 'float32_npy')
+        np.testing.assert_array_equal(np.load(depth_entry), np.ones((4, 4)))
+        self.assertEqual([name for name in os.listdir(self.dir) if name.endswith('.tmp')], [])
+
+
+class ConfigurePageTests(TestCase):
+    def test_filmstrip_scrubber(self):
+        indexed = SVO2Upload.objects.create(
+            file='svo2_files/a.svo2', filename='a.svo2', file_size=1, total_frames=300,
+            filmstrip='svo2_previews/1_filmstrip.jpg', filmstrip_frames=[0, 100, 200]
+        )
+        plain = SVO2Upload.objects.create(file='svo2_files/b.svo2', filename='b.svo2', file_size=1)
+        session = self.client.session
+        session['uploaded_ids'] = [indexed.id, plain.id]
+        session.save()
+
+        page = self.client.get('/configure/').content.decode()
+        self.assertEqual(page.count('data-filmstrip-url='), 1)
+        self.assertIn(f'/svo2/{indexed.id}/preview/filmstrip.jpg', page)
+
+
+@override_settings(STALE_JOB_SECONDS=600, MAX_QUEUED_SECONDS=3600)
+@mock.patch('processor.tasks.start_extraction')
+class QueuedUnitTests(TestCase):
+    def create_job(self, dispatched_age, units_started, units=2):
+        """Stale job with one file split into `units` tasks, `units_started` of them picked up"""
+        job = create_job(status='processing')
+        ExtractionJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=900))
+        FileProgress.objects.create(
+            job=job, svo2_file=job.svo2_files.get(), status='processing',
+            task_ids={str(unit): f'task-{unit}' for unit in range(units)}, units_started=units_started,
+            dispatched_at=timezone.now() - timedelta(seconds=dispatched_age)
+        )
+        return job
+
+    def test_queued_units_keep_the_job_alive(self, start_extraction):
+        job = self.create_job(900, units_started=1)
+        self.assertEqual(recover_stale_jobs(), [])
+        start_extraction.delay.assert_not_called()
+        self.assertGreater(ExtractionJob.objects.get(id=job.id).heartbeat_at, timezone.now() - timedelta(seconds=60))
+
+    def test_units_queued_too_long_are_resumed(self, start_extraction):
+        job = self.create_job(7200, units_started=0)
+        self.assertEqual(recover_stale_jobs(), [job.id])
+        start_extraction.delay.assert_called_once_with(job.id, resume=True)
+
+    def test_started_units_that_went_quiet_are_resumed(self, start_extraction):
+        job = self.create_job(900, units_started=2)
+        self.assertEqual(recover_stale_jobs(), [job.id])
+
+    def test_finishing_a_unit_gives_finalize_a_fresh_window(self, start_extraction):
+        job = self.create_job(900, units_started=2)
+        ProgressReporter(job.id, job.file_progress.get().id, task_id='task-0').finish('completed')
+        self.assertEqual(recover_stale_jobs(), [])
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+# Quality of the stored thumbnail and filmstrip JPEGs
+PREVIEW_JPEG_QUALITY = 85
+
+
+def _encode_jpeg(img_rgb):
+    ok, buffer = cv2.imencode('.jpg', cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR),
+                              [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
+    if not ok:
+        raise Exception('Failed to encode preview image')
+    return buffer.tobytes()
+
+
+def render_upload_previews(preview, filmstrip_frames, tile_width, thumbnail_width):
+    """(thumbnail JPEG, filmstrip JPEG, filmstrip frame numbers) from an open SVO2Preview
+
+    The thumbnail is the left image of the middle frame; the filmstrip is a
+    horizontal sprite of evenly spaced left images, tile_width wide each,
+    in the order of the returned frame numbers. Open the preview with depth
+    mode NONE: only left images are grabbed.
+    """
+    total_frames = preview.get_total_frames()
+    if total_frames <= 0:
+        raise Exception('SVO2 file has no frames')
+
+    frames = sorted(set(np.linspace(0, total_frames - 1, min(filmstrip_frames, total_frames)).astype(int).tolist()))
+    tiles, tile_frames = [], []
+    for frame_number in frames:
+        tile = preview.render_image(frame_number, 'rgb_left', max_width=tile_width)
+        if tile is not None:
+            tiles.append(tile)
+            tile_frames.append(frame_number)
+
+    thumbnail = preview.render_image(total_frames // 2, 'rgb_left', max_width=thumbnail_width)
+    if thumbnail is None or not tiles:
+        raise Exception('Failed to grab preview frames')
+    return _encode_jpeg(thumbnail), _encode_jpeg(np.hstack(tiles)), tile_frames
@@ -4,17 +4,35 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('upload/', views.upload_files, name='upload_files'),
+    path('upload/sessions/', views.create_upload_session, name='create_upload_session'),
+    path('upload/sessions/<uuid:session_id>/', views.upload_session, name='upload_session'),
+    path('upload/complete/', views.complete_uploads, name='complete_uploads'),
     path('configure/', views.configure_extraction, name='configure_extraction'),
     path('jobs/', views.job_list, name='job_list'),
     path('job/<int:job_id>/', views.job_status, name='job_status'),
     path('job/<int:job_id>/progress/', views.job_progress, name='job_progress'),
+    path('job/<int:job_id>/progress/stream/', views.job_progress_stream, name='job_progress_stream'),
     path('job/<int:job_id>/download/', views.download_results, name='download_results'),
     path('job/<int:job_id>/delete/', views.delete_job, name='delete_job'),
     path('job/<int:job_id>/rerun/', views.rerun_job, name='rerun_job'),
+    path('job/<int:job_id>/resume/', views.resume_job, name='resume_job'),
+    
+    # SVO2 previews (served from pooled camera sessions)
+    path('svo2/<int:file_id>/preview/info/', views.preview_svo2_info, name='preview_svo2_info'),
+    path('svo2/<int:file_id>/preview/frame/', views.preview_svo2_frame, name='preview_svo2_frame'),
+    path('svo2/<int:file_id>/preview/imu/', views.preview_svo2_imu, name='preview_svo2_imu'),
+    path('svo2/<int:file_id>/preview/thumbnail/', views.preview_svo2_thumbnail, name='preview_svo2_thumbnail'),
+    path('svo2/<int:file_id>/preview/frame.jpg', views.preview_svo2_frame_image, name='preview_svo2_frame_image'),
+    path('svo2/<int:file_id>/preview/thumbnail.jpg', views.preview_svo2_thumbnail_image, name='preview_svo2_thumbnail_image'),
+    path('svo2/<int:file_id>/preview/filmstrip.jpg', views.preview_svo2_filmstrip, name='preview_svo2_filmstrip'),
+    path('svo2/<int:file_id>/preview/views/', views.preview_svo2_views, name='preview_svo2_views'),
+    path('svo2/preview/stats/', views.preview_stats, name='preview_stats'),
     
     # File browsing
     path('job/<int:job_id>/browse/', views.browse_files, name='browse_files'),
     path('job/<int:job_id>/gallery/<str:category>/', views.gallery_view, name='gallery_view'),
     path('file/<int:file_id>/view/', views.view_file, name='view_file'),
     path('file/<int:file_id>/serve/', views.serve_extracted_file, name='serve_extracted_file'),
+    path('file/<int:file_id>/depth-frame/', views.depth_store_frame, name='depth_store_frame'),
+    path('file/<int:file_id>/video-frame/', views.video_frame, name='video_frame'),
 ]
\ No newline at end of file
@@ -0,0 +1,85 @@
+import csv
+import os
+import cv2
+
+# FourCCs tried in order per container; H.264 needs an FFmpeg build with an
+# encoder for it, MPEG-4 Part 2 is available in every OpenCV build
+VIDEO_FOURCCS = {
+    'mp4': ('avc1', 'mp4v'),
+    'mkv': ('XVID', 'mp4v'),
+}
+
+FRAME_TABLE_FIELDS = ['video_frame', 'frame_index', 'svo_frame', 'timestamp_ns']
+
+
+class VideoStream:
+    """One image stream written as a video file plus a frame -> timestamp table
+
+    The writer opens on the first frame (its size fixes the video size).
+    Frames must be appended in order from a single thread.
+    """
+
+    def __init__(self, video_path, container, fps):
+        self.video_path = video_path
+        self.table_path = frame_table_path(video_path)
+        self.container = container
+        self.fps = fps
+        self.writer = None
+        self.frame_count = 0
+        self.table_file = open(self.table_path, 'w', newline='')
+        self.table = csv.writer(self.table_file)
+        self.table.writerow(FRAME_TABLE_FIELDS)
+
+    def _open_writer(self, width, height):
+        for fourcc in VIDEO_FOURCCS[self.container]:
+            writer = cv2.VideoWriter(
+                self.video_path, cv2.VideoWriter_fourcc(*fourcc), self.fps, (width, height)
+            )
+            if writer.isOpened():
+                return writer
+            writer.release()
+        raise Exception(f"No usable video codec for {self.video_path}")
+
+    def append(self, image, frame_index, svo_frame, timestamp_ns):
+        """Append a BGR (or single-channel) uint8 image"""
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        if self.writer is None:
+            self.writer = self._open_writer(image.shape[1], image.shape[0])
+
+        self.writer.write(image)
+        self.table.writerow([self.frame_count, frame_index, svo_frame, timestamp_ns])
+        self.frame_count += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+        self.table_file.close()
+
+
+def frame_table_path(video_path):
+    """Sidecar CSV mapping video frames to output/SVO frames and timestamps"""
+    stem = video_path.rsplit('.', 1)[0]
+    return f'{stem}_frames.csv'
+
+
+def read_frame_table(table_path):
+    """Rows of a frame table as dicts of strings, in video frame order"""
+    if not os.path.exists(table_path):
+        return []
+    with open(table_path, 'r', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def read_video_frame(video_path, video_frame):
+    """Decode a single frame of a video file, or None past the end"""
+    capture = cv2.VideoCapture(video_path)
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, video_frame)
+        ok, image = capture.read()
+        return image if ok else None
+    finally:
+        capture.release()
@@ -1,16 +1,41 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, FileResponse, HttpResponse
-from django.views.decorators.http import require_http_methods
-from .models import SVO2Upload, ExtractionJob, ExtractionResult, FileProgress
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods, condition
+from django.urls import reverse
+from django.template.defaultfilters import filesizeformat
+from django.core.files.storage import default_storage
+from .models import SVO2Upload, ExtractionJob, ExtractionResult, FileProgress, UploadSession
 from .forms import ExtractionOptionsForm
-from .tasks import process_svo2_files_sync
-from .svo2_preview import SVO2Preview
+from .tasks import start_extraction, ingest_upload
+from .svo2_preview import DEFAULT_PREVIEW_WIDTH, PREVIEW_VIEWS, DEFAULT_PREVIEW_VIEWS
+from .preview_pool import preview_pool
+from .preview_cache import (
+    preview_cache, preview_key, preview_frame_count, get_preview_frame, get_preview_views, get_preview_thumbnail,
+    discard_previews
+)
+from .progress import get_cached_progress
+from .zip_stream import archive_members, stream_zip
+from .chunked_upload import (
+    UploadBusy, locked_upload, upload_hasher, keep_hasher, forget_hasher, write_chunk, publish_upload
+)
 from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Sum
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import timedelta
 import os
 import shutil
-import threading
 import json
+import time
+import base64
+import hashlib
+import secrets
+
+# Bounds of the width a preview frame may be requested at
+PREVIEW_MIN_WIDTH = 64
+PREVIEW_MAX_WIDTH = 1920
 
 def home(request):
     """Home page with upload form"""
@@ -26,22 +51,45 @@ def upload_files(request):
             return redirect('home')
         
         uploaded_ids = []
+        bytes_saved = 0
         for file in files:
             # Validate file extension
             if not file.name.endswith('.svo2'):
                 messages.warning(request, f'{file.name} is not an SVO2 file, skipped')
                 continue
             
+            # Content already stored: reuse its record (and metadata, previews and cached outputs)
+            content_hash = getattr(file, 'sha256', None)
+            existing = _upload_with_content(content_hash)
+            if existing:
+                uploaded_ids.append(existing.id)
+                bytes_saved += file.size
+                continue
+            
             # Create upload record
-            svo2_upload = SVO2Upload.objects.create(
+            svo2_upload = SVO2Upload(
                 file=file,
                 filename=file.name,
-                file_size=file.size
+                file_size=file.size,
+                content_hash=content_hash
             )
+            try:
+                with transaction.atomic():
+                    svo2_upload.save()
+            except IntegrityError:
+                # The same content finished uploading meanwhile
+                svo2_upload.file.delete(save=False)
+                uploaded_ids.append(_upload_with_content(content_hash).id)
+                bytes_saved += file.size
+                continue
             uploaded_ids.append(svo2_upload.id)
+            # Metadata, thumbnail and filmstrip are read in the background
+            ingest_upload.delay(svo2_upload.id)
         
         if uploaded_ids:
             messages.success(request, f'Successfully uploaded {len(uploaded_ids)} file(s)')
+            if bytes_saved:
+                messages.info(request, _dedup_message(bytes_saved))
             # Store uploaded IDs in session for next step
             request.session['uploaded_ids'] = uploaded_ids
             return redirect('configure_extraction')
@@ -49,7 +97,179 @@ def upload_files(request):
             messages.error(request, 'No valid SVO2 files uploaded')
             return redirect('home')
     
-    return render(request, 'processor/upload.html')
+    return render(request, 'processor/upload.html', {'chunk_size': settings.UPLOAD_CHUNK_SIZE})
+
+def _upload_with_content(content_hash):
+    """The upload already holding this content, if any"""
+    if not content_hash:
+        return None
+    return SVO2Upload.objects.filter(content_hash=content_hash).first()
+
+def _dedup_message(bytes_saved):
+    return f'Some files were already uploaded and were not stored again ({filesizeformat(bytes_saved)} saved)'
+
+def _upload_headers(response, session):
+    """tus-style offset headers of an upload session"""
+    response['Upload-Offset'] = session.offset
+    response['Upload-Length'] = session.file_size
+    response['Cache-Control'] = 'no-store'
+    if session.upload_id:
+        response['X-Upload-Id'] = session.upload_id
+    return response
+
+def _expire_upload_sessions():
+    """Drop unfinished upload sessions untouched for UPLOAD_SESSION_EXPIRY_SECONDS"""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_EXPIRY_SECONDS)
+    for session in UploadSession.objects.filter(status='uploading', updated_at__lt=cutoff):
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+        forget_hasher(session.id)
+        session.delete()
+
+@require_http_methods(["POST"])
+def create_upload_session(request):
+    """Start a chunked upload of one file (filename and size as form fields)
+
+    Returns 201 with the session URL in Location. The file is then sent
+    with PATCH requests carrying Upload-Offset; HEAD returns the offset to
+    resume from after a dropped connection.
+    """
+    filename = os.path.basename(request.POST.get('filename', ''))
+    try:
+        file_size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid file size'}, status=400)
+    
+    if not filename.endswith('.svo2'):
+        return JsonResponse({'success': False, 'error': f'{filename} is not an SVO2 file'}, status=400)
+    if file_size <= 0:
+        return JsonResponse({'success': False, 'error': 'File is empty'}, status=400)
+    
+    _expire_upload_sessions()
+    
+    session = UploadSession(filename=filename, file_size=file_size)
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    session.temp_path = os.path.join(settings.UPLOAD_TEMP_DIR, f'{session.id}.part')
+    open(session.temp_path, 'wb').close()
+    session.save()
+    
+    url = reverse('upload_session', args=[session.id])
+    response = _upload_headers(JsonResponse({'success': True, 'url': url, 'offset': 0}, status=201), session)
+    response['Location'] = url
+    return response
+
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def upload_session(request, session_id):
+    """HEAD: current offset. PATCH: append bytes at Upload-Offset. DELETE: abort the upload"""
+    session = get_object_or_404(UploadSession, id=session_id)
+    
+    if request.method == 'HEAD':
+        return _upload_headers(HttpResponse(), session)
+    
+    if request.method == 'DELETE':
+        if session.status != 'uploading':
+            return HttpResponse('Upload already completed', status=409)
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+        forget_hasher(session.id)
+        session.delete()
+        return HttpResponse(status=204)
+    
+    if session.status != 'uploading':
+        return _upload_headers(HttpResponse('Upload already completed', status=409), session)
+    if request.content_type != 'application/offset+octet-stream':
+        return HttpResponse('Expected Content-Type: application/offset+octet-stream', status=415)
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        content_length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return HttpResponse('Upload-Offset and Content-Length are required', status=400)
+    if content_length > session.file_size - offset:
+        return HttpResponse('Chunk exceeds the declared upload length', status=413)
+    
+    try:
+        with locked_upload(session.temp_path) as temp_file:
+            session.refresh_from_db()
+            if offset != session.offset:
+                return _upload_headers(HttpResponse('Upload-Offset does not match', status=409), session)
+            
+            hasher = upload_hasher(session.id, temp_file, offset)
+            try:
+                written = write_chunk(temp_file, offset, request, content_length, hasher)
+            except Exception as e:
+                # Keep what arrived before the connection dropped; the client resumes from there
+                written = getattr(e, 'written_before_error', 0)
+            
+            session.offset = offset + written
+            if session.offset < session.file_size:
+                session.save(update_fields=['offset', 'updated_at'])
+                keep_hasher(session.id, session.offset, hasher)
+                return _upload_headers(HttpResponse(status=204), session)
+            
+            # Last chunk: reuse the upload already holding this content, or publish
+            # the file and its upload record together
+            content_hash = hasher.hexdigest()
+            existing = _upload_with_content(content_hash)
+            if existing is None:
+                storage_name = publish_upload(session.temp_path, session.filename)
+                try:
+                    with transaction.atomic():
+                        session.upload = SVO2Upload.objects.create(
+                            file=storage_name,
+                            filename=session.filename,
+                            file_size=session.file_size,
+                            content_hash=content_hash
+                        )
+                        session.status = 'completed'
+                        session.save()
+                except IntegrityError:
+                    # The same content finished uploading meanwhile
+                    default_storage.delete(storage_name)
+                    existing = _upload_with_content(content_hash)
+                except Exception:
+                    # Put the data back so the last chunk can be retried
+                    os.replace(default_storage.path(storage_name), session.temp_path)
+                    raise
+            
+            if existing is not None:
+                if os.path.exists(session.temp_path):
+                    os.remove(session.temp_path)
+                session.upload = existing
+                session.status = 'completed'
+                session.deduplicated = True
+                session.save()
+                return _upload_headers(HttpResponse(status=204), session)
+    except UploadBusy:
+        return _upload_headers(HttpResponse('Another request is uploading this file', status=409), session)
+    except FileNotFoundError:
+        return HttpResponse('Upload data is missing, start a new upload', status=410)
+    
+    ingest_upload.delay(session.upload_id)
+    return _upload_headers(HttpResponse(status=204), session)
+
+@require_http_methods(["POST"])
+def complete_uploads(request):
+    """Continue to configuration with the uploads finished through upload sessions"""
+    try:
+        sessions = list(UploadSession.objects.filter(id__in=request.POST.getlist('sessions'), status='completed'))
+    except ValidationError:
+        return JsonResponse({'success': False, 'error': 'Invalid upload session'}, status=400)
+    uploaded_ids = list(dict.fromkeys(session.upload_id for session in sessions if session.upload_id))
+    bytes_saved = sum(session.file_size for session in sessions if session.deduplicated)
+    
+    if not uploaded_ids:
+        return JsonResponse({'success': False, 'error': 'No valid SVO2 files uploaded'}, status=400)
+    
+    messages.success(request, f'Successfully uploaded {len(uploaded_ids)} file(s)')
+    if bytes_saved:
+        messages.info(request, _dedup_message(bytes_saved))
+    request.session['uploaded_ids'] = uploaded_ids
+    return JsonResponse({
+        'success': True,
+        'redirect': reverse('configure_extraction'),
+        'deduplicated': sum(1 for session in sessions if session.deduplicated),
+        'bytes_saved': bytes_saved
+    })
 
 def configure_extraction(request):
     """Configure extraction options for uploaded files"""
@@ -80,6 +300,19 @@ def configure_extraction(request):
                 'frame_start': rerun_job.frame_start,
                 'frame_end': rerun_job.frame_end,
                 'frame_step': rerun_job.frame_step,
+                'point_cloud_format': rerun_job.point_cloud_format,
+                'depth_storage': rerun_job.depth_storage,
+                'depth_encoding': rerun_job.depth_encoding,
+                'image_output': rerun_job.image_output,
+                'rgb_codec': rerun_job.rgb_codec,
+                'depth_image_codec': rerun_job.depth_image_codec,
+                'confidence_codec': rerun_job.confidence_codec,
+                'normals_codec': rerun_job.normals_codec,
+                'imu_rate': rerun_job.imu_rate,
+                'imu_format': rerun_job.imu_format,
+                'writer_threads': rerun_job.writer_threads,
+                'queue_depth': rerun_job.queue_depth,
+                'num_shards': rerun_job.num_shards,
             }
             messages.info(request, f'Reconfiguring settings from Job #{rerun_job_id}')
         except ExtractionJob.DoesNotExist:
@@ -98,10 +331,8 @@ def configure_extraction(request):
             # Clear session
             del request.session['uploaded_ids']
             
-            # Start processing in background thread
-            thread = threading.Thread(target=process_svo2_files_sync, args=(job.id,))
-            thread.daemon = True
-            thread.start()
+            # Queue processing on the Celery worker
+            start_extraction.delay(job.id)
             
             messages.success(request, f'Extraction job #{job.id} started')
             return redirect('job_status', job_id=job.id)
@@ -131,22 +362,141 @@ def rerun_job(request, job_id):
     messages.info(request, f'Rerunning Job #{job_id} - Modify settings as needed')
     return redirect(f'/configure/?rerun_job={job_id}')
 
+@require_http_methods(["POST"])
+def resume_job(request, job_id):
+    """Continue a failed job from its checkpoints, keeping the files already extracted"""
+    job = get_object_or_404(ExtractionJob, id=job_id)
+    
+    if job.status != 'failed':
+        messages.error(request, f'Only failed jobs can be resumed (Job #{job_id} is {job.status})')
+        return redirect('job_status', job_id=job_id)
+    
+    start_extraction.delay(job.id, resume=True)
+    
+    messages.success(request, f'Resuming Job #{job_id}')
+    return redirect('job_status', job_id=job_id)
+
+def _clamp_frame(frame_number, total_frames):
+    return max(0, min(frame_number, total_frames - 1))
+
+def _clamp_width(width):
+    """Requested preview width, within PREVIEW_MIN_WIDTH..PREVIEW_MAX_WIDTH"""
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        return DEFAULT_PREVIEW_WIDTH
+    return max(PREVIEW_MIN_WIDTH, min(width, PREVIEW_MAX_WIDTH))
+
+def _preview_params(request):
+    """(frame, view_type, depth_mode, width) of a preview frame request"""
+    frame_number = int(request.GET.get('frame', 0))
+    view_type = request.GET.get('view_type', 'rgb_left')
+    depth_mode = request.GET.get('depth_mode', 'ULTRA')
+    if depth_mode not in dict(ExtractionJob.DEPTH_MODE_CHOICES):
+        depth_mode = 'ULTRA'
+    return frame_number, view_type, depth_mode, _clamp_width(request.GET.get('width'))
+
+def _preview_etag(svo_file, *params):
+    """ETag of a rendered preview: the file's content plus the render parameters"""
+    version = svo_file.content_hash
+    if not version:
+        try:
+            stat = os.stat(svo_file.file.path)
+        except OSError:
+            return None
+        version = f'{stat.st_size}-{stat.st_mtime_ns}'
+    return hashlib.sha1(repr((version,) + params).encode()).hexdigest()[:32]
+
+def _etag_frame(svo_file, frame_number):
+    """Requested frame clamped to the file like the render path does, or None if it cannot be opened"""
+    try:
+        total_frames = preview_frame_count(svo_file.id, svo_file.file.path, total_frames=svo_file.total_frames)
+    except Exception:
+        return None
+    return _clamp_frame(frame_number, total_frames)
+
+def _frame_image_etag(request, file_id):
+    svo_file = SVO2Upload.objects.filter(id=file_id).first()
+    if svo_file is None:
+        return None
+    try:
+        frame_number, view_type, depth_mode, max_width = _preview_params(request)
+    except ValueError:
+        return None
+    frame_number = _etag_frame(svo_file, frame_number)
+    if frame_number is None:
+        return None
+    return _preview_etag(svo_file, *preview_key(None, frame_number, view_type, depth_mode, max_width))
+
+def _preview_view_types(request):
+    """Views requested as ?views=rgb_left,depth,... (defaults to DEFAULT_PREVIEW_VIEWS)"""
+    views = [view for view in request.GET.get('views', '').split(',') if view]
+    return list(dict.fromkeys(views)) or list(DEFAULT_PREVIEW_VIEWS)
+
+def _views_image_etag(request, file_id):
+    svo_file = SVO2Upload.objects.filter(id=file_id).first()
+    if svo_file is None:
+        return None
+    try:
+        frame_number, _, depth_mode, max_width = _preview_params(request)
+    except ValueError:
+        return None
+    frame_number = _etag_frame(svo_file, frame_number)
+    if frame_number is None:
+        return None
+    view_types = _preview_view_types(request)
+    keys = [preview_key(None, frame_number, view_type, depth_mode, max_width) for view_type in view_types]
+    return _preview_etag(svo_file, 'views', *keys)
+
+def _thumbnail_image_etag(request, file_id):
+    svo_file = SVO2Upload.objects.filter(id=file_id).first()
+    if svo_file is None:
+        return None
+    if _use_stored_thumbnail(request, svo_file):
+        return _preview_etag(svo_file, 'thumbnail', svo_file.thumbnail.name)
+    return _preview_etag(svo_file, 'thumbnail', _clamp_width(request.GET.get('width')))
+
+def _filmstrip_image_etag(request, file_id):
+    svo_file = SVO2Upload.objects.filter(id=file_id).first()
+    if svo_file is None or not svo_file.filmstrip:
+        return None
+    return _preview_etag(svo_file, 'filmstrip', svo_file.filmstrip.name)
+
+def _use_stored_thumbnail(request, svo_file):
+    """Whether the thumbnail rendered at upload answers the request (no explicit width)"""
+    return bool(svo_file.thumbnail) and 'width' not in request.GET
+
+def _read_stored_preview(field):
+    """Bytes of a stored thumbnail/filmstrip, or None if it is missing on disk"""
+    try:
+        with field.open('rb') as f:
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+def _image_response(jpeg, frame_number=None):
+    """JPEG preview response; browsers revalidate with the ETag once max-age expires"""
+    response = HttpResponse(jpeg, content_type='image/jpeg')
+    response['Cache-Control'] = f'private, max-age={settings.PREVIEW_IMAGE_MAX_AGE}'
+    if frame_number is not None:
+        response['X-Frame-Index'] = frame_number
+    return response
+
 def preview_svo2_info(request, file_id):
-    """Get SVO2 file information (total frames, etc.)"""
+    """Get SVO2 file information (total frames, etc.); indexed uploads need no camera"""
     svo_file = get_object_or_404(SVO2Upload, id=file_id)
     
     try:
-        preview = SVO2Preview(svo_file.file.path)
-        preview.open()
-        
-        total_frames = preview.get_total_frames()
-        
-        preview.close()
+        total_frames = preview_frame_count(svo_file.id, svo_file.file.path, total_frames=svo_file.total_frames)
         
         return JsonResponse({
             'success': True,
             'filename': svo_file.filename,
-            'total_frames': total_frames
+            'total_frames': total_frames,
+            'thumbnail_url': reverse('preview_svo2_thumbnail_image', args=[svo_file.id]) if svo_file.thumbnail else None,
+            'filmstrip_url': reverse('preview_svo2_filmstrip', args=[svo_file.id]) if svo_file.filmstrip else None,
+            'filmstrip_frames': svo_file.filmstrip_frames,
+            'metadata': _svo_metadata(svo_file)
         })
     except Exception as e:
         return JsonResponse({
@@ -154,31 +504,35 @@ def preview_svo2_info(request, file_id):
             'error': str(e)
         })
 
+def _svo_metadata(svo_file):
+    """Indexed recording metadata of an upload, or None until ingest has read it"""
+    if svo_file.metadata_indexed_at is None:
+        return None
+    return {
+        'resolution': [svo_file.width, svo_file.height],
+        'fps': svo_file.fps,
+        'first_timestamp_ns': svo_file.first_timestamp_ns,
+        'last_timestamp_ns': svo_file.last_timestamp_ns,
+        'duration_seconds': svo_file.duration_seconds,
+        'camera_model': svo_file.camera_model,
+        'camera_serial': svo_file.camera_serial,
+        'calibration': svo_file.calibration,
+        'sensors': svo_file.sensors,
+    }
+
 def preview_svo2_frame(request, file_id):
     """Get a specific frame from SVO2 file with different view types"""
     svo_file = get_object_or_404(SVO2Upload, id=file_id)
-    frame_number = int(request.GET.get('frame', 0))
-    view_type = request.GET.get('view_type', 'rgb_left')
-    depth_mode = request.GET.get('depth_mode', 'ULTRA')
+    frame_number, view_type, depth_mode, max_width = _preview_params(request)
     
     try:
-        preview = SVO2Preview(svo_file.file.path)
-        preview.set_depth_mode(depth_mode)
-        preview.open()
-        
-        total_frames = preview.get_total_frames()
-        
-        # Ensure frame number is valid
-        if frame_number >= total_frames:
-            frame_number = total_frames - 1
-        if frame_number < 0:
-            frame_number = 0
-        
-        img_base64 = preview.get_frame(frame_number, view_type, depth_mode)
-        
-        preview.close()
+        jpeg, frame_number, total_frames = get_preview_frame(
+            svo_file.id, svo_file.file.path, frame_number, view_type, depth_mode, max_width,
+            total_frames=svo_file.total_frames
+        )
         
-        if img_base64:
+        if jpeg:
+            img_base64 = base64.b64encode(jpeg).decode('utf-8')
             return JsonResponse({
                 'success': True,
                 'image': f'data:image/jpeg;base64,{img_base64}',
@@ -198,25 +552,132 @@ def preview_svo2_frame(request, file_id):
             'error': str(e)
         })
 
+@condition(etag_func=_frame_image_etag)
+def preview_svo2_frame_image(request, file_id):
+    """A frame of an SVO2 file as image/jpeg (same parameters as preview_svo2_frame)
+
+    The clamped frame index and frame count are sent as X-Frame-Index and
+    X-Total-Frames headers.
+    """
+    svo_file = get_object_or_404(SVO2Upload, id=file_id)
+    try:
+        frame_number, view_type, depth_mode, max_width = _preview_params(request)
+    except ValueError:
+        return HttpResponse('Invalid frame', status=400)
+    if view_type not in PREVIEW_VIEWS:
+        return HttpResponse(f'Unknown view type: {view_type}', status=400)
+    
+    try:
+        jpeg, frame_number, total_frames = get_preview_frame(
+            svo_file.id, svo_file.file.path, frame_number, view_type, depth_mode, max_width,
+            total_frames=svo_file.total_frames
+        )
+    except Exception as e:
+        return HttpResponse(str(e), status=500)
+    
+    if not jpeg:
+        return HttpResponse('Failed to retrieve frame', status=500)
+    
+    response = _image_response(jpeg, frame_number)
+    response['X-Total-Frames'] = total_frames
+    return response
+
+@condition(etag_func=_views_image_etag)
+def preview_svo2_views(request, file_id):
+    """Several views of one frame, rendered from a single grab, as multipart/form-data
+
+    Takes ?views=rgb_left,depth,... plus the frame, depth_mode and width
+    parameters of preview_svo2_frame. Each view is a JPEG part named after
+    it, so browsers can read them with `(await fetch(url)).formData()`.
+    """
+    svo_file = get_object_or_404(SVO2Upload, id=file_id)
+    view_types = _preview_view_types(request)
+    unknown = [view for view in view_types if view not in PREVIEW_VIEWS]
+    if unknown:
+        return HttpResponse(f'Unknown view type: {", ".join(unknown)}', status=400)
+    try:
+        frame_number, _, depth_mode, max_width = _preview_params(request)
+    except ValueError:
+        return HttpResponse('Invalid frame', status=400)
+    
+    try:
+        images, frame_number, total_frames = get_preview_views(
+            svo_file.id, svo_file.file.path, frame_number, view_types, depth_mode, max_width,
+            total_frames=svo_file.total_frames
+        )
+    except Exception as e:
+        return HttpResponse(str(e), status=500)
+    
+    if not any(images.values()):
+        return HttpResponse('Failed to retrieve frame', status=500)
+    
+    boundary = secrets.token_hex(16)
+    body = []
+    for view_type, jpeg in images.items():
+        if not jpeg:
+            continue
+        body.append(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{view_type}"; filename="{view_type}.jpg"\r\n'
+            f'Content-Type: image/jpeg\r\n\r\n'.encode()
+        )
+        body += [jpeg, b'\r\n']
+    body.append(f'--{boundary}--\r\n'.encode())
+    
+    response = HttpResponse(b''.join(body), content_type=f'multipart/form-data; boundary={boundary}')
+    response['Cache-Control'] = f'private, max-age={settings.PREVIEW_IMAGE_MAX_AGE}'
+    response['X-Frame-Index'] = frame_number
+    response['X-Total-Frames'] = total_frames
+    return response
+
+@condition(etag_func=_thumbnail_image_etag)
+def preview_svo2_thumbnail_image(request, file_id):
+    """Thumbnail of an SVO2 file (left image of the middle frame) as image/jpeg"""
+    svo_file = get_object_or_404(SVO2Upload, id=file_id)
+    max_width = _clamp_width(request.GET.get('width'))
+    
+    if _use_stored_thumbnail(request, svo_file):
+        jpeg = _read_stored_preview(svo_file.thumbnail)
+        if jpeg:
+            return _image_response(jpeg)
+    
+    try:
+        jpeg, frame_number = get_preview_thumbnail(svo_file.id, svo_file.file.path, max_width, svo_file.total_frames)
+    except Exception as e:
+        return HttpResponse(str(e), status=500)
+    
+    if not jpeg:
+        return HttpResponse('Failed to generate thumbnail', status=500)
+    return _image_response(jpeg, frame_number)
+
+@condition(etag_func=_filmstrip_image_etag)
+def preview_svo2_filmstrip(request, file_id):
+    """Filmstrip sprite rendered at upload: tiles side by side, SVO frames in X-Filmstrip-Frames"""
+    svo_file = get_object_or_404(SVO2Upload, id=file_id)
+    jpeg = _read_stored_preview(svo_file.filmstrip) if svo_file.filmstrip else None
+    if not jpeg:
+        return HttpResponse('Filmstrip not generated yet', status=404)
+    
+    response = _image_response(jpeg)
+    response['X-Filmstrip-Frames'] = ','.join(str(frame) for frame in svo_file.filmstrip_frames)
+    return response
+
+def preview_stats(request):
+    """Preview frame cache counters and open camera sessions of this web process"""
+    return JsonResponse({
+        'frame_cache': preview_cache.stats(),
+        'sessions': preview_pool.stats(),
+    })
+
 def preview_svo2_imu(request, file_id):
     """Get IMU data for a specific frame"""
     svo_file = get_object_or_404(SVO2Upload, id=file_id)
     frame_number = int(request.GET.get('frame', 0))
     
     try:
-        preview = SVO2Preview(svo_file.file.path)
-        preview.open()
-        
-        total_frames = preview.get_total_frames()
-        
-        if frame_number >= total_frames:
-            frame_number = total_frames - 1
-        if frame_number < 0:
-            frame_number = 0
-        
-        imu_data = preview.get_imu_data(frame_number)
-        
-        preview.close()
+        with preview_pool.session(svo_file.id, svo_file.file.path) as preview:
+            frame_number = _clamp_frame(frame_number, svo_file.total_frames or preview.get_total_frames())
+            imu_data = preview.get_imu_data(frame_number)
         
         if imu_data:
             return JsonResponse({
@@ -240,14 +701,14 @@ def preview_svo2_thumbnail(request, file_id):
     svo_file = get_object_or_404(SVO2Upload, id=file_id)
     
     try:
-        preview = SVO2Preview(svo_file.file.path)
-        preview.open()
-        
-        img_base64 = preview.get_thumbnail()
-        
-        preview.close()
+        jpeg = _read_stored_preview(svo_file.thumbnail) if svo_file.thumbnail else None
+        if not jpeg:
+            jpeg, _ = get_preview_thumbnail(
+                svo_file.id, svo_file.file.path, DEFAULT_PREVIEW_WIDTH, svo_file.total_frames
+            )
         
-        if img_base64:
+        if jpeg:
+            img_base64 = base64.b64encode(jpeg).decode('utf-8')
             return JsonResponse({
                 'success': True,
                 'image': f'data:image/jpeg;base64,{img_base64}'
@@ -267,48 +728,151 @@ def job_status(request, job_id):
     """View job status and results"""
     job = get_object_or_404(ExtractionJob, id=job_id)
     file_progress = job.file_progress.all()
+    
+    # Outputs reused from the extraction cache across all files
+    cache = file_progress.aggregate(hits=Sum('cache_hits'), misses=Sum('cache_misses'))
+    lookups = (cache['hits'] or 0) + (cache['misses'] or 0)
+    cache['rate'] = 100.0 * cache['hits'] / lookups if lookups else None
+    
     return render(request, 'processor/job_status.html', {
         'job': job,
-        'file_progress': file_progress
+        'file_progress': file_progress,
+        'cache': cache,
+        'categories': ExtractedFile.CATEGORY_CHOICES,
     })
 
 def job_progress(request, job_id):
-    """AJAX endpoint for detailed job progress"""
-    job = get_object_or_404(ExtractionJob, id=job_id)
-    file_progress = job.file_progress.all()
+    """AJAX endpoint for detailed job progress
+    
+    Running extraction tasks publish live counters to the cache; the
+    database rows are only the fallback (saved periodically and on state
+    changes).
+    """
+    get_object_or_404(ExtractionJob, id=job_id)
+    return JsonResponse(_job_progress_data(job_id))
+
+def _job_progress_data(job_id):
+    """Progress of a job: live cache counters over the rows, in one select_related query"""
+    file_progress = list(FileProgress.objects.filter(job_id=job_id).select_related('job', 'svo2_file'))
+    job = file_progress[0].job if file_progress else ExtractionJob.objects.get(id=job_id)
+    live_files = get_cached_progress(job_id)
     
     files_data = []
     for fp in file_progress:
-        files_data.append({
+        file_data = {
+            'id': fp.id,
             'filename': fp.svo2_file.filename,
             'status': fp.status,
             'progress': fp.progress,
             'current_frame': fp.current_frame,
             'total_frames': fp.total_frames,
-            'error_message': fp.error_message
-        })
+            'error_message': fp.error_message,
+            'fps': None,
+            'eta_seconds': None,
+        }
+        # Rows are authoritative once a file is done; the cache only knows its tasks finished
+        live = live_files.get(str(fp.id))
+        if live and fp.status == 'processing':
+            file_data.update(live, status=fp.status)
+        files_data.append(file_data)
     
-    return JsonResponse({
+    # Files run in parallel, so overall progress is their mean while the job runs
+    progress = job.progress
+    if job.status == 'processing' and files_data:
+        progress = sum(f['progress'] for f in files_data) / len(files_data)
+    
+    return {
         'status': job.status,
-        'progress': job.progress,
+        'progress': progress,
         'error_message': job.error_message,
         'files': files_data
-    })
+    }
+
+def _progress_delta(previous, current):
+    """Job fields and per-file entries of current that differ from previous"""
+    delta = {key: value for key, value in current.items() if key != 'files' and previous.get(key) != value}
+    previous_files = {f['id']: f for f in previous.get('files', [])}
+    files = [f for f in current['files'] if previous_files.get(f['id']) != f]
+    if files:
+        delta['files'] = files
+    return delta
+
+def job_progress_stream(request, job_id):
+    """Server-Sent Events stream of job progress
+    
+    Sends the full state first, then only what changed, checking once per
+    PROGRESS_STREAM_INTERVAL. Ends when the job finishes or after
+    PROGRESS_STREAM_MAX_SECONDS (the browser reconnects on its own);
+    job_progress remains the polling fallback.
+    """
+    get_object_or_404(ExtractionJob, id=job_id)
+    
+    def events():
+        previous = {}
+        started = time.monotonic()
+        last_sent = started
+        while True:
+            current = _job_progress_data(job_id)
+            delta = _progress_delta(previous, current)
+            if delta:
+                yield f'event: progress\ndata: {json.dumps(delta)}\n\n'
+                previous = current
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= 15:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+            
+            if current['status'] in ('completed', 'failed'):
+                return
+            if time.monotonic() - started >= settings.PROGRESS_STREAM_MAX_SECONDS:
+                return
+            time.sleep(settings.PROGRESS_STREAM_INTERVAL)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx buffering
+    return response
 
 def download_results(request, job_id):
-    """Download extraction results as ZIP"""
+    """Download extraction results as a ZIP streamed straight from the output folders
+    
+    Optional GET filters: category (repeatable), file (SVO2 upload id,
+    repeatable) and frame_start/frame_end (output frames, end exclusive).
+    """
     job = get_object_or_404(ExtractionJob, id=job_id)
     
     if job.status != 'completed':
         messages.error(request, 'Job not completed yet')
         return redirect('job_status', job_id=job_id)
     
-    if not os.path.exists(job.output_path):
-        messages.error(request, 'Result file not found')
+    output_base = os.path.join(settings.MEDIA_ROOT, 'extraction_results', f'job_{job_id}')
+    if not os.path.isdir(output_base):
+        messages.error(request, 'Result files not found')
+        return redirect('job_status', job_id=job_id)
+    
+    categories = request.GET.getlist('category') or None
+    file_ids = request.GET.getlist('file') or None
+    try:
+        frame_start = int(request.GET['frame_start']) if request.GET.get('frame_start') else None
+        frame_end = int(request.GET['frame_end']) if request.GET.get('frame_end') else None
+        if file_ids is not None:
+            file_ids = {int(file_id) for file_id in file_ids}
+    except ValueError:
+        messages.error(request, 'Invalid download filter')
+        return redirect('job_status', job_id=job_id)
+    
+    valid_categories = {category for category, _ in ExtractedFile.CATEGORY_CHOICES}
+    if categories is not None and not set(categories) <= valid_categories:
+        messages.error(request, f'Unknown category: {", ".join(sorted(set(categories) - valid_categories))}')
         return redirect('job_status', job_id=job_id)
     
-    response = FileResponse(open(job.output_path, 'rb'), content_type='application/zip')
-    response['Content-Disposition'] = f'attachment; filename="job_{job_id}_results.zip"'
+    members = archive_members(output_base, categories, file_ids, frame_start, frame_end)
+    response = StreamingHttpResponse(stream_zip(members), content_type='application/zip')
+    
+    filtered = any(value is not None for value in (categories, file_ids, frame_start, frame_end))
+    filename = f'job_{job_id}_subset.zip' if filtered else f'job_{job_id}_results.zip'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 def job_list(request):
@@ -335,14 +899,24 @@ def delete_job(request, job_id):
             shutil.rmtree(extraction_dir)
             deleted_dirs_count += 1
         
-        # 3. Get all uploaded SVO2 files associated with this job
-        svo2_files = job.svo2_files.all()
+        # 3. Get all uploaded SVO2 files associated with this job; deduplicated
+        # uploads also used by other jobs are kept
+        other_jobs = ExtractionJob.objects.exclude(id=job.id)
+        shared_files = SVO2Upload.objects.filter(id__in=job.svo2_files.values('id'), jobs__in=other_jobs).distinct()
+        svo2_files = job.svo2_files.exclude(id__in=shared_files.values('id'))
+        shared_files_count = shared_files.count()
         
         # 4. Delete the physical SVO2 files from disk
         for svo_file in svo2_files:
+            # Close pooled preview cameras holding the file open, and drop its cached previews
+            preview_pool.discard(svo_file.id)
+            discard_previews(svo_file.id)
             if svo_file.file and os.path.exists(svo_file.file.path):
                 os.remove(svo_file.file.path)
                 deleted_files_count += 1
+            for preview_file in (svo_file.thumbnail, svo_file.filmstrip):
+                if preview_file:
+                    preview_file.delete(save=False)
         
         # 5. Delete FileProgress records
         file_progress_count = job.file_progress.count()
@@ -362,6 +936,7 @@ def delete_job(request, job_id):
             f'Successfully deleted Job #{job_id}: '
             f'{deleted_files_count} files, {deleted_dirs_count} directories, '
             f'{svo2_files_count} SVO2 records'
+            + (f' ({shared_files_count} SVO2 files kept, used by other jobs)' if shared_files_count else '')
         )
         
     except Exception as e:
@@ -371,7 +946,13 @@ def delete_job(request, job_id):
 
 # Add these imports at the top
 from .models import ExtractedFile
+from .depth_store import STORE_FILENAME, load_depth_frame, load_depth_index
+from .video_writer import frame_table_path, read_frame_table, read_video_frame
+from .sensor_writer import read_sensor_rows
 import mimetypes
+import re
+import cv2
+import numpy as np
 
 # Add these new views at the end of the file
 
@@ -406,6 +987,9 @@ def browse_files(request, job_id):
         'categories': categories
     })
 
+# Rows of a CSV/sensor file rendered in the table viewer
+VIEWER_MAX_ROWS = 5000
+
 def view_file(request, file_id):
     """View individual extracted file"""
     extracted_file = get_object_or_404(ExtractedFile, id=file_id)
@@ -413,24 +997,39 @@ def view_file(request, file_id):
     # Determine viewer type based on file type
     viewer_template = None
     file_data = None
+    row_count = None
     
     if extracted_file.file_type == 'image':
         viewer_template = 'processor/viewers/image_viewer.html'
     elif extracted_file.file_type == 'point_cloud':
         viewer_template = 'processor/viewers/pointcloud_viewer.html'
-    elif extracted_file.file_type == 'csv':
+    elif extracted_file.file_type in ('csv', 'sensor'):
         viewer_template = 'processor/viewers/csv_viewer.html'
-        # Read CSV data
-        import csv
-        with open(extracted_file.file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            file_data = list(reader)
+        # Full-rate IMU files get large; only the first rows go into the page
+        file_data, row_count = read_sensor_rows(extracted_file.file_path, limit=VIEWER_MAX_ROWS)
     elif extracted_file.file_type == 'depth':
         viewer_template = 'processor/viewers/depth_viewer.html'
+        # Single-file depth store: expose the frame index for the frame slider
+        if extracted_file.filename == STORE_FILENAME:
+            index = load_depth_index(extracted_file.file_path)
+            written = index['svo_frame'] >= 0
+            file_data = {
+                'frame_count': len(index),
+                'written_count': int(written.sum()),
+                'last_frame': len(index) - 1,
+            }
+    elif extracted_file.file_type == 'video':
+        viewer_template = 'processor/viewers/video_viewer.html'
+        table = read_frame_table(frame_table_path(extracted_file.file_path))
+        file_data = {
+            'frame_count': len(table),
+            'last_frame': max(0, len(table) - 1),
+        }
     
     return render(request, viewer_template, {
         'file': extracted_file,
-        'file_data': file_data
+        'file_data': file_data,
+        'row_count': row_count
     })
 
 def serve_extracted_file(request, file_id):
@@ -445,16 +1044,115 @@ def serve_extracted_file(request, file_id):
     if content_type is None:
         content_type = 'application/octet-stream'
     
-    response = FileResponse(open(extracted_file.file_path, 'rb'), content_type=content_type)
+    # Videos are seeked by the browser with Range requests
+    range_match = re.match(r'bytes=(\d*)-(\d*)$', request.headers.get('Range', ''))
+    if range_match and extracted_file.file_type == 'video':
+        response = _ranged_file_response(extracted_file.file_path, content_type, *range_match.groups())
+    else:
+        response = FileResponse(open(extracted_file.file_path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
     
-    # For images, display inline; for others, download
-    if extracted_file.file_type == 'image':
+    # For images and videos, display inline; for others, download
+    if extracted_file.file_type in ('image', 'video'):
         response['Content-Disposition'] = f'inline; filename="{extracted_file.filename}"'
     else:
         response['Content-Disposition'] = f'attachment; filename="{extracted_file.filename}"'
     
     return response
 
+def _ranged_file_response(file_path, content_type, first, last, chunk_size=1024 * 1024):
+    """206 response for one byte range of a file (first/last as in the Range header)"""
+    file_size = os.path.getsize(file_path)
+    
+    if first:
+        start = int(first)
+        end = min(int(last), file_size - 1) if last else file_size - 1
+    elif last:
+        # Suffix range: the final N bytes
+        start = max(0, file_size - int(last))
+        end = file_size - 1
+    else:
+        start, end = 0, file_size - 1
+    
+    if start > end or start >= file_size:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{file_size}'
+        return response
+    
+    def read_range():
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    
+    response = StreamingHttpResponse(read_range(), status=206, content_type=content_type)
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+def video_frame(request, file_id):
+    """Decode one frame of an extracted video as a JPEG"""
+    extracted_file = get_object_or_404(ExtractedFile, id=file_id, file_type='video')
+    
+    if not os.path.exists(extracted_file.file_path):
+        return HttpResponse('File not found', status=404)
+    
+    video_frame_index = int(request.GET.get('frame', 0))
+    table = read_frame_table(frame_table_path(extracted_file.file_path))
+    if video_frame_index < 0 or video_frame_index >= len(table):
+        return HttpResponse('Frame out of range', status=404)
+    
+    image = read_video_frame(extracted_file.file_path, video_frame_index)
+    if image is None:
+        return HttpResponse('Failed to decode frame', status=500)
+    
+    ok, buffer = cv2.imencode('.jpg', image)
+    if not ok:
+        return HttpResponse('Failed to encode frame', status=500)
+    
+    row = table[video_frame_index]
+    response = HttpResponse(buffer.tobytes(), content_type='image/jpeg')
+    response['X-Frame-Index'] = row['frame_index']
+    response['X-SVO-Frame'] = row['svo_frame']
+    response['X-Timestamp-Ns'] = row['timestamp_ns']
+    return response
+
+def depth_store_frame(request, file_id):
+    """Render one frame of a single-file depth store as a colorized JPEG"""
+    extracted_file = get_object_or_404(ExtractedFile, id=file_id, filename=STORE_FILENAME)
+    
+    if not os.path.exists(extracted_file.file_path):
+        return HttpResponse('File not found', status=404)
+    
+    frame_index = int(request.GET.get('frame', 0))
+    index = load_depth_index(extracted_file.file_path)
+    if frame_index < 0 or frame_index >= len(index):
+        return HttpResponse('Frame out of range', status=404)
+    
+    # Only this frame is read from disk
+    depth = load_depth_frame(extracted_file.file_path, frame_index).astype(np.float32)
+    depth[~np.isfinite(depth)] = 0
+    
+    if depth.max() > 0:
+        depth_normalized = cv2.normalize(depth, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+    else:
+        depth_normalized = np.zeros_like(depth, dtype=np.uint8)
+    depth_colored = cv2.applyColorMap(depth_normalized, cv2.COLORMAP_JET)
+    
+    ok, buffer = cv2.imencode('.jpg', depth_colored)
+    if not ok:
+        return HttpResponse('Failed to encode frame', status=500)
+    
+    response = HttpResponse(buffer.tobytes(), content_type='image/jpeg')
+    response['X-SVO-Frame'] = str(int(index['svo_frame'][frame_index]))
+    return response
+
 def gallery_view(request, job_id, category):
     """Gallery view for a specific category"""
     job = get_object_or_404(ExtractionJob, id=job_id)
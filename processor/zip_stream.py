@@ -0,0 +1,117 @@
+import os
+import re
+import zipfile
+from .depth_store import STORE_FILENAME, INDEX_FILENAME
+from .svo2_processor import CATEGORY_FOLDERS
+
+# Already-compressed formats gain nothing from DEFLATE, so they are stored.
+# .npz files are stored only when written with np.savez_compressed.
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.mp4', '.mkv', '.lz4')
+
+# Bytes read from disk per write into the archive
+ZIP_CHUNK_BYTES = 1024 * 1024
+
+FOLDER_CATEGORIES = {folder: category for category, folder in CATEGORY_FOLDERS.items()}
+FRAME_FILE_RE = re.compile(r'^frame_(\d+)\.')
+SOURCE_DIR_RE = re.compile(r'^file_(\d+)_')
+
+
+def _npz_is_compressed(path):
+    """Whether every array in an .npz was compressed (np.savez_compressed)"""
+    try:
+        with zipfile.ZipFile(path) as npz:
+            members = npz.infolist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return bool(members) and all(member.compress_type != zipfile.ZIP_STORED for member in members)
+
+
+def zip_compression(path):
+    """ZIP_STORED for compressed formats and depth stores, ZIP_DEFLATED for the rest"""
+    filename = os.path.basename(path)
+    # Depth stores stay uncompressed so they remain memory-mappable once extracted
+    if filename in (STORE_FILENAME, INDEX_FILENAME) or filename.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    if filename.lower().endswith('.npz') and _npz_is_compressed(path):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def archive_members(output_base, categories=None, svo_file_ids=None, frame_start=None, frame_end=None):
+    """(path, arcname) of a job's output files matching the filters, in a stable order
+
+    Outputs are laid out as file_<svo id>_<name>/<category folder>/<file>.
+    The frame range (end exclusive) applies to per-frame files; per-file
+    outputs (videos, depth stores, sensor data, stats) are always kept.
+    Hidden bookkeeping files are skipped.
+    """
+    for source_dir in sorted(os.listdir(output_base)):
+        match = SOURCE_DIR_RE.match(source_dir)
+        if match is None:
+            continue
+        if svo_file_ids is not None and int(match.group(1)) not in svo_file_ids:
+            continue
+
+        for root, dirs, files in os.walk(os.path.join(output_base, source_dir)):
+            dirs.sort()
+            category = FOLDER_CATEGORIES.get(os.path.basename(root))
+            if categories is not None and category not in categories:
+                continue
+
+            for filename in sorted(files):
+                if filename.startswith('.'):
+                    continue
+                frame = FRAME_FILE_RE.match(filename)
+                if frame is not None:
+                    frame_number = int(frame.group(1))
+                    if frame_start is not None and frame_number < frame_start:
+                        continue
+                    if frame_end is not None and frame_number >= frame_end:
+                        continue
+                path = os.path.join(root, filename)
+                yield path, os.path.relpath(path, output_base)
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; the generator drains what was written
+
+    It has no tell/seek, so zipfile streams entries with data descriptors
+    instead of seeking back to patch sizes into the local headers.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(members, chunk_size=ZIP_CHUNK_BYTES):
+    """Yield a ZIP archive of (path, arcname) members piece by piece
+
+    Memory use is one chunk, whatever the archive size. Entries switch to
+    ZIP64 when their size needs it, and zipfile adds the ZIP64 end records
+    once the archive passes 4 GB or 65535 entries.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for path, arcname in members:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zip_compression(path)
+            with open(path, 'rb') as source, archive.open(info, 'w') as entry:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
@@ -1,8 +1,8 @@
 import os
 from celery import Celery
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'svo2_project.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zed_svo_processing.settings')
 
-app = Celery('svo2_project')
+app = Celery('zed_svo_processing')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
\ No newline at end of file
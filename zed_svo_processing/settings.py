@@ -94,9 +94,86 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# File upload settings
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10737418240  # 10GB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10737418240
+# File upload settings. Uploads larger than FILE_UPLOAD_MAX_MEMORY_SIZE are
+# spooled to disk, so memory per request stays bounded whatever the file size.
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB of form fields; file parts are streamed
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440
+
+# Form uploads are hashed while they stream in, for content deduplication
+FILE_UPLOAD_HANDLERS = ['processor.upload_handlers.HashingFileUploadHandler']
+
+# Chunked, resumable uploads (upload/sessions/). Temporary files must be on the
+# same filesystem as MEDIA_ROOT so finished uploads are moved, not copied.
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR', os.path.join(MEDIA_ROOT, 'upload_tmp'))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024 * 1024))  # Bytes per PATCH sent by the upload page
+UPLOAD_SESSION_EXPIRY_SECONDS = int(os.environ.get('UPLOAD_SESSION_EXPIRY_SECONDS', 7 * 24 * 3600))
+
+# Cache shared by the web and worker processes (live job progress). Set
+# CACHE_URL to a redis:// URL in production; the local-memory default only
+# works when jobs run inside the web process.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Progress reporting: cache updates every N seconds or M frames, database rows every K seconds
+PROGRESS_CACHE_INTERVAL = float(os.environ.get('PROGRESS_CACHE_INTERVAL', 0.5))
+PROGRESS_CACHE_FRAMES = int(os.environ.get('PROGRESS_CACHE_FRAMES', 100))
+PROGRESS_DB_INTERVAL = float(os.environ.get('PROGRESS_DB_INTERVAL', 10))
+
+# Server-Sent Events progress stream: check interval and lifetime of one connection
+PROGRESS_STREAM_INTERVAL = float(os.environ.get('PROGRESS_STREAM_INTERVAL', 1.0))
+PROGRESS_STREAM_MAX_SECONDS = int(os.environ.get('PROGRESS_STREAM_MAX_SECONDS', 300))
+
+# ExtractedFile rows inserted per bulk_create/transaction when registering outputs
+EXTRACTED_FILE_BATCH_SIZE = int(os.environ.get('EXTRACTED_FILE_BATCH_SIZE', 1000))
+
+# Open preview cameras kept per web process, and seconds before an idle one is closed
+PREVIEW_POOL_MAX_OPEN = int(os.environ.get('PREVIEW_POOL_MAX_OPEN', 4))
+PREVIEW_POOL_IDLE_SECONDS = int(os.environ.get('PREVIEW_POOL_IDLE_SECONDS', 120))
+
+# Rendered preview JPEGs kept per web process, plus an optional shared disk tier
+# (disabled when PREVIEW_CACHE_DIR is empty; safe to delete at any time)
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get('PREVIEW_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+PREVIEW_CACHE_DIR = os.environ.get('PREVIEW_CACHE_DIR', '')
+PREVIEW_CACHE_DISK_MAX_BYTES = int(os.environ.get('PREVIEW_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+
+# Frames rendered ahead of and behind each previewed frame (0 disables prefetch)
+PREVIEW_PREFETCH_FRAMES = int(os.environ.get('PREVIEW_PREFETCH_FRAMES', 3))
+
+# Thumbnail and filmstrip sprite rendered for each upload (depth disabled)
+UPLOAD_THUMBNAIL_WIDTH = int(os.environ.get('UPLOAD_THUMBNAIL_WIDTH', 320))
+FILMSTRIP_FRAMES = int(os.environ.get('FILMSTRIP_FRAMES', 20))
+FILMSTRIP_TILE_WIDTH = int(os.environ.get('FILMSTRIP_TILE_WIDTH', 160))
+
+# Seconds browsers may reuse a preview image before revalidating its ETag
+PREVIEW_IMAGE_MAX_AGE = int(os.environ.get('PREVIEW_IMAGE_MAX_AGE', 3600))
+
+# Content-addressed store of per-frame outputs shared between jobs. Must be on
+# the same filesystem as MEDIA_ROOT for hardlinks; safe to delete at any time.
+EXTRACTION_CACHE_ENABLED = os.environ.get('EXTRACTION_CACHE_ENABLED', '1') == '1'
+EXTRACTION_CACHE_DIR = os.environ.get('EXTRACTION_CACHE_DIR', os.path.join(MEDIA_ROOT, 'extraction_cache'))
+
+# Seconds between checkpoints of written frames (resume granularity)
+CHECKPOINT_INTERVAL = float(os.environ.get('CHECKPOINT_INTERVAL', 15))
+
+# A processing job whose heartbeat is older than this is considered orphaned
+# and resumed by recover_stale_jobs, unless some of its tasks are still
+# queued. Running tasks beat every PROGRESS_DB_INTERVAL.
+STALE_JOB_SECONDS = int(os.environ.get('STALE_JOB_SECONDS', 900))
+# Tasks queued longer than this are presumed lost and no longer keep a job alive
+MAX_QUEUED_SECONDS = int(os.environ.get('MAX_QUEUED_SECONDS', 6 * 60 * 60))
+MAX_JOB_RESUMES = int(os.environ.get('MAX_JOB_RESUMES', 3))
+RECOVER_JOBS_ON_WORKER_START = os.environ.get('RECOVER_JOBS_ON_WORKER_START', '1') == '1'
 
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -104,4 +181,14 @@ CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localho
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = TIME_ZONE
\ No newline at end of file
+CELERY_TIMEZONE = TIME_ZONE
+
+# Extraction tasks per worker (each SVO file or shard is one task); tasks are
+# long, so a worker only reserves the one it is running
+CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', 2))
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Run tasks inline instead of on a worker (tests, local runs); without Redis
+# also set CELERY_BROKER_URL=memory:// and CELERY_RESULT_BACKEND=cache+memory://
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', '0') == '1'
+CELERY_TASK_EAGER_PROPAGATES = True
\ No newline at end of file